@@ -0,0 +1,127 @@
+"""
+Import/export throughput benchmark against local stub server (see stub_server.py), runs fully offline.
+Import scenario performs paginated search through ListImportRequest and parses issues with response configuration.
+Export scenario renders set-field requests with CfgTemplate and sends them through ExportRequest on a thread pool
+with RetryPolicy, the same way Exporter does (MongoDB source/callback are not involved).
+Usage: python benchmarks/integration.py [--items 10000] [--page-size 100] [--concurrency 8] [--latency 0.005]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from benchmarks.stub_server import StubServer
+from na3x.integration.request import BulkExportRequest, ExportRequest, ImportRequest
+from na3x.integration.throttle import RetryPolicy
+from na3x.utils.cfg import CfgTemplate
+
+SEARCH_CFG = {
+    'request': {'url': '$url/rest/api/2/search', 'data': {'jql': 'project = PRJ', 'maxResults': 100, 'startAt': 0}},
+    'response': {
+        'content-root': 'issues',
+        'issues': {'type': 'array', 'fields': {'root': {'type': 'object', 'explicit': True, 'fields': {
+            'key': {'key': 'key', 'type': 'string'},
+            'fields': {'key': 'fields', 'type': 'object', 'fields': {
+                'summary': {'key': 'summary', 'type': 'string'},
+                'status': {'key': 'status', 'type': 'object', 'fields': {
+                    'status': {'key': 'name', 'type': 'string', 'ext_id': 'status'}}},
+                'points': {'key': 'customfield_10002', 'type': 'float', 'ext_id': 'points'},
+                'updated': {'key': 'updated', 'type': 'datetime'},
+                'components': {'key': 'components', 'type': 'array', 'fields': {
+                    'component': {'type': 'object', 'fields': {'name': {'key': 'name', 'type': 'string'}}}}},
+                'labels': {'key': 'labels', 'type': 'array'}}}}}}}}}
+
+SET_FIELD_CFG = '{"request": {"url": "$url/rest/api/2/issue/$key", "data": {"update": {"labels": [{"add": "$label"}]}}}}'
+
+BULK_CREATE_CFG = '{"request": {"url": "$url/rest/api/2/issue", "data": {"fields": {"summary": "$summary"}}}, ' \
+                  '"bulk": {"url": "$url/rest/api/2/issue/bulk", "data": {"issueUpdates": "$items"}, "size": 50, ' \
+                  '"result": "issues"}}'
+
+
+def measure(func):
+    """
+    Measures wall time, CPU time and peak Python memory of func
+    :return: (func result, wall seconds, cpu seconds, peak memory bytes)
+    """
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    cpu_started_at = time.process_time()
+    res = func()
+    cpu = time.process_time() - cpu_started_at
+    wall = time.perf_counter() - started_at
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return res, wall, cpu, peak
+
+
+def run_import(server, page_size, streaming):
+    cfg = CfgTemplate(json.dumps(SEARCH_CFG), {'url': server.url}).render()
+    cfg['request']['data']['maxResults'] = page_size
+    if streaming:
+        cfg['request']['stream'] = True
+    counter = {'items': 0}
+
+    def count_page(page):
+        counter['items'] += len(page)
+
+    ImportRequest.factory(cfg, 'login', 'pswd', ImportRequest.TYPE_GET_LIST, count_page)
+    return counter['items']
+
+
+def run_export(server, items, concurrency, bulk):
+    template = CfgTemplate(BULK_CREATE_CFG if bulk else SET_FIELD_CFG, {'url': server.url},
+                           ['summary'] if bulk else ['key', 'label'])
+    retry_policy = RetryPolicy(max_retries=5, backoff=0.01)
+    if bulk:
+        cfgs = [template.render({'summary': 'Issue {:d}'.format(i)}) for i in range(items)]
+        batches = [cfgs[i:i + 50] for i in range(0, items, 50)]
+        func = lambda batch: retry_policy.call(lambda: BulkExportRequest(batch, 'login', 'pswd').result)
+        work = batches
+    else:
+        work = [template.render({'key': 'PRJ-{:d}'.format(i), 'label': 'bench'}) for i in range(items)]
+        func = lambda cfg: retry_policy.call(
+            lambda: ExportRequest.factory(cfg, 'login', 'pswd', ExportRequest.TYPE_SET_FIELD_VALUE).result)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(func, work))
+    return items
+
+
+def report(name, items, requests, wall, cpu, peak):
+    per_10k = 10000.0 / items if items else 0
+    print('{:<22} {:>8d} items {:>7d} requests {:>9.1f} req/s {:>8.2f}s total {:>7.2f}s cpu/10k {:>8.1f}MB peak/10k'.format(
+        name, items, requests, requests / wall if wall else 0, wall, cpu * per_10k, peak * per_10k / 1024 / 1024))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=10000)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.005)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--payload-size', type=int, default=1000)
+    args = parser.parse_args()
+    server = StubServer(issues=args.items, latency=args.latency, error_rate=args.error_rate,
+                        payload_size=args.payload_size, seed=0).start()
+    try:
+        scenarios = [('import', lambda: run_import(server, args.page_size, False)),
+                     ('export set_field', lambda: run_export(server, args.items, args.concurrency, False)),
+                     ('export bulk create', lambda: run_export(server, args.items, args.concurrency, True))]
+        try:
+            import ijson  # noqa: F401
+            scenarios.insert(1, ('import streaming', lambda: run_import(server, args.page_size, True)))
+        except ImportError:
+            pass
+        for name, scenario in scenarios:
+            requests_before = server.requests
+            items, wall, cpu, peak = measure(scenario)
+            report(name, items, server.requests - requests_before, wall, cpu, peak)
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
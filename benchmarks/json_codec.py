@@ -0,0 +1,75 @@
+"""
+Compares JSONCodec backends on representative payloads
+Usage: python benchmarks/json_codec.py [--items 500] [--repeat 20]
+"""
+import argparse
+import datetime
+import os
+import sys
+import timeit
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from na3x.utils.codec import JSONCodec
+
+
+def search_page(items):
+    """
+    Jira search response page with expanded issues
+    """
+    return {'startAt': 0, 'maxResults': items, 'total': items * 10, 'issues': [
+        {'id': str(10000 + i), 'key': 'PRJ-{:d}'.format(i), 'self': 'https://jira/rest/api/2/issue/{:d}'.format(i),
+         'fields': {'summary': 'Issue summary {:d} – details'.format(i),
+                    'description': 'Line 1\nLine 2\tTabbed ' * 10,
+                    'status': {'name': 'In Progress', 'id': '3'},
+                    'components': [{'name': 'backend', 'id': '1'}, {'name': 'ui', 'id': '2'}],
+                    'labels': ['label{:d}'.format(j) for j in range(5)],
+                    'customfield_10002': 3.5, 'created': '2017-10-01T10:01:00.479+0300',
+                    'updated': '2017-10-02T11:15:30.000+0300'}} for i in range(items)]}
+
+
+def export_payloads(items):
+    """
+    Export request bodies
+    """
+    return [{'update': {'labels': [{'add': 'label{:d}'.format(i)}]}} for i in range(items)]
+
+
+def api_response(items):
+    """
+    REST API response with dates
+    """
+    return [{'key': 'PRJ-{:d}'.format(i), 'date': datetime.datetime(2017, 10, 1 + i % 28),
+             'group': 'team', 'estimate': i * 0.5} for i in range(items)]
+
+
+def bench(backend, items, repeat):
+    JSONCodec.use(backend)
+    page = search_page(items)
+    raw = JSONCodec.dumps(page).encode('utf-8')
+    exports = export_payloads(items)
+    api = api_response(items)
+    return {
+        'loads search page': timeit.timeit(lambda: JSONCodec.loads(raw), number=repeat) / repeat,
+        'dumps export requests': timeit.timeit(lambda: [JSONCodec.dumps(p) for p in exports], number=repeat) / repeat,
+        'dumps api response': timeit.timeit(lambda: JSONCodec.dumps(api), number=repeat) / repeat
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    backends = [JSONCodec.BACKEND_STDLIB]
+    try:
+        JSONCodec.use(JSONCodec.BACKEND_ORJSON)
+        backends.append(JSONCodec.BACKEND_ORJSON)
+    except ImportError:
+        print('orjson is not installed, only stdlib is measured')
+    results = {backend: bench(backend, args.items, args.repeat) for backend in backends}
+    print('{:<24}'.format('payload') + ''.join('{:>14}'.format(backend) for backend in backends))
+    for case in results[JSONCodec.BACKEND_STDLIB]:
+        print('{:<24}'.format(case) + ''.join('{:>12.2f}ms'.format(results[backend][case] * 1000) for backend in backends))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""
+Local stub of Jira REST API for offline benchmarks
+    GET    /rest/api/2/search?startAt=0&maxResults=50   paginated synthetic issues (total, startAt, maxResults, issues)
+    GET    /rest/api/2/issue/<key>                      single issue
+    POST   /rest/api/2/issue                            creates issue, returns {"id", "key", "self"}
+    POST   /rest/api/2/issue/bulk                       creates issues, returns {"issues": [...], "errors": []}
+    PUT    /rest/api/2/issue/<key>                      updates issue (204)
+    POST   /rest/api/2/issueLink                        creates relation (201)
+    DELETE /rest/api/2/issue/<key>                      deletes issue (204)
+Usage: python benchmarks/stub_server.py [--port 8089] [--issues 10000] [--latency 0.01] [--error-rate 0.01]
+"""
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class StubServer:
+    """
+    Threaded stub REST server with configurable latency, error rate and payload size
+    """
+    def __init__(self, port=0, issues=10000, latency=0.0, error_rate=0.0, payload_size=1000, seed=None):
+        """
+        Constructor
+        :param port: port to listen (0 - any free port)
+        :param issues: number of issues returned by search
+        :param latency: response delay, seconds
+        :param error_rate: share of requests failed with 503 and Retry-After: 0
+        :param payload_size: approximate size of issue description, bytes
+        :param seed: random seed
+        """
+        self.issues = issues
+        self.latency = latency
+        self.error_rate = error_rate
+        self.payload_size = payload_size
+        self.random = random.Random(seed)
+        self.counter = itertools.count(1)
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.__server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+        self.__server.daemon_threads = True
+        self.__server.stub = self
+        self.__thread = None
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{:d}'.format(self.__server.server_address[1])
+
+    def issue(self, i):
+        """
+        Synthetic issue
+        :param i: issue number
+        :return: issue (dict)
+        """
+        return {'id': str(10000 + i), 'key': 'PRJ-{:d}'.format(i), 'self': '{}/rest/api/2/issue/{:d}'.format(self.url, i),
+                'fields': {'summary': 'Issue {:d}'.format(i),
+                           'description': ('lorem ipsum ' * (self.payload_size // 12 + 1))[:self.payload_size],
+                           'status': {'name': ['To Do', 'In Progress', 'Done'][i % 3], 'id': str(i % 3)},
+                           'issuetype': {'name': 'Story', 'id': '10001'},
+                           'components': [{'name': 'backend', 'id': '1'}, {'name': 'ui', 'id': '2'}][:1 + i % 2],
+                           'labels': ['label{:d}'.format(j) for j in range(i % 4)],
+                           'customfield_10002': float(i % 8),
+                           'created': '2017-10-01T10:01:00.000+0300',
+                           'updated': '2017-10-{:02d}T11:15:30.000+0300'.format(1 + i % 28)}}
+
+    def start(self):
+        """
+        Starts server in background thread
+        :return: self
+        """
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops server
+        """
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def serve_forever(self):
+        self.__server.serve_forever()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def __reply(self, status, body=None, headers=None):
+        content = json.dumps(body).encode('utf-8') if body is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in (headers if headers else {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def __read_body(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length)) if length > 0 else None
+
+    def __handle(self, method):
+        stub = self.server.stub
+        with stub.lock:
+            stub.requests += 1
+            is_error = stub.random.random() < stub.error_rate
+        body = self.__read_body() if method in ['POST', 'PUT'] else None
+        if stub.latency:
+            time.sleep(stub.latency)
+        if is_error:
+            return self.__reply(503, {'errorMessages': ['stub error']}, {'Retry-After': '0'})
+        url = urlparse(self.path)
+        path = url.path.rstrip('/')
+        if method == 'GET' and path == '/rest/api/2/search':
+            params = parse_qs(url.query)
+            start_at = int(params.get('startAt', ['0'])[0])
+            max_results = int(params.get('maxResults', ['50'])[0])
+            return self.__reply(200, {'startAt': start_at, 'maxResults': max_results, 'total': stub.issues,
+                                      'issues': [stub.issue(i) for i in
+                                                 range(start_at, min(start_at + max_results, stub.issues))]})
+        if path.startswith('/rest/api/2/issue/') and path != '/rest/api/2/issue/bulk':
+            if method == 'GET':
+                return self.__reply(200, stub.issue(int(path.split('-')[-1]) if '-' in path else 0))
+            return self.__reply(204)
+        if method == 'POST' and path == '/rest/api/2/issue':
+            i = next(stub.counter)
+            return self.__reply(201, {'id': str(i), 'key': 'NEW-{:d}'.format(i)})
+        if method == 'POST' and path == '/rest/api/2/issue/bulk':
+            items = body.get('issueUpdates', []) if body else []
+            return self.__reply(201, {'issues': [{'id': str(i), 'key': 'NEW-{:d}'.format(i)}
+                                                 for i in [next(stub.counter) for _ in items]], 'errors': []})
+        if method == 'POST' and path == '/rest/api/2/issueLink':
+            return self.__reply(201)
+        return self.__reply(404, {'errorMessages': ['not found']})
+
+    def do_GET(self):
+        self.__handle('GET')
+
+    def do_POST(self):
+        self.__handle('POST')
+
+    def do_PUT(self):
+        self.__handle('PUT')
+
+    def do_DELETE(self):
+        self.__handle('DELETE')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--issues', type=int, default=10000)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--payload-size', type=int, default=1000)
+    args = parser.parse_args()
+    server = StubServer(args.port, args.issues, args.latency, args.error_rate, args.payload_size)
+    print('stub server is listening on {}'.format(server.url))
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
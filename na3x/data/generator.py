@@ -1,5 +1,6 @@
 import json
 import logging
+from na3x.integration.cassette import Cassette
 from na3x.integration.exporter import Exporter
 from na3x.integration.importer import Importer
 from na3x.transformation.transformer import Transformer
@@ -9,6 +10,9 @@ from na3x.utils.cfg import CfgUtils
 class Generator():
     """
     Performs sequence of export/imports operations in order to generate set of consistent data
+	"cassette": "./cassettes/generation.jsonl.gz", <optional: record or replay HTTP traffic of all steps, see Cassette>
+	"cassette.mode": "replay",
+	"cassette.timing": "fast"
     """
     __CFG_KEY_STEPS = 'steps'
     __CFG_KEY_STEP_TYPE = 'type'
@@ -25,6 +29,8 @@ class Generator():
         self.__env_cfg = env_params
 
     def perform(self):
+        cassette = Cassette.from_cfg(self.__cfg)
+        Cassette.bind(cassette)
         try:
             for step in self.__cfg[Generator.__CFG_KEY_STEPS]:
                 step_type = self.__cfg[Generator.__CFG_KEY_STEPS][step][Generator.__CFG_KEY_STEP_TYPE]
@@ -41,3 +47,7 @@ class Generator():
                     Transformer(step_cfg).transform_data()
         except Exception as e:
             logging.error(e, exc_info=True)
+        finally:
+            if cassette:
+                cassette.close()
+            Cassette.bind(None)
@@ -0,0 +1,319 @@
+import json
+import logging
+import math
+import threading
+from na3x.db.connect import MongoDb
+from na3x.db.data import CRUD, BulkWriter, Trigger
+from na3x.cfg import get_env_params
+
+
+class MaterializedAggregates:
+    """
+    Aggregates (sum, count, min, max, mean) of collection field per group kept in side collection <collection>.aggregates,
+    declared aggregates are updated incrementally by documents changed through Accessor (see AggregatesCaptureTrigger
+    and AggregatesRefreshTrigger), groups are rescanned only if delta could not be applied (see update)
+    Aggregates are declared by declare() and are used by validator aggregate() getter with "materialized": true param.
+    Writes bypassing Accessor should be followed by refresh(), e.g. Importer refreshes aggregates of imported collections
+    Example of triggers configuration (triggers.json):
+		"sprint.backlog": {
+			"before-upsert": "na3x.db.aggregates.AggregatesCaptureTrigger",
+			"after-upsert": "na3x.db.aggregates.AggregatesRefreshTrigger",
+			"before-delete": "na3x.db.aggregates.AggregatesCaptureTrigger",
+			"after-delete": "na3x.db.aggregates.AggregatesRefreshTrigger"
+		}
+    Other triggers of the collection are chained with aggregates triggers as list (see Trigger), e.g.
+			"after-upsert": ["<trigger class>", "na3x.db.aggregates.AggregatesRefreshTrigger"]
+    """
+    FUNC_SUM = 'sum'
+    FUNC_COUNT = 'count'
+    FUNC_MIN = 'min'
+    FUNC_MAX = 'max'
+    FUNC_MEAN = 'mean'
+    FUNCS = [FUNC_SUM, FUNC_COUNT, FUNC_MIN, FUNC_MAX, FUNC_MEAN]
+
+    KEY_TYPE = 'type'
+    KEY_GROUP_BY = 'group_by'
+    KEY_FIELD = 'field'
+    KEY_GROUP = 'group'
+    TYPE_DECLARATION = 'declaration'
+    TYPE_VALUE = 'value'
+
+    __COLLECTION_SUFFIX = '.aggregates'
+
+    @staticmethod
+    def factory(db, collection):
+        """
+        Instantiate MaterializedAggregates
+        :param db: db descriptor in env.json
+        :param collection: aggregated collection
+        :return: MaterializedAggregates instance for current environment
+        """
+        return MaterializedAggregates(MongoDb(get_env_params()[db]).connection, collection)
+
+    @staticmethod
+    def collection_name(collection):
+        """
+        Returns side collection of aggregates
+        :param collection: aggregated collection
+        :return: collection name
+        """
+        return '{}{}'.format(collection, MaterializedAggregates.__COLLECTION_SUFFIX)
+
+    @staticmethod
+    def declaration_match(group_by, field):
+        return {MaterializedAggregates.KEY_TYPE: MaterializedAggregates.TYPE_DECLARATION,
+                MaterializedAggregates.KEY_GROUP_BY: sorted(group_by), MaterializedAggregates.KEY_FIELD: field}
+
+    @staticmethod
+    def value_match(group_by, field, group):
+        """
+        Returns query that matches aggregates document of group
+        :param group_by: group fields
+        :param field: aggregated field
+        :param group: group values {<group field>: <value>}
+        :return: query
+        """
+        match = {MaterializedAggregates.KEY_TYPE: MaterializedAggregates.TYPE_VALUE,
+                 MaterializedAggregates.KEY_GROUP_BY: sorted(group_by), MaterializedAggregates.KEY_FIELD: field}
+        match.update({'{}.{}'.format(MaterializedAggregates.KEY_GROUP, key): group.get(key) for key in group_by})
+        return match
+
+    @staticmethod
+    def value(aggregates, func):
+        """
+        Returns aggregate value
+        :param aggregates: aggregates document {'sum': ..., 'count': ..., 'min': ..., 'max': ...}
+        :param func: FUNC_SUM || FUNC_COUNT || FUNC_MIN || FUNC_MAX || FUNC_MEAN
+        :return: value, NaN for mean/min/max of group without values (as Aggregator returns)
+        """
+        if func == MaterializedAggregates.FUNC_MEAN:
+            return aggregates[MaterializedAggregates.FUNC_SUM] / aggregates[MaterializedAggregates.FUNC_COUNT] \
+                if aggregates[MaterializedAggregates.FUNC_COUNT] else math.nan
+        if func in [MaterializedAggregates.FUNC_MIN, MaterializedAggregates.FUNC_MAX] and aggregates[func] is None:
+            return math.nan
+        return aggregates[func]
+
+    @staticmethod
+    def apply_delta(aggregates, removed=None, added=None):
+        """
+        Applies replacement of single aggregated value (what-if)
+        :param aggregates: aggregates document
+        :param removed: value removed from group (None - nothing is removed)
+        :param added: value added to group (None - nothing is added)
+        :return: new aggregates document or None if it could not be calculated without rescan (removed min/max)
+        """
+        res = {func: aggregates[func] for func in [MaterializedAggregates.FUNC_SUM, MaterializedAggregates.FUNC_COUNT,
+                                                   MaterializedAggregates.FUNC_MIN, MaterializedAggregates.FUNC_MAX]}
+        if removed is not None:
+            if removed == res[MaterializedAggregates.FUNC_MIN] or removed == res[MaterializedAggregates.FUNC_MAX]:
+                return None
+            res[MaterializedAggregates.FUNC_SUM] -= removed
+            res[MaterializedAggregates.FUNC_COUNT] -= 1
+        if added is not None:
+            res[MaterializedAggregates.FUNC_SUM] += added
+            res[MaterializedAggregates.FUNC_COUNT] += 1
+            res[MaterializedAggregates.FUNC_MIN] = added if res[MaterializedAggregates.FUNC_MIN] is None else min(
+                res[MaterializedAggregates.FUNC_MIN], added)
+            res[MaterializedAggregates.FUNC_MAX] = added if res[MaterializedAggregates.FUNC_MAX] is None else max(
+                res[MaterializedAggregates.FUNC_MAX], added)
+        return res
+
+    def __init__(self, db, collection):
+        """
+        Constructor
+        :param db: db connection
+        :param collection: aggregated collection
+        """
+        self.__logger = logging.getLogger(__class__.__name__)
+        self.__db = db
+        self.__collection = collection
+        self.__aggregates_collection = MaterializedAggregates.collection_name(collection)
+
+    def declare(self, group_by, field):
+        """
+        Declares aggregates of field per group and calculates them for all groups
+        :param group_by: list of group fields
+        :param field: aggregated field
+        """
+        declaration = MaterializedAggregates.declaration_match(group_by, field)
+        CRUD.upsert_single(self.__db, self.__aggregates_collection, declaration, declaration)
+        self.__refresh(declaration[MaterializedAggregates.KEY_GROUP_BY], field, None)
+
+    def declarations(self):
+        """
+        Returns declared aggregates
+        :return: list of {'group_by': [<group field>, ...], 'field': <aggregated field>}
+        """
+        return CRUD.read_multi(self.__db, self.__aggregates_collection,
+                               {MaterializedAggregates.KEY_TYPE: MaterializedAggregates.TYPE_DECLARATION})
+
+    def refresh(self, groups=None):
+        """
+        Recalculates declared aggregates of groups
+        :param groups: list of objects with group fields values, e.g. written documents (None - all groups)
+        """
+        for declaration in self.declarations():
+            self.__refresh(declaration[MaterializedAggregates.KEY_GROUP_BY],
+                           declaration[MaterializedAggregates.KEY_FIELD], groups)
+
+    def update(self, changes):
+        """
+        Updates declared aggregates incrementally (see apply_delta), groups are rescanned if delta could not be applied:
+        removed min/max, not numeric value, removed document could be last one of group
+        :param changes: list of (<document before write or None if inserted>, <document after write or None if deleted>)
+        """
+        for declaration in self.declarations():
+            self.__update(declaration[MaterializedAggregates.KEY_GROUP_BY],
+                          declaration[MaterializedAggregates.KEY_FIELD], changes)
+
+    @staticmethod
+    def __value_document(group_by, field, group, aggregates):
+        document = {MaterializedAggregates.KEY_TYPE: MaterializedAggregates.TYPE_VALUE,
+                    MaterializedAggregates.KEY_GROUP_BY: group_by, MaterializedAggregates.KEY_FIELD: field,
+                    MaterializedAggregates.KEY_GROUP: group}
+        document.update({func: aggregates[func] for func in [MaterializedAggregates.FUNC_SUM,
+                                                             MaterializedAggregates.FUNC_COUNT,
+                                                             MaterializedAggregates.FUNC_MIN,
+                                                             MaterializedAggregates.FUNC_MAX]})
+        return document
+
+    @staticmethod
+    def __is_number(value):
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    def __update(self, group_by, field, changes):
+        deltas = {}  # group key: (group, [(removed, added), ...])
+
+        def add_delta(obj, removed, added):
+            group = {key: obj.get(key) for key in group_by}
+            deltas.setdefault(json.dumps(group, sort_keys=True, default=str), (group, []))[1].append((removed, added))
+
+        for before, after in changes:
+            if before is not None and after is not None and \
+                    all(before.get(key) == after.get(key) for key in group_by + [field]):
+                continue  # aggregated field and group are not changed
+            if before is not None:
+                add_delta(before, before, None)
+            if after is not None:
+                add_delta(after, None, after)
+        writer = BulkWriter(self.__db, self.__aggregates_collection)
+        rescan = []
+        for group, group_deltas in deltas.values():
+            match = MaterializedAggregates.value_match(group_by, field, group)
+            aggregates = CRUD.read_single(self.__db, self.__aggregates_collection, match)
+            if not aggregates:
+                aggregates = {MaterializedAggregates.FUNC_SUM: 0, MaterializedAggregates.FUNC_COUNT: 0,
+                              MaterializedAggregates.FUNC_MIN: None, MaterializedAggregates.FUNC_MAX: None}
+            for removed, added in group_deltas:
+                removed_value = removed.get(field) if removed is not None else None
+                added_value = added.get(field) if added is not None else None
+                if (removed is not None and not MaterializedAggregates.__is_number(removed_value)) or \
+                        (added_value is not None and not MaterializedAggregates.__is_number(added_value)):
+                    aggregates = None
+                else:
+                    aggregates = MaterializedAggregates.apply_delta(aggregates, removed_value, added_value)
+                if not aggregates or (removed is not None and not aggregates[MaterializedAggregates.FUNC_COUNT]):
+                    rescan.append(group)
+                    break
+            else:
+                writer.update(MaterializedAggregates.__value_document(group_by, field, group, aggregates), match,
+                              upsert=True)
+        writer.flush()
+        if rescan:
+            self.__refresh(group_by, field, rescan)
+
+    def __refresh(self, group_by, field, groups):
+        group_ids = {'g{:d}'.format(i): key for i, key in enumerate(group_by)}
+        pipeline = []
+        keys = None
+        if groups is not None:
+            keys = {json.dumps(group, sort_keys=True, default=str): group for group in
+                    [{key: obj.get(key) for key in group_by} for obj in groups if isinstance(obj, dict)]}
+            if len(keys) == 0:
+                return
+            pipeline.append({'$match': {'$or': list(keys.values())}})
+        value = '${}'.format(field)
+        pipeline.append({'$group': {
+            '_id': {group_id: '${}'.format(key) for group_id, key in group_ids.items()},
+            MaterializedAggregates.FUNC_SUM: {'$sum': value},
+            MaterializedAggregates.FUNC_COUNT: {'$sum': {'$cond': [{'$eq': [{'$ifNull': [value, None]}, None]}, 0, 1]}},
+            MaterializedAggregates.FUNC_MIN: {'$min': value},
+            MaterializedAggregates.FUNC_MAX: {'$max': value}}})
+        writer = BulkWriter(self.__db, self.__aggregates_collection)
+        if groups is None:
+            CRUD.delete_multi(self.__db, self.__aggregates_collection, {
+                MaterializedAggregates.KEY_TYPE: MaterializedAggregates.TYPE_VALUE,
+                MaterializedAggregates.KEY_GROUP_BY: group_by, MaterializedAggregates.KEY_FIELD: field})
+        refreshed = set()
+        for row in CRUD.aggregate(self.__db, self.__collection, pipeline):
+            group = {key: row['_id'].get(group_id) for group_id, key in group_ids.items()}
+            refreshed.add(json.dumps(group, sort_keys=True, default=str))
+            writer.update(MaterializedAggregates.__value_document(group_by, field, group, row),
+                          MaterializedAggregates.value_match(group_by, field, group), upsert=True)
+        for key, group in (keys.items() if keys else []):
+            if key not in refreshed:  # group is empty
+                writer.delete(MaterializedAggregates.value_match(group_by, field, group))
+        writer.flush()
+        self.__logger.debug('{}: aggregates of {} by {} refreshed for {} groups'.format(
+            self.__collection, field, group_by, len(keys) if keys is not None else 'all'))
+
+
+class AggregatesCaptureTrigger(Trigger):
+    """
+    Before upsert/delete trigger, captures groups of documents to be changed (see MaterializedAggregates)
+    """
+    _pending = threading.local()
+
+    def execute(self, input_object, match_params):
+        if not MaterializedAggregates(self._db, self._collection).declarations():
+            return
+        if isinstance(input_object, list):
+            documents = []  # insert, no documents are changed
+        elif match_params:
+            documents = CRUD.read_multi(self._db, self._collection, match_params, True)
+        else:
+            documents = None  # all documents are affected
+        AggregatesCaptureTrigger.__get_pending()[self._collection] = documents
+
+    @staticmethod
+    def __get_pending():
+        if not hasattr(AggregatesCaptureTrigger._pending, 'documents'):
+            AggregatesCaptureTrigger._pending.documents = {}
+        return AggregatesCaptureTrigger._pending.documents
+
+    @staticmethod
+    def pop(collection):
+        """
+        Returns documents captured before write
+        :param collection: collection
+        :return: (True, list of documents with '_id' or None if all documents are affected) or (False, None) if not
+        captured
+        """
+        pending = AggregatesCaptureTrigger.__get_pending()
+        if collection not in pending:
+            return False, None
+        return True, pending.pop(collection)
+
+
+class AggregatesRefreshTrigger(Trigger):
+    """
+    After upsert/delete trigger, updates aggregates by documents changed by write (see MaterializedAggregates.update)
+    """
+    def execute(self, input_object, match_params):
+        is_captured, documents = AggregatesCaptureTrigger.pop(self._collection)
+        if not is_captured:
+            return
+        aggregates = MaterializedAggregates(self._db, self._collection)
+        if documents is None:
+            aggregates.refresh()
+        elif isinstance(input_object, list):
+            aggregates.update([(None, document) for document in input_object])  # inserted documents
+        elif documents:
+            # documents are read back by id: single upsert/delete changes only one of captured documents
+            written = {document['_id']: document for document in CRUD.read_multi(
+                self._db, self._collection, {'_id': {'$in': [document['_id'] for document in documents]}}, True)}
+            aggregates.update([(document, written.get(document['_id'])) for document in documents])
+        elif isinstance(input_object, dict):
+            upserted = {key: value for key, value in match_params.items()
+                        if not key.startswith('$') and not isinstance(value, dict)}
+            aggregates.refresh([dict(upserted, **input_object)])  # document could be inserted by upsert
@@ -1,5 +1,7 @@
 import abc
 import logging
+import threading
+from pymongo import UpdateOne, DeleteOne
 from na3x.db.connect import MongoDb
 from na3x.utils.object import obj_for_name
 from na3x.cfg import na3x_cfg, NA3X_TRIGGERS, get_env_params
@@ -21,15 +23,44 @@ class CRUD:
         return db[collection].find_one(match_params if match_params else {}, {'_id': False})
 
     @staticmethod
-    def read_multi(db, collection, match_params=None):
+    def read_multi(db, collection, match_params=None, is_id=False):
         """
         Wrapper for pymongo.find()
         :param db: db connection
         :param collection: collection to read data from
         :param match_params: a query that matches the documents to select
+        :param is_id: '_id' is included in result (default - False)
+        :return: list of documents ('_id' is excluded from result unless is_id is set)
+        """
+        return list(db[collection].find(match_params if match_params else {}, None if is_id else {'_id': False}))
+
+    @staticmethod
+    def read_chunk(db, collection, key, after=None, size=500, match_params=None):
+        """
+        Reads documents ordered by key field, chunk by chunk
+        :param db: db connection
+        :param collection: collection to read data from
+        :param key: key field
+        :param after: key value of last document of previous chunk (None - first chunk)
+        :param size: max number of documents
+        :param match_params: a query that matches the documents to select
         :return: list of documents ('_id' is excluded from result)
         """
-        return list(db[collection].find(match_params if match_params else {}, {'_id': False}))
+        query = dict(match_params) if match_params else {}
+        if after is not None:
+            query = {'$and': [query, {key: {'$gt': after}}]} if query else {key: {'$gt': after}}
+        return list(db[collection].find(query, {'_id': False}).sort(key, 1).limit(size))
+
+    @staticmethod
+    def aggregate(db, collection, pipeline):
+        """
+        Wrapper for pymongo.aggregate()
+        :param db: db connection
+        :param collection: collection to aggregate
+        :param pipeline: aggregation pipeline
+        :return: list of documents
+        """
+        return list(db[collection].aggregate(pipeline))
 
     @staticmethod
     def delete_single(db, collection, match_params=None):
@@ -81,9 +112,118 @@ class CRUD:
             return str(db[collection].update_many(match_params, {"$set": object}, upsert=False).upserted_id)
 
 
+class BulkWriter:
+    """
+    Buffers collection updates and flushes them as unordered pymongo.bulk_write() batches.
+    If flush_interval is set buffered operations are flushed by timer even if no more operations are queued,
+    error of timer flush is raised by next update/delete/flush call
+    """
+    def __init__(self, db, collection, batch_size=500, flush_interval=None):
+        """
+        Constructor
+        :param db: db connection
+        :param collection: collection to update
+        :param batch_size: max number of buffered operations
+        :param flush_interval: max time (seconds) operations are buffered (None - not limited)
+        """
+        self.__logger = logging.getLogger(__class__.__name__)
+        self.__collection = db[collection]
+        self.__batch_size = batch_size
+        self.__flush_interval = flush_interval
+        self.__ops = []
+        self.__lock = threading.RLock()
+        self.__timer = None
+        self.__error = None
+        self.__matched_count = 0
+        self.__modified_count = 0
+        self.__upserted_count = 0
+        self.__deleted_count = 0
+
+    def __raise_error(self):
+        if self.__error:
+            e, self.__error = self.__error, None
+            raise e
+
+    def __on_timer(self):
+        with self.__lock:
+            self.__timer = None
+            try:
+                self.__write()
+            except Exception as e:
+                self.__logger.error('{}: flush by timer failed: {}'.format(self.__collection.name, e))
+                self.__error = e
+
+    def __append(self, op):
+        with self.__lock:
+            self.__raise_error()
+            self.__ops.append(op)
+            if len(self.__ops) >= self.__batch_size:
+                self.flush()
+            elif self.__flush_interval and not self.__timer:
+                self.__timer = threading.Timer(self.__flush_interval, self.__on_timer)
+                self.__timer.daemon = True
+                self.__timer.start()
+
+    def update(self, object, match_params, upsert=False):
+        """
+        Buffers update_one() operation, flushes buffer if it is full
+        :param object: the modifications to apply
+        :param match_params: a query that matches the document to update
+        :param upsert: insert document if no document matches
+        """
+        self.__append(UpdateOne(match_params, {"$set": object}, upsert=upsert))
+
+    def delete(self, match_params):
+        """
+        Buffers delete_one() operation, flushes buffer if it is full
+        :param match_params: a query that matches the document to delete
+        """
+        self.__append(DeleteOne(match_params))
+
+    def __write(self):
+        if len(self.__ops) == 0:
+            return
+        res = self.__collection.bulk_write(self.__ops, ordered=False)
+        self.__logger.debug('{}: {:d} operations flushed, {:d} modified'.format(
+            self.__collection.name, len(self.__ops), res.modified_count))
+        self.__matched_count += res.matched_count
+        self.__modified_count += res.modified_count
+        self.__upserted_count += res.upserted_count
+        self.__deleted_count += res.deleted_count
+        self.__ops = []
+
+    def flush(self):
+        """
+        Writes buffered operations
+        """
+        with self.__lock:
+            if self.__timer:
+                self.__timer.cancel()
+                self.__timer = None
+            self.__raise_error()
+            self.__write()
+
+    @property
+    def matched_count(self):
+        return self.__matched_count
+
+    @property
+    def modified_count(self):
+        return self.__modified_count
+
+    @property
+    def upserted_count(self):
+        return self.__upserted_count
+
+    @property
+    def deleted_count(self):
+        return self.__deleted_count
+
+
 class Trigger:
     """
-    Abstract class for triggers
+    Abstract class for triggers, several triggers of the same action are configured as list and executed in order
+    (see TriggerChain), e.g. "after-upsert": ["<trigger class>", "na3x.db.aggregates.AggregatesRefreshTrigger"]
     """
     ACTION_BEFORE_DELETE = 'before-delete'
     ACTION_AFTER_DELETE = 'after-delete'
@@ -101,7 +241,10 @@ class Trigger:
         """
         triggers_cfg = na3x_cfg[NA3X_TRIGGERS]
         if (collection in triggers_cfg) and (action in triggers_cfg[collection]):
-            return obj_for_name(triggers_cfg[collection][action])(db, collection)
+            trigger_cfg = triggers_cfg[collection][action]
+            if isinstance(trigger_cfg, list):
+                return TriggerChain(db, collection, [obj_for_name(trigger)(db, collection) for trigger in trigger_cfg])
+            return obj_for_name(trigger_cfg)(db, collection)
         else:
             return None
 
@@ -125,6 +268,25 @@ class Trigger:
         return NotImplemented
 
 
+class TriggerChain(Trigger):
+    """
+    Executes triggers configured for the same action in order of configuration
+    """
+    def __init__(self, db, collection, triggers):
+        """
+        Constructor
+        :param db: db descriptor
+        :param collection: collection to be updated
+        :param triggers: list of triggers
+        """
+        Trigger.__init__(self, db, collection)
+        self.__triggers = triggers
+
+    def execute(self, input_object, match_params):
+        for trigger in self.__triggers:
+            trigger.execute(input_object, match_params)
+
+
 class AccessParams:
     """
     Configuration parameters for Accessor/CRUD operations
@@ -143,6 +305,23 @@ class Accessor:
     """
     DAO for MongoDB
     """
+    __writes = 0
+    __writes_lock = threading.Lock()
+
+    @staticmethod
+    def writes():
+        """
+        Returns number of write (upsert/delete) operations performed through Accessor instances in the process, could be
+        used to invalidate data cached from MongoDB
+        :return: number of writes
+        """
+        return Accessor.__writes
+
+    @staticmethod
+    def __count_write():
+        with Accessor.__writes_lock:
+            Accessor.__writes += 1
+
     @staticmethod
     def factory(db):
         """
@@ -216,6 +395,7 @@ class Accessor:
             result = CRUD.delete_single(self.__db, collection, match_params)
         elif target_type == AccessParams.TYPE_MULTI:
             result = CRUD.delete_multi(self.__db, collection, match_params)
+        Accessor.__count_write()
         if triggers_on:
             self.__exec_trigger(Trigger.ACTION_AFTER_DELETE, collection, None, match_params)
         return result
@@ -242,6 +422,7 @@ class Accessor:
             result =  CRUD.upsert_single(self.__db, collection, input_object, match_params)
         elif cfg[AccessParams.KEY_TYPE] == AccessParams.TYPE_MULTI:
             result =  CRUD.upsert_multi(self.__db, collection, input_object, match_params)
+        Accessor.__count_write()
         if triggers_on:
             self.__exec_trigger(Trigger.ACTION_AFTER_UPSERT, collection, input_object, match_params)
         return result
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+
+class CacheMissError(Exception):
+    """
+    Raised in offline (cache-only) mode if response is not cached
+    """
+    pass
+
+
+class CachedResponse:
+    """
+    Cached HTTP response
+    """
+    def __init__(self, content, etag, last_modified, stored_at):
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+    def is_fresh(self, ttl):
+        """
+        Checks if cached response could be used without revalidation
+        :param ttl: time to live, seconds (None or 0 - always revalidate)
+        :return: True if response is fresh
+        """
+        return bool(ttl) and time.time() - self.stored_at < ttl
+
+
+class ResponseCache:
+    """
+    Persistent (SQLite) HTTP response cache, responses are keyed by url, request data and identity (login) of the user
+    the response was returned to
+    """
+    __SQL_CREATE = 'CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, url TEXT, content BLOB, ' \
+                   'etag TEXT, last_modified TEXT, stored_at REAL)'
+    __SQL_SELECT = 'SELECT content, etag, last_modified, stored_at FROM responses WHERE key = ?'
+    __SQL_UPSERT = 'INSERT OR REPLACE INTO responses (key, url, content, etag, last_modified, stored_at) ' \
+                   'VALUES (?, ?, ?, ?, ?, ?)'
+    __SQL_TOUCH = 'UPDATE responses SET stored_at = ? WHERE key = ?'
+
+    STAT_HIT = 'hit'
+    STAT_REVALIDATED = 'revalidated'
+    STAT_MISS = 'miss'
+
+    def __init__(self, path):
+        """
+        Constructor
+        :param path: SQLite cache file
+        """
+        self.__logger = logging.getLogger(__class__.__name__)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute(ResponseCache.__SQL_CREATE)
+        self.__connection.commit()
+        self.__stats = {ResponseCache.STAT_HIT: 0, ResponseCache.STAT_REVALIDATED: 0, ResponseCache.STAT_MISS: 0}
+
+    @staticmethod
+    def key(url, data, identity=None):
+        """
+        Returns cache key
+        :param url: request url
+        :param data: request data
+        :param identity: user identity, e.g. login (None - response is shared)
+        :return: key
+        """
+        key = [url, data] if identity is None else [identity, url, data]
+        return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def get(self, url, data, identity=None):
+        """
+        Returns cached response
+        :param url: request url
+        :param data: request data
+        :param identity: user identity, e.g. login (None - response is shared)
+        :return: CachedResponse or None
+        """
+        with self.__lock:
+            row = self.__connection.execute(ResponseCache.__SQL_SELECT,
+                                            (ResponseCache.key(url, data, identity),)).fetchone()
+        return CachedResponse(*row) if row else None
+
+    def put(self, url, data, content, etag=None, last_modified=None, identity=None):
+        """
+        Stores response
+        :param url: request url
+        :param data: request data
+        :param content: response content
+        :param etag: ETag response header
+        :param last_modified: Last-Modified response header
+        :param identity: user identity, e.g. login (None - response is shared)
+        """
+        with self.__lock:
+            self.__connection.execute(ResponseCache.__SQL_UPSERT, (
+                ResponseCache.key(url, data, identity), url, content, etag, last_modified, time.time()))
+            self.__connection.commit()
+
+    def touch(self, url, data, identity=None):
+        """
+        Marks cached response as revalidated
+        :param url: request url
+        :param data: request data
+        :param identity: user identity, e.g. login (None - response is shared)
+        """
+        with self.__lock:
+            self.__connection.execute(ResponseCache.__SQL_TOUCH, (time.time(), ResponseCache.key(url, data, identity)))
+            self.__connection.commit()
+
+    def count(self, stat):
+        """
+        Counts cache lookup
+        :param stat: STAT_HIT, STAT_REVALIDATED or STAT_MISS
+        """
+        with self.__lock:
+            self.__stats[stat] += 1
+
+    @property
+    def stats(self):
+        """
+        Returns cache statistics
+        :return: {STAT_HIT: <count>, STAT_REVALIDATED: <count>, STAT_MISS: <count>, 'ratio': <hit ratio>}
+        """
+        with self.__lock:
+            stats = dict(self.__stats)
+        total = sum(stats.values())
+        stats.update({'ratio': (stats[ResponseCache.STAT_HIT] + stats[ResponseCache.STAT_REVALIDATED]) / total
+                      if total > 0 else 0.0})
+        return stats
+
+
+class RequestCache:
+    """
+    ResponseCache bound to request policy
+    """
+    def __init__(self, cache, ttl=None, offline=False):
+        """
+        Constructor
+        :param cache: ResponseCache
+        :param ttl: time to live of cached response, seconds (None - always revalidate)
+        :param offline: cache-only mode, request is never sent
+        """
+        self.cache = cache
+        self.ttl = ttl
+        self.offline = offline
@@ -0,0 +1,191 @@
+import contextvars
+import gzip
+import io
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+class CassetteMissError(Exception):
+    """
+    Raised in replay mode if request is not recorded in cassette
+    """
+    pass
+
+
+class Cassette:
+    """
+    Records HTTP request/response pairs into compressed (gzip, JSON lines) cassette file and replays them without network,
+    auth headers are not recorded. Requests are matched by method, url, parameters and data, repeated identical requests
+    are replayed in recorded order
+	"cassette": "./cassettes/import.jsonl.gz", <optional: cassette file>
+	"cassette.mode": "replay", <optional: record or replay (default - replay)>
+	"cassette.timing": "fast" <optional: replay timing - fast (no delays) or original (recorded latency)>
+    """
+    CFG_KEY_CASSETTE = 'cassette'
+    CFG_KEY_CASSETTE_MODE = 'cassette.mode'
+    CFG_KEY_CASSETTE_TIMING = 'cassette.timing'
+
+    MODE_RECORD = 'record'
+    MODE_REPLAY = 'replay'
+    TIMING_FAST = 'fast'
+    TIMING_ORIGINAL = 'original'
+
+    SCRUBBED_HEADERS = ['authorization', 'proxy-authorization', 'cookie', 'set-cookie', 'x-api-key', 'x-auth-token']
+    __DECODED_HEADERS = ['content-encoding', 'transfer-encoding', 'content-length']
+
+    __current = contextvars.ContextVar('na3x_cassette', default=None)
+
+    @staticmethod
+    def bind(cassette):
+        """
+        Binds cassette to current context, Request instances send requests through bound cassette
+        :param cassette: Cassette or None
+        """
+        Cassette.__current.set(cassette)
+
+    @staticmethod
+    def current():
+        """
+        Returns cassette bound to current context
+        :return: Cassette or None
+        """
+        return Cassette.__current.get()
+
+    @staticmethod
+    def from_cfg(cfg):
+        """
+        Instantiates cassette from configuration
+        :param cfg: configuration
+        :return: Cassette or None if cassette is not configured
+        """
+        if Cassette.CFG_KEY_CASSETTE not in cfg:
+            return None
+        return Cassette(cfg[Cassette.CFG_KEY_CASSETTE], cfg.get(Cassette.CFG_KEY_CASSETTE_MODE, Cassette.MODE_REPLAY),
+                        cfg.get(Cassette.CFG_KEY_CASSETTE_TIMING, Cassette.TIMING_FAST))
+
+    @staticmethod
+    def key(method, url, params, data):
+        """
+        Returns request key
+        :param method: HTTP method
+        :param url: request url
+        :param params: query parameters
+        :param data: request body
+        :return: key
+        """
+        if isinstance(data, bytes):
+            data = data.decode('utf-8', 'surrogateescape')
+        return json.dumps([method.upper(), url, params, data], sort_keys=True, default=str)
+
+    @staticmethod
+    def __scrub(headers):
+        return {name: value for name, value in (headers if headers else {}).items()
+                if name.lower() not in Cassette.SCRUBBED_HEADERS}
+
+    def __init__(self, path, mode=MODE_REPLAY, timing=TIMING_FAST):
+        """
+        Constructor
+        :param path: cassette file
+        :param mode: MODE_RECORD or MODE_REPLAY
+        :param timing: TIMING_FAST or TIMING_ORIGINAL (replay only)
+        """
+        self.__logger = logging.getLogger(__class__.__name__)
+        if mode not in [Cassette.MODE_RECORD, Cassette.MODE_REPLAY]:
+            raise NotImplementedError('Not supported cassette mode - {}'.format(mode))
+        if timing not in [Cassette.TIMING_FAST, Cassette.TIMING_ORIGINAL]:
+            raise NotImplementedError('Not supported cassette timing - {}'.format(timing))
+        self.__path = path
+        self.__mode = mode
+        self.__timing = timing
+        self.__lock = threading.Lock()
+        self.__interactions = {}
+        self.__file = None
+        self.__count = 0
+        if mode == Cassette.MODE_RECORD:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.__file = gzip.open(path, 'wt', encoding='utf-8')
+        else:
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                for line in file:
+                    interaction = json.loads(line)
+                    self.__interactions.setdefault(interaction['key'], deque()).append(interaction)
+                    self.__count += 1
+        self.__logger.info('cassette {} ({}): {:d} interactions'.format(path, mode, self.__count))
+
+    @property
+    def mode(self):
+        return self.__mode
+
+    @property
+    def count(self):
+        """
+        Returns number of recorded (record mode) or loaded (replay mode) interactions
+        :return: count
+        """
+        return self.__count
+
+    def send(self, method, url, params, data, headers, func):
+        """
+        Sends request through cassette
+        :param method: HTTP method
+        :param url: request url
+        :param params: query parameters
+        :param data: request body
+        :param headers: request headers
+        :param func: function performing request (record mode)
+        :return: requests.Response, content is always loaded
+        """
+        key = Cassette.key(method, url, params, data)
+        if self.__mode == Cassette.MODE_REPLAY:
+            return self.__replay(key, method, url)
+        started_at = time.monotonic()
+        response = func()
+        content = response.content
+        elapsed = time.monotonic() - started_at
+        response.raw = io.BytesIO(content)
+        interaction = {'key': key, 'method': method.upper(), 'url': url, 'headers': Cassette.__scrub(headers),
+                       'status': response.status_code, 'reason': response.reason,
+                       'response_headers': {name: value for name, value in Cassette.__scrub(response.headers).items()
+                                            if name.lower() not in Cassette.__DECODED_HEADERS},
+                       'content': content.decode('utf-8', 'surrogateescape'), 'elapsed': elapsed}
+        with self.__lock:
+            self.__file.write(json.dumps(interaction) + '\n')
+            self.__count += 1
+        return response
+
+    def __replay(self, key, method, url):
+        with self.__lock:
+            queue = self.__interactions.get(key)
+            if not queue:
+                raise CassetteMissError('{} {} - request is not recorded in {}'.format(method, url, self.__path))
+            interaction = queue.popleft() if len(queue) > 1 else queue[0]
+        if self.__timing == Cassette.TIMING_ORIGINAL:
+            time.sleep(interaction['elapsed'])
+        content = interaction['content'].encode('utf-8', 'surrogateescape')
+        response = requests.models.Response()
+        response.status_code = interaction['status']
+        response.reason = interaction['reason']
+        response.url = interaction['url']
+        response.headers = CaseInsensitiveDict(interaction['response_headers'])
+        response.headers['Content-Length'] = str(len(content))
+        response._content = content
+        response.raw = io.BytesIO(content)
+        return response
+
+    def close(self):
+        """
+        Flushes recorded interactions
+        """
+        with self.__lock:
+            if self.__file:
+                self.__file.close()
+                self.__file = None
+                self.__logger.info('cassette {}: {:d} interactions recorded'.format(self.__path, self.__count))
+
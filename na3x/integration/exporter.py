@@ -1,8 +1,11 @@
-import copy
-import json
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from na3x.db.data import BulkWriter
 from na3x.integration.integrator import Integrator
-from na3x.integration.request import ExportRequest
-from na3x.utils.cfg import CfgUtils
+from na3x.integration.ledger import ExportLedger
+from na3x.integration.request import BulkExportRequest, ExportRequest, Request
+from na3x.integration.throttle import RateLimiter, RetryPolicy
+from na3x.utils.cfg import CfgTemplate
 
 
 class Exporter(Integrator):
@@ -11,6 +14,13 @@ class Exporter(Integrator):
 	"mapping": {
 		"url": "$jira_url" <mappings used in export request, variables should be defined in env.json>
 	},
+	"rate.limit": 10, <optional: max requests per second per target host>
+	"rate.burst": 10, <optional: max burst of requests per target host>
+	"concurrency": 4, <optional: default number of concurrent requests (default - 1)>
+	"retry.max": 3, <optional: default max number of retries of failed request (default - 3)>
+	"retry.backoff": 0.5, <optional: default base delay of exponential backoff, seconds>
+	"ledger.collection": "export.ledger", <optional: collection to store fingerprints of exported requests>
+	"ledger.force": false, <optional: ignore ledger and re-export all items>
 	"requests": {
 		"set_search_label": { <request id>
 			"cfg": "./cfg/jira/jira-set-issue-field.json", <request configuration file>
@@ -22,15 +32,70 @@ class Exporter(Integrator):
 			"dynamic_mapping": { <dynamic mappings applied, variables will be taken from src.collection>
 				"key": "key",
 				"value": "label"
-			}
+			},
+			"callback.update_src": true, <optional: update src.collection items with request result>
+			"callback.key": ["key"], <optional: fields identifying src.collection item to update (default - all fields)>
+			"callback.index": true, <optional: create index on callback.key fields of src.collection (default - false)>
+			"callback.batch": 500, <optional: max number of buffered callback updates>
+			"callback.flush_interval": 10, <optional: max time (seconds) callback updates are buffered>
+			"concurrency": 8, <optional: overrides default concurrency for request>
+			"retry.max": 5, <optional: overrides default max number of retries for request>
+			"ledger": true, <optional: items are exported only if rendered request changed since last successful export>
+			"ledger.key": ["key"] <optional: fields identifying src.collection item in ledger (default - callback.key if
+			defined, otherwise dynamic_mapping source fields)>
 		}
 	},
 	"db": "$db_jira_export" <db to get exported data>
+    Items are sent in batches if request configuration declares bulk endpoint (see BulkExportRequest)
+    POST requests (create_entity, create_relation, bulk post) are retried only if they were not processed by server,
+    see RetryPolicy
     """
     __CFG_KEY_SRC_COLLECTION = 'src.collection'
     __CFG_KEY_STATIC_MAPPING = 'static_mapping'
     __CFG_KEY_DYNAMIC_MAPPING = 'dynamic_mapping'
     __CFG_KEY_CALLBACK = 'callback.update_src'
+    __CFG_KEY_CALLBACK_KEY = 'callback.key'
+    __CFG_KEY_CALLBACK_INDEX = 'callback.index'
+    __CFG_KEY_CALLBACK_BATCH = 'callback.batch'
+    __CFG_KEY_CALLBACK_FLUSH_INTERVAL = 'callback.flush_interval'
+    __CFG_KEY_RATE_LIMIT = 'rate.limit'
+    __CFG_KEY_RATE_BURST = 'rate.burst'
+    __CFG_KEY_CONCURRENCY = 'concurrency'
+    __CFG_KEY_RETRY_MAX = 'retry.max'
+    __CFG_KEY_RETRY_BACKOFF = 'retry.backoff'
+    __CFG_KEY_LEDGER = 'ledger'
+    __CFG_KEY_LEDGER_KEY = 'ledger.key'
+    __CFG_KEY_LEDGER_COLLECTION = 'ledger.collection'
+    __CFG_KEY_LEDGER_FORCE = 'ledger.force'
+
+    __DEFAULT_CONCURRENCY = 1
+    __DEFAULT_RETRY_MAX = 3
+    __DEFAULT_RETRY_BACKOFF = 0.5
+    __DEFAULT_CALLBACK_BATCH = 500
+    __DEFAULT_LEDGER_COLLECTION = 'export.ledger'
+
+    def __init__(self, cfg, login, pswd):
+        Integrator.__init__(self, cfg, login, pswd)
+        self.__rate_limiter = RateLimiter(self._cfg.get(Exporter.__CFG_KEY_RATE_LIMIT),
+                                          self._cfg.get(Exporter.__CFG_KEY_RATE_BURST))
+
+    def __get_param(self, request_cfg, key, default):
+        if key in request_cfg:
+            return request_cfg[key]
+        return self._cfg[key] if key in self._cfg else default
+
+    def __export_item(self, item_cfg, request_type, retry_policy):
+        return retry_policy.call(
+            lambda: ExportRequest.factory(item_cfg, self._login, self._pswd, request_type).result,
+            lambda: self.__rate_limiter.acquire(item_cfg[Request._CFG_KEY_REQUEST][Request._CFG_KEY_REQUEST_URL]),
+            ExportRequest.method(request_type))
+
+    def __export_batch(self, items_cfg, retry_policy):
+        return retry_policy.call(
+            lambda: BulkExportRequest(items_cfg, self._login, self._pswd).result,
+            lambda: self.__rate_limiter.acquire(
+                items_cfg[0][BulkExportRequest.CFG_KEY_BULK][Request._CFG_KEY_REQUEST_URL]),
+            BulkExportRequest.method(items_cfg[0]))
 
     def _process_request(self, request_id, request_type, request_cfg_file):
         with open(request_cfg_file) as cfg_file:
@@ -39,16 +104,94 @@ class Exporter(Integrator):
         src_collection = request_cfg[Exporter.__CFG_KEY_SRC_COLLECTION]
         dataset = list(self._db[src_collection].find({}, {'_id': False}))
         static_mapping = request_cfg[Exporter.__CFG_KEY_STATIC_MAPPING] if Exporter.__CFG_KEY_STATIC_MAPPING in request_cfg else {}
-        self._mappings.update(static_mapping)
+        mappings = dict(self._mappings)
+        mappings.update(static_mapping)
         dynamic_mapping = request_cfg[Exporter.__CFG_KEY_DYNAMIC_MAPPING]
-        for item in dataset:
-            item_mappings = {}
-            item_request_cfg = copy.deepcopy(str_cfg)
-            for mapping_key, item_key in dynamic_mapping.items():
-                item_mappings.update({mapping_key: json.dumps(item[item_key]) if isinstance(item[item_key], list) else item[item_key]})
-            item_mappings.update(self._mappings)
-            itemstrcfg = CfgUtils.substitute_params(item_request_cfg, item_mappings)
-            res = ExportRequest.factory(json.loads(itemstrcfg), self._login, self._pswd, request_type).result
-            if Exporter.__CFG_KEY_CALLBACK in request_cfg and bool(request_cfg[Exporter.__CFG_KEY_CALLBACK]):
-                upd_count = self._db[src_collection].update_one(item, {"$set": res}, upsert=False).modified_count
-                self._logger.debug('{} items updated filter: {}, update {}'.format(upd_count, item_mappings, res))
+        template = CfgTemplate(str_cfg, mappings, dynamic_mapping.keys())
+        is_callback = Exporter.__CFG_KEY_CALLBACK in request_cfg and bool(request_cfg[Exporter.__CFG_KEY_CALLBACK])
+        if is_callback:
+            callback_key = request_cfg[Exporter.__CFG_KEY_CALLBACK_KEY] if Exporter.__CFG_KEY_CALLBACK_KEY in request_cfg else None
+            if callback_key and bool(request_cfg.get(Exporter.__CFG_KEY_CALLBACK_INDEX)):
+                self._db[src_collection].create_index([(field, 1) for field in callback_key])
+            callback_writer = BulkWriter(self._db, src_collection,
+                                         request_cfg.get(Exporter.__CFG_KEY_CALLBACK_BATCH, Exporter.__DEFAULT_CALLBACK_BATCH),
+                                         request_cfg.get(Exporter.__CFG_KEY_CALLBACK_FLUSH_INTERVAL))
+        concurrency = int(self.__get_param(request_cfg, Exporter.__CFG_KEY_CONCURRENCY, Exporter.__DEFAULT_CONCURRENCY))
+        retry_policy = RetryPolicy(self.__get_param(request_cfg, Exporter.__CFG_KEY_RETRY_MAX, Exporter.__DEFAULT_RETRY_MAX),
+                                   self.__get_param(request_cfg, Exporter.__CFG_KEY_RETRY_BACKOFF,
+                                                    Exporter.__DEFAULT_RETRY_BACKOFF))
+        ledger = None
+        if bool(request_cfg.get(Exporter.__CFG_KEY_LEDGER)):
+            ledger = ExportLedger(self._db, self._cfg.get(Exporter.__CFG_KEY_LEDGER_COLLECTION,
+                                                          Exporter.__DEFAULT_LEDGER_COLLECTION), request_id)
+            if Exporter.__CFG_KEY_LEDGER_KEY in request_cfg:
+                ledger_key = request_cfg[Exporter.__CFG_KEY_LEDGER_KEY]
+            elif is_callback and callback_key:
+                ledger_key = callback_key
+            else:  # item fields written by callback are not part of identity
+                ledger_key = sorted(set(dynamic_mapping.values()))
+            is_force = bool(self.__get_param(request_cfg, Exporter.__CFG_KEY_LEDGER_FORCE, False))
+        skipped_count = 0
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+            entries = []
+            sent = {}
+            batch = {'cfgs': [], 'future': None}
+
+            def submit_batch():
+                if len(batch['cfgs']) > 0:
+                    batch['future'] = executor.submit(contextvars.copy_context().run, self.__export_batch, batch['cfgs'],
+                                                      retry_policy)
+
+            for item in dataset:
+                item_mappings = {mapping_key: item[item_key] for mapping_key, item_key in dynamic_mapping.items()}
+                item_cfg = template.render(item_mappings)
+                identity = fingerprint = None
+                if ledger:
+                    fingerprint = ExportLedger.fingerprint(item_cfg)
+                    identity = ExportLedger.fingerprint({field: item[field] for field in ledger_key})
+                    if not is_force and ledger.is_exported(identity, fingerprint):
+                        skipped_count += 1
+                        continue
+                    if fingerprint in sent:  # identical request within run is sent once
+                        entries.append((item, item_mappings, identity, fingerprint) + sent[fingerprint])
+                        continue
+                if BulkExportRequest.is_bulk(item_cfg):
+                    if len(batch['cfgs']) >= int(item_cfg[BulkExportRequest.CFG_KEY_BULK][BulkExportRequest.CFG_KEY_BULK_SIZE]):
+                        submit_batch()
+                        batch = {'cfgs': [], 'future': None}
+                    batch['cfgs'].append(item_cfg)
+                    target = (batch, len(batch['cfgs']) - 1)
+                else:
+                    target = ({'future': executor.submit(contextvars.copy_context().run, self.__export_item, item_cfg,
+                                                         request_type, retry_policy)}, None)
+                if ledger:
+                    sent[fingerprint] = target
+                entries.append((item, item_mappings, identity, fingerprint) + target)
+            submit_batch()
+            errors = []
+            for item, item_mappings, identity, fingerprint, item_batch, index in entries:
+                try:
+                    res = item_batch['future'].result()
+                    if index is not None:
+                        res = res[index]
+                        if isinstance(res, Exception):
+                            raise res
+                except Exception as e:
+                    self._logger.error('{} - export failed: {}, mapping {}'.format(request_id, e, item_mappings))
+                    errors.append(e)
+                    continue
+                if ledger:
+                    ledger.record(identity, fingerprint)
+                if is_callback:
+                    callback_writer.update(res, {field: item[field] for field in callback_key} if callback_key else item)
+                    self._logger.debug('item update queued filter: {}, update {}'.format(item_mappings, res))
+            if is_callback:
+                callback_writer.flush()
+                self._logger.info('{} - {:d} items updated'.format(request_id, callback_writer.modified_count))
+            if ledger:
+                ledger.flush()
+                self._logger.info('{} - {:d} items are not changed since last export, {:d} requests sent'.format(
+                    request_id, skipped_count, len(sent)))
+        if len(errors) > 0:
+            self._logger.error('{} - {:d} of {:d} items failed'.format(request_id, len(errors), len(dataset)))
+            raise errors[0]
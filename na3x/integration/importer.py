@@ -1,7 +1,12 @@
+import datetime
 import json
 from string import Template
+from na3x.db.aggregates import MaterializedAggregates
+from na3x.db.data import BulkWriter
+from na3x.integration.cache import RequestCache, ResponseCache
 from na3x.integration.integrator import Integrator
 from na3x.integration.request import ImportRequest
+from na3x.utils.converter import Converter
 
 
 class Importer(Integrator):
@@ -17,22 +22,169 @@ class Importer(Integrator):
 		"components": { <request id>
 			"cfg": "./cfg/jira/jira-components-request.json", <request configuration file>
 			"type": "list", <request type - ImportRequest.TYPE_GET_SINGLE_OBJECT  or TYPE_GET_LIST>
-			"dest": "components" <destination collection to store imported data>
+			"dest": "components", <destination collection to store imported data>
+			"streaming": true, <optional: TYPE_GET_LIST pages are saved into staging collection as soon as they are parsed,
+			staging collection replaces destination when import is finished>
+			"cache.ttl": 86400, <optional: overrides default cache time to live for request>
+			"cache.offline": true <optional: overrides default cache-only mode for request>
+		},
+		"issues": {
+			"cfg": "./cfg/jira/jira-issues-request.json", <request configuration, e.g. "jql": "sprint = $sprint AND updated >= '$since'">
+			"type": "list",
+			"dest": "issues",
+			"incremental": { <optional: TYPE_GET_LIST items are upserted into destination instead of reload>
+				"key": ["key"], <fields identifying destination item, index on key fields is created in destination>
+				"watermark.field": "updated", <imported field used as high-water mark>
+				"watermark.param": "since", <request configuration parameter substituted with high-water mark>
+				"watermark.initial": "1970-01-01 00:00", <optional: high-water mark for the first import>
+				"tombstone.field": "deleted" <optional: items with this field set are deleted from destination>
+			}
 		},
         ...
+    "cache.path": "./cache/jira.sqlite", <optional: response cache file, responses are not cached if not defined>
+    "cache.ttl": 3600, <optional: time (seconds) cached response is used without revalidation (default - always revalidate)>
+    "cache.offline": false, <optional: cache-only mode, requests are not sent>
+    "metadata.collection": "import.metadata", <optional: collection to store high-water marks of incremental imports>
     "db": "$db_jira_import" <db to store imported data>
+    Declared aggregates of destination collection are refreshed after import (see MaterializedAggregates)
     """
     __CFG_KEY_REQUEST_DEST = 'dest'
+    __CFG_KEY_REQUEST_STREAMING = 'streaming'
+    __CFG_KEY_REQUEST_INCREMENTAL = 'incremental'
+    __CFG_KEY_INCREMENTAL_KEY = 'key'
+    __CFG_KEY_INCREMENTAL_WATERMARK_FIELD = 'watermark.field'
+    __CFG_KEY_INCREMENTAL_WATERMARK_PARAM = 'watermark.param'
+    __CFG_KEY_INCREMENTAL_WATERMARK_INITIAL = 'watermark.initial'
+    __CFG_KEY_INCREMENTAL_TOMBSTONE = 'tombstone.field'
+    __CFG_KEY_METADATA_COLLECTION = 'metadata.collection'
+    __CFG_KEY_CACHE_PATH = 'cache.path'
+    __CFG_KEY_CACHE_TTL = 'cache.ttl'
+    __CFG_KEY_CACHE_OFFLINE = 'cache.offline'
+    __STAGING_SUFFIX = '.staging'
+    __DEFAULT_METADATA_COLLECTION = 'import.metadata'
+    __DEFAULT_WATERMARK_INITIAL = '1970-01-01 00:00'
+    __METADATA_KEY_REQUEST = 'request'
+    __METADATA_KEY_WATERMARK = 'watermark'
+
+    def __init__(self, cfg, login, pswd):
+        Integrator.__init__(self, cfg, login, pswd)
+        self.__cache = ResponseCache(self._cfg[Importer.__CFG_KEY_CACHE_PATH]) \
+            if Importer.__CFG_KEY_CACHE_PATH in self._cfg else None
+
+    def __get_request_cache(self, request_params):
+        if not self.__cache:
+            return None
+        ttl = request_params[Importer.__CFG_KEY_CACHE_TTL] if Importer.__CFG_KEY_CACHE_TTL in request_params \
+            else self._cfg.get(Importer.__CFG_KEY_CACHE_TTL)
+        offline = request_params[Importer.__CFG_KEY_CACHE_OFFLINE] if Importer.__CFG_KEY_CACHE_OFFLINE in request_params \
+            else self._cfg.get(Importer.__CFG_KEY_CACHE_OFFLINE, False)
+        return RequestCache(self.__cache, ttl, bool(offline))
+
+    def perform(self):
+        Integrator.perform(self)
+        if self.__cache:
+            stats = self.__cache.stats
+            self._logger.info('response cache: {:d} hits, {:d} revalidated, {:d} misses, hit ratio {:.2%}'.format(
+                stats[ResponseCache.STAT_HIT], stats[ResponseCache.STAT_REVALIDATED], stats[ResponseCache.STAT_MISS],
+                stats['ratio']))
+
+    def __get_metadata_collection(self):
+        return self._cfg[Importer.__CFG_KEY_METADATA_COLLECTION] if Importer.__CFG_KEY_METADATA_COLLECTION in self._cfg \
+            else Importer.__DEFAULT_METADATA_COLLECTION
+
+    def __get_watermark(self, request_id, incremental_cfg):
+        metadata = self._db[self.__get_metadata_collection()].find_one(
+            {Importer.__METADATA_KEY_REQUEST: request_id}, {'_id': False})
+        if metadata and metadata.get(Importer.__METADATA_KEY_WATERMARK) is not None:
+            watermark = metadata[Importer.__METADATA_KEY_WATERMARK]
+            return Converter.datetime2str(watermark) if isinstance(watermark, datetime.datetime) else watermark
+        return incremental_cfg.get(Importer.__CFG_KEY_INCREMENTAL_WATERMARK_INITIAL, Importer.__DEFAULT_WATERMARK_INITIAL)
+
+    def __process_incremental_request(self, request_id, request_cfg, request_type, request_dest, incremental_cfg, cache):
+        key = incremental_cfg[Importer.__CFG_KEY_INCREMENTAL_KEY]
+        watermark_field = incremental_cfg[Importer.__CFG_KEY_INCREMENTAL_WATERMARK_FIELD]
+        tombstone_field = incremental_cfg.get(Importer.__CFG_KEY_INCREMENTAL_TOMBSTONE)
+        self._db[request_dest].create_index([(field, 1) for field in key])
+        writer = BulkWriter(self._db, request_dest)
+        state = {'watermark': None, 'items': 0}
+
+        def save_page(page):
+            for item in page:
+                match_params = {field: item[field] for field in key}
+                if tombstone_field and item.get(tombstone_field):
+                    writer.delete(match_params)
+                else:
+                    writer.update(item, match_params, upsert=True)
+                value = item.get(watermark_field)
+                if value is not None and (state['watermark'] is None or value > state['watermark']):
+                    state['watermark'] = value
+            state['items'] += len(page)
+
+        ImportRequest.factory(request_cfg, self._login, self._pswd, request_type, save_page, cache)
+        writer.flush()
+        if state['watermark'] is not None:
+            self._db[self.__get_metadata_collection()].update_one(
+                {Importer.__METADATA_KEY_REQUEST: request_id},
+                {'$set': {Importer.__METADATA_KEY_WATERMARK: state['watermark']}}, upsert=True)
+        self._logger.info('collection: {} {:d} items are imported, {:d} inserted, {:d} updated, {:d} deleted, watermark {}'.format(
+            request_dest, state['items'], writer.upserted_count, writer.modified_count, writer.deleted_count,
+            state['watermark']))
+
+    def __process_streaming_request(self, request_cfg, request_type, request_dest, cache):
+        staging = '{}{}'.format(request_dest, Importer.__STAGING_SUFFIX)
+        self._db[staging].drop()
+        counter = {'pages': 0, 'items': 0}
+
+        def save_page(page):
+            if len(page) > 0:
+                self._db[staging].insert_many(page)
+            counter['pages'] += 1
+            counter['items'] += len(page)
+            self._logger.debug('collection: {} page {:d} - {:d} items are staged'.format(
+                request_dest, counter['pages'], len(page)))
+
+        try:
+            ImportRequest.factory(request_cfg, self._login, self._pswd, request_type, save_page, cache)
+        except Exception:
+            self._db[staging].drop()
+            raise
+        if counter['items'] > 0:
+            self._db[staging].rename(request_dest, dropTarget=True)
+        else:
+            self._db[request_dest].drop()
+        self._logger.info('collection: {} {:d} items are saved'.format(request_dest, counter['items']))
 
     def _process_request(self, request_id, request_type, request_cfg_file):
+        request_params = self._cfg[Integrator._CFG_KEY_REQUESTS][request_id]
+        incremental_cfg = request_params[Importer.__CFG_KEY_REQUEST_INCREMENTAL] \
+            if Importer.__CFG_KEY_REQUEST_INCREMENTAL in request_params and request_type == ImportRequest.TYPE_GET_LIST \
+            else None
+        mappings = dict(self._mappings)
+        if incremental_cfg:
+            mappings.update({incremental_cfg[Importer.__CFG_KEY_INCREMENTAL_WATERMARK_PARAM]:
+                                 self.__get_watermark(request_id, incremental_cfg)})
         with open(request_cfg_file) as cfg_file:
             str_cfg = cfg_file.read()
-            if len(self._mappings) > 0:
-                str_cfg = Template(str_cfg).safe_substitute(self._mappings)
+            if len(mappings) > 0:
+                str_cfg = Template(str_cfg).safe_substitute(mappings)
             request_cfg = json.loads(str_cfg)
-        request_dest = self._cfg[Integrator._CFG_KEY_REQUESTS][request_id][Importer.__CFG_KEY_REQUEST_DEST]
+        request_dest = request_params[Importer.__CFG_KEY_REQUEST_DEST]
+        cache = self.__get_request_cache(request_params)
+        is_streaming = bool(request_params.get(Importer.__CFG_KEY_REQUEST_STREAMING))
+        if incremental_cfg:
+            self.__process_incremental_request(request_id, request_cfg, request_type, request_dest, incremental_cfg, cache)
+        elif is_streaming and request_type == ImportRequest.TYPE_GET_LIST:
+            self.__process_streaming_request(request_cfg, request_type, request_dest, cache)
+        else:
+            self.__process_reload_request(request_cfg, request_type, request_dest, cache)
+        aggregates = MaterializedAggregates(self._db, request_dest)
+        if aggregates.declarations():  # imported data is written bypassing triggers
+            aggregates.refresh()
+            self._logger.info('collection: {} aggregates are refreshed'.format(request_dest))
+
+    def __process_reload_request(self, request_cfg, request_type, request_dest, cache):
         self._db[request_dest].drop()
-        result = ImportRequest.factory(request_cfg, self._login, self._pswd, request_type).result
+        result = ImportRequest.factory(request_cfg, self._login, self._pswd, request_type, cache=cache).result
         self._logger.debug(result)
         if isinstance(result, dict):
             res = self._db[request_dest].insert_one(result)
@@ -1,17 +1,44 @@
 import abc
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from na3x.db.connect import MongoDb
+from na3x.integration.cassette import Cassette
+from na3x.integration.metrics import RequestMetrics
 
 
 class Integrator():
     """
     Base class for bulk export-import operations
+	"requests": {
+		"sprint": { <request id>
+			...
+		},
+		"issues": {
+			...
+			"depends_on": ["sprint"] <optional: requests to be completed before this one>
+		}
+	},
+	"requests.concurrency": 4, <optional: number of requests performed concurrently (default - 1)>
+	"metrics.json": "./out/import-metrics.json", <optional: file to save request metrics of the run as JSON>
+	"metrics.prometheus": "./out/import-metrics.prom", <optional: file to save request metrics in Prometheus text format>
+	"cassette": "./cassettes/import.jsonl.gz", <optional: record or replay HTTP traffic of the run, see Cassette>
+	"cassette.mode": "record"
     """
     _CFG_KEY_DB = 'db'
     _CFG_KEY_REQUESTS = 'requests'
     _CFG_KEY_REQUEST_CFG_FILE = 'cfg'
     _CFG_KEY_REQUEST_TYPE = 'type'
+    _CFG_KEY_REQUEST_DEPENDS_ON = 'depends_on'
     _CFG_KEY_MAPPING = 'mapping'
+    _CFG_KEY_REQUESTS_CONCURRENCY = 'requests.concurrency'
+    _CFG_KEY_METRICS_JSON = 'metrics.json'
+    _CFG_KEY_METRICS_PROMETHEUS = 'metrics.prometheus'
+
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_SKIPPED = 'skipped'
 
     def __init__(self, cfg, login, pswd):
         """
@@ -27,16 +54,108 @@ class Integrator():
         self._db = MongoDb(cfg[Integrator._CFG_KEY_DB]).connection
         self._mappings = self._cfg[
             Integrator._CFG_KEY_MAPPING] if Integrator._CFG_KEY_MAPPING in self._cfg else {}
+        self.__summary = {}
+        self.__metrics = RequestMetrics()
+        self.__cassette = None
 
-    def perform(self):
-        """
-        Performs bulk operation
-        """
-        for request in self._cfg[Integrator._CFG_KEY_REQUESTS]:
+    def __get_dependencies(self):
+        requests_cfg = self._cfg[Integrator._CFG_KEY_REQUESTS]
+        dependencies = {}
+        for request in requests_cfg:
+            depends_on = requests_cfg[request][Integrator._CFG_KEY_REQUEST_DEPENDS_ON] \
+                if Integrator._CFG_KEY_REQUEST_DEPENDS_ON in requests_cfg[request] else []
+            for dependency in depends_on:
+                if dependency not in requests_cfg:
+                    raise ValueError('{} - unknown dependency {}'.format(request, dependency))
+            dependencies[request] = set(depends_on)
+        return dependencies
+
+    def __perform_request(self, request):
+        started_at = time.monotonic()
+        self.__summary[request] = {'time': 0.0}  # summary is available to perform() whatever fails below
+        try:
+            threading.current_thread().name = request  # attributes request logs (%(threadName)s)
             request_type = self._cfg[Integrator._CFG_KEY_REQUESTS][request][Integrator._CFG_KEY_REQUEST_TYPE]
             request_cfg_file = self._cfg[Integrator._CFG_KEY_REQUESTS][request][Integrator._CFG_KEY_REQUEST_CFG_FILE]
-            self._logger.debug('{}'.format(request_cfg_file))
+            self._logger.debug('{}: {}'.format(request, request_cfg_file))
+            RequestMetrics.bind(self.__metrics, request, request_type)
+            Cassette.bind(self.__cassette)
             self._process_request(request, request_type, request_cfg_file)
+        except Exception as e:
+            self._logger.error('{}: request failed - {}'.format(request, e), exc_info=True)
+            raise
+        finally:
+            self.__summary[request]['time'] = time.monotonic() - started_at
+
+    def perform(self):
+        """
+        Performs bulk operation, independent requests are performed concurrently
+        """
+        pending = self.__get_dependencies()
+        self.__metrics = RequestMetrics()
+        concurrency = max(int(self._cfg.get(Integrator._CFG_KEY_REQUESTS_CONCURRENCY, 1)), 1)
+        self.__summary = {}
+        done = set()
+        running = {}
+        error = None
+        own_cassette = Cassette.from_cfg(self._cfg)
+        self.__cassette = own_cassette if own_cassette else Cassette.current()  # run level cassette, e.g. of Generator
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                while pending or running:
+                    if not error:
+                        for request in [request for request in pending if pending[request].issubset(done)]:
+                            if len(running) >= concurrency:
+                                break
+                            running[executor.submit(self.__perform_request, request)] = request
+                            del pending[request]
+                    if not running:
+                        if error:
+                            break
+                        raise ValueError('Cyclic dependencies between requests: {}'.format(', '.join(pending)))
+                    completed, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in completed:
+                        request = running.pop(future)
+                        if future.exception():
+                            self.__summary[request]['status'] = Integrator.STATUS_FAILED
+                            error = error if error else future.exception()
+                        else:
+                            self.__summary[request]['status'] = Integrator.STATUS_DONE
+                            done.add(request)
+        finally:
+            if own_cassette:
+                own_cassette.close()
+        for request in pending:
+            self.__summary[request] = {'status': Integrator.STATUS_SKIPPED, 'time': 0.0}
+        self.__summary = {request: self.__summary[request] for request in self._cfg[Integrator._CFG_KEY_REQUESTS]}
+        for request, summary in self.__summary.items():
+            self._logger.info('{}: {} in {:.2f}s'.format(request, summary['status'], summary['time']))
+        for series in self.__metrics.summary():
+            self._logger.info('{}: {:d} calls, latency p50 {}, p95 {}, p99 {}, {} bytes, {:d} retries'.format(
+                series['request'], series['count'], series['latency']['p50'], series['latency']['p95'],
+                series['latency']['p99'], series['bytes']['total'], series['retries']))
+        if Integrator._CFG_KEY_METRICS_JSON in self._cfg:
+            self.__metrics.to_json(self._cfg[Integrator._CFG_KEY_METRICS_JSON])
+        if Integrator._CFG_KEY_METRICS_PROMETHEUS in self._cfg:
+            self.__metrics.to_prometheus(self._cfg[Integrator._CFG_KEY_METRICS_PROMETHEUS])
+        if error:
+            raise error
+
+    @property
+    def summary(self):
+        """
+        Returns summary of last perform() call
+        :return: {<request id>: {'status': STATUS_DONE || STATUS_FAILED || STATUS_SKIPPED, 'time': <seconds>}}
+        """
+        return self.__summary
+
+    @property
+    def metrics(self):
+        """
+        Returns request metrics of last perform() call
+        :return: RequestMetrics
+        """
+        return self.__metrics
 
     @abc.abstractmethod
     def _process_request(self, request_id, request_type, request_cfg_file):
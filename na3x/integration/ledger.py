@@ -0,0 +1,63 @@
+import datetime
+import hashlib
+import json
+from na3x.db.data import BulkWriter
+
+
+class ExportLedger:
+    """
+    Stores fingerprints of successfully exported requests per (request id, item identity)
+    """
+    __KEY_REQUEST = 'request'
+    __KEY_IDENTITY = 'identity'
+    __KEY_HASH = 'hash'
+    __KEY_EXPORTED_AT = 'exported_at'
+
+    @staticmethod
+    def fingerprint(obj):
+        """
+        Returns stable content hash
+        :param obj: JSON serializable object (e.g. rendered request configuration)
+        :return: hash
+        """
+        return hashlib.sha256(json.dumps(obj, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')).hexdigest()
+
+    def __init__(self, db, collection, request_id):
+        """
+        Constructor, loads fingerprints of request
+        :param db: db connection
+        :param collection: ledger collection
+        :param request_id: export request id
+        """
+        self.__request_id = request_id
+        db[collection].create_index([(ExportLedger.__KEY_REQUEST, 1), (ExportLedger.__KEY_IDENTITY, 1)], unique=True)
+        self.__hashes = {doc[ExportLedger.__KEY_IDENTITY]: doc[ExportLedger.__KEY_HASH] for doc in db[collection].find(
+            {ExportLedger.__KEY_REQUEST: request_id}, {'_id': False, ExportLedger.__KEY_IDENTITY: True,
+                                                      ExportLedger.__KEY_HASH: True})}
+        self.__writer = BulkWriter(db, collection)
+
+    def is_exported(self, identity, fingerprint):
+        """
+        Checks if the same request was successfully exported for item
+        :param identity: item identity
+        :param fingerprint: request fingerprint
+        :return: True if request fingerprint matches last exported one
+        """
+        return self.__hashes.get(identity) == fingerprint
+
+    def record(self, identity, fingerprint):
+        """
+        Records successful export
+        :param identity: item identity
+        :param fingerprint: request fingerprint
+        """
+        self.__hashes[identity] = fingerprint
+        self.__writer.update({ExportLedger.__KEY_HASH: fingerprint, ExportLedger.__KEY_EXPORTED_AT: datetime.datetime.utcnow()},
+                             {ExportLedger.__KEY_REQUEST: self.__request_id, ExportLedger.__KEY_IDENTITY: identity},
+                             upsert=True)
+
+    def flush(self):
+        """
+        Writes recorded exports
+        """
+        self.__writer.flush()
@@ -0,0 +1,145 @@
+import contextvars
+import json
+import math
+import threading
+
+
+class RequestMetrics:
+    """
+    Collects HTTP request metrics (latency, status, response size, retries, pagination depth) tagged by request id
+    and request type, aggregates them into percentiles and exports as JSON or Prometheus text format
+    """
+    PERCENTILES = [50, 95, 99]
+
+    __current = contextvars.ContextVar('na3x_request_metrics', default=None)
+
+    @staticmethod
+    def bind(metrics, request_id, request_type):
+        """
+        Binds metrics collector, request id and type to current context, Request instances record into bound collector
+        :param metrics: RequestMetrics or None
+        :param request_id: request id
+        :param request_type: request type
+        """
+        RequestMetrics.__current.set((metrics, request_id, request_type) if metrics else None)
+
+    @staticmethod
+    def current():
+        """
+        Returns metrics collector bound to current context
+        :return: RequestMetrics or None
+        """
+        current = RequestMetrics.__current.get()
+        return current[0] if current else None
+
+    @staticmethod
+    def __get_tags():
+        current = RequestMetrics.__current.get()
+        return (current[1], current[2]) if current else (None, None)
+
+    @staticmethod
+    def percentile(values, pct):
+        """
+        Nearest-rank percentile
+        :param values: sorted list of values
+        :param pct: percentile (0..100)
+        :return: value or None
+        """
+        if len(values) == 0:
+            return None
+        return values[max(0, int(math.ceil(pct / 100.0 * len(values))) - 1)]
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__series = {}
+
+    def __get_series(self):
+        key = RequestMetrics.__get_tags()
+        if key not in self.__series:
+            self.__series[key] = {'latency': [], 'bytes': [], 'status': {}, 'retries': 0, 'pages': []}
+        return self.__series[key]
+
+    def record(self, latency, status, response_bytes):
+        """
+        Records HTTP call of request bound to current context
+        :param latency: seconds
+        :param status: HTTP status or 0 if no response is received
+        :param response_bytes: response size
+        """
+        with self.__lock:
+            series = self.__get_series()
+            series['latency'].append(latency)
+            series['bytes'].append(response_bytes)
+            series['status'][status] = series['status'].get(status, 0) + 1
+
+    def record_retry(self):
+        """
+        Records retry of request bound to current context
+        """
+        with self.__lock:
+            self.__get_series()['retries'] += 1
+
+    def record_pages(self, pages):
+        """
+        Records pagination depth of request bound to current context
+        :param pages: number of requested pages
+        """
+        with self.__lock:
+            self.__get_series()['pages'].append(pages)
+
+    def summary(self):
+        """
+        Aggregates collected metrics
+        :return: list of {'request': <request id>, 'type': <request type>, 'count': ..., 'latency': {'p50': ..., ...},
+        'bytes': {'total': ..., 'p50': ..., ...}, 'status': {<status>: <count>}, 'retries': ..., 'pages': <max depth>}
+        """
+        res = []
+        with self.__lock:
+            series = {key: {'latency': sorted(value['latency']), 'bytes': sorted(value['bytes']),
+                            'status': dict(value['status']), 'retries': value['retries'], 'pages': list(value['pages'])}
+                      for key, value in self.__series.items()}
+        for (request_id, request_type), value in series.items():
+            latency = {'p{:d}'.format(pct): RequestMetrics.percentile(value['latency'], pct)
+                       for pct in RequestMetrics.PERCENTILES}
+            latency.update({'total': sum(value['latency'])})
+            size = {'p{:d}'.format(pct): RequestMetrics.percentile(value['bytes'], pct)
+                    for pct in RequestMetrics.PERCENTILES}
+            size.update({'total': sum(value['bytes'])})
+            res.append({'request': request_id, 'type': request_type, 'count': len(value['latency']),
+                        'latency': latency, 'bytes': size,
+                        'status': {str(status): count for status, count in value['status'].items()},
+                        'retries': value['retries'], 'pages': max(value['pages']) if value['pages'] else None})
+        return res
+
+    def to_json(self, path):
+        """
+        Writes aggregated metrics as JSON
+        :param path: file
+        """
+        with open(path, 'w') as file:
+            json.dump(self.summary(), file, indent=2)
+
+    def to_prometheus(self, path):
+        """
+        Writes aggregated metrics in Prometheus text format
+        :param path: file
+        """
+        lines = ['# TYPE na3x_request_latency_seconds summary', '# TYPE na3x_request_response_bytes summary',
+                 '# TYPE na3x_request_status_total counter', '# TYPE na3x_request_retries_total counter',
+                 '# TYPE na3x_request_pages gauge']
+        for series in self.summary():
+            labels = 'request="{}",type="{}"'.format(series['request'], series['type'])
+            for metric, key in [('na3x_request_latency_seconds', 'latency'), ('na3x_request_response_bytes', 'bytes')]:
+                for pct in RequestMetrics.PERCENTILES:
+                    value = series[key]['p{:d}'.format(pct)]
+                    if value is not None:
+                        lines.append('{}{{{},quantile="{}"}} {}'.format(metric, labels, pct / 100.0, value))
+                lines.append('{}_sum{{{}}} {}'.format(metric, labels, series[key]['total']))
+                lines.append('{}_count{{{}}} {}'.format(metric, labels, series['count']))
+            for status, count in series['status'].items():
+                lines.append('na3x_request_status_total{{{},status="{}"}} {}'.format(labels, status, count))
+            lines.append('na3x_request_retries_total{{{}}} {}'.format(labels, series['retries']))
+            if series['pages'] is not None:
+                lines.append('na3x_request_pages{{{}}} {}'.format(labels, series['pages']))
+        with open(path, 'w') as file:
+            file.write('\n'.join(lines) + '\n')
@@ -1,11 +1,20 @@
 import abc
-import json
 import logging
+import time
 import jsonschema
+import jsonschema.validators
 import requests
 from jsonschema import validate
 from requests.auth import HTTPBasicAuth
+from na3x.integration.cache import CacheMissError, ResponseCache
+from na3x.integration.cassette import Cassette
+from na3x.integration.metrics import RequestMetrics
+from na3x.utils.codec import JSONCodec
 from na3x.utils.converter import Types, Converter
+try:
+    import ijson
+except ImportError:  # streaming parsing is optional
+    ijson = None
 
 
 class Field:
@@ -20,6 +29,8 @@ class Field:
     FIELD_OPTIONAL = 'optional' # field is optional
     FIELD_MATCH = 'match' # field match JSON schema
 
+    __SIMPLE_TYPES = {'object': dict, 'array': list, 'string': str, 'null': type(None), 'boolean': bool}
+
     @staticmethod
     def is_complex_type(type):
         return type in [Types.TYPE_ARRAY, Types.TYPE_OBJECT]
@@ -34,6 +45,121 @@ class Field:
         except jsonschema.ValidationError:
             return False
 
+    @staticmethod
+    def compile_match(pattern):
+        """
+        Builds match function for JSON schema, validator is created once
+        :param pattern: JSON schema or None
+        :return: function(field) -> True if field matches pattern
+        """
+        if pattern is None:
+            return lambda field: True
+        if isinstance(pattern, dict) and list(pattern.keys()) == ['type'] and pattern['type'] in Field.__SIMPLE_TYPES:
+            simple_type = Field.__SIMPLE_TYPES[pattern['type']]
+            return lambda field: isinstance(field, simple_type)
+        validator_cls = jsonschema.validators.validator_for(pattern)
+        validator_cls.check_schema(pattern)
+        return validator_cls(pattern).is_valid
+
+    @staticmethod
+    def compile(field_cfg):
+        """
+        Compiles field configuration into parser, compiled parser produces the same result as parse_field
+        :param field_cfg: field configuration
+        :return: function(data, target, is_optional=False)
+        """
+        try:
+            return Field.__compile(field_cfg)
+        except (KeyError, TypeError):  # incomplete configuration - error is raised on parsing as by parse_field
+            return lambda data, target, is_optional=False: Field.parse_field(data, field_cfg, target, is_optional)
+
+    @staticmethod
+    def __compile(field_cfg):
+        field_type = field_cfg[Field.FIELD_TYPE]
+        field_key = field_cfg[Field.FIELD_KEY] if Field.FIELD_KEY in field_cfg else None
+        field_ext_id = field_cfg[Field.FIELD_EXT_ID] if Field.FIELD_EXT_ID in field_cfg else field_key
+        if field_type == Types.TYPE_ARRAY:
+            is_match = Field.compile_match(field_cfg[Field.FIELD_MATCH] if Field.FIELD_MATCH in field_cfg else None)
+            parse_item = Field.compile(next(iter(field_cfg[Field.FIELD_SUBITEMS].values()))) \
+                if Field.FIELD_SUBITEMS in field_cfg else None
+
+            def parse_array(data, target, is_optional=False):
+                if isinstance(target, dict):  # add to object
+                    target.update({field_ext_id: []})
+                    field_value = data[field_key]
+                elif not field_key:  # add to array
+                    field_value = data
+                else:
+                    raise NotImplementedError('Array of arrays is not supported')
+                if parse_item:
+                    item_target = target[field_ext_id] if field_ext_id else target
+                    for item in field_value:
+                        if is_match(item):
+                            parse_item(item, item_target)
+                else:
+                    target[field_ext_id] = field_value
+            return parse_array
+        elif field_type == Types.TYPE_OBJECT:
+            is_explicit = bool(field_cfg[Field.FIELD_EXPLICIT]) if Field.FIELD_EXPLICIT in field_cfg else False
+            is_field_optional = bool(field_cfg[Field.FIELD_OPTIONAL]) if Field.FIELD_OPTIONAL in field_cfg else False
+            parse_subfields = [Field.compile(subfield_cfg) for subfield_cfg in field_cfg[Field.FIELD_SUBITEMS].values()]
+
+            def parse_object(data, target, is_optional=False):
+                if field_key:
+                    try:
+                        field_value = data[field_key]
+                    except KeyError:
+                        if is_field_optional:
+                            field_value = None
+                        else:
+                            raise
+                else:  # noname object
+                    field_value = data  # working with the same item
+                if is_explicit:
+                    obj_exp = {}
+                    if isinstance(target, dict):  # add to object
+                        target.update({field_ext_id: obj_exp})
+                    else:  # add to array
+                        target.append(obj_exp)
+                    target = obj_exp
+                for parse_subfield in parse_subfields:
+                    parse_subfield(field_value, target, is_field_optional)
+            return parse_object
+        else:  # other types
+            convert = Converter.converter(field_type)
+
+            def parse_value(data, target, is_optional=False):
+                try:
+                    field_value = data[field_key]
+                except TypeError:
+                    if is_optional:
+                        field_value = None
+                    else:
+                        raise
+                casted_value = convert(field_value)
+                if isinstance(target, dict):  # add to object
+                    target.update({field_ext_id: casted_value})
+                else:  # add to array
+                    target.append(casted_value)
+            return parse_value
+
+    @staticmethod
+    def data_keys(field_cfg):
+        """
+        Returns keys read by field configuration directly from parsed data (noname objects are resolved)
+        :param field_cfg: field configuration
+        :return: dict {key: [field configuration, ...]}
+        """
+        field_key = field_cfg[Field.FIELD_KEY] if Field.FIELD_KEY in field_cfg else None
+        if field_key:
+            return {field_key: [field_cfg]}
+        keys = {}
+        if field_cfg[Field.FIELD_TYPE] == Types.TYPE_OBJECT:
+            for subfield_cfg in field_cfg[Field.FIELD_SUBITEMS].values():
+                for key, key_cfgs in Field.data_keys(subfield_cfg).items():
+                    keys.setdefault(key, []).extend(key_cfgs)
+        return keys
+
     @staticmethod
     def parse_field(data, field_cfg, target, is_optional=False):
         """
@@ -106,6 +232,7 @@ class Request:
     _CFG_KEY_REQUEST = 'request'
     _CFG_KEY_REQUEST_URL = 'url'
     _CFG_KEY_REQUEST_DATA = 'data'
+    _CFG_KEY_REQUEST_STREAM = 'stream'
 
     def __init__(self, cfg, login, pswd):
         """
@@ -120,6 +247,40 @@ class Request:
         self._cfg = cfg
         self._request_cfg = self._cfg[Request._CFG_KEY_REQUEST]
 
+    def _send(self, method, url, params=None, data=None, headers=None, stream=False):
+        """
+        Sends HTTP request (through cassette bound to current context if any, see Cassette) and records its metrics
+        (see RequestMetrics)
+        :param method: HTTP method
+        :param url: request url
+        :param params: query parameters
+        :param data: request body
+        :param headers: request headers (default - JSON content type)
+        :param stream: response content is not downloaded immediately
+        :return: requests.Response
+        """
+        metrics = RequestMetrics.current()
+        cassette = Cassette.current()
+        headers = headers if headers else {"Content-Type": "application/json"}
+        send = lambda: requests.request(method, url,
+                                        params=params,
+                                        data=data,
+                                        headers=headers,
+                                        auth=HTTPBasicAuth(self._login, self._pswd),
+                                        verify=True,
+                                        stream=stream)
+        started_at = time.monotonic()
+        status = 0
+        response_bytes = 0
+        try:
+            response = cassette.send(method, url, params, data, headers, send) if cassette else send()
+            status = response.status_code
+            response_bytes = int(response.headers.get('Content-Length', 0)) if stream else len(response.content)
+            return response
+        finally:
+            if metrics:
+                metrics.record(time.monotonic() - started_at, status, response_bytes)
+
     @abc.abstractmethod
     def result(self):
         """
@@ -138,6 +299,18 @@ class ExportRequest(Request):
     TYPE_DELETE_ENTITY = 'delete_entity'
     TYPE_CREATE_RELATION = 'create_relation'
 
+    __METHODS = {TYPE_SET_FIELD_VALUE: 'PUT', TYPE_CREATE_ENTITY: 'POST', TYPE_DELETE_ENTITY: 'DELETE',
+                 TYPE_CREATE_RELATION: 'POST'}
+
+    @staticmethod
+    def method(request_type):
+        """
+        Returns HTTP method of request type
+        :param request_type: TYPE_SET_FIELD_VALUE || TYPE_CREATE_ENTITY || TYPE_DELETE_ENTITY || TYPE_CREATE_RELATION
+        :return: HTTP method or None for not supported type
+        """
+        return ExportRequest.__METHODS.get(request_type)
+
     @staticmethod
     def factory(cfg, login, pswd, request_type):
         """
@@ -191,14 +364,10 @@ class CreateEntityRequest(ExportRequest):
         request_data = self._request_cfg[
             Request._CFG_KEY_REQUEST_DATA] if Request._CFG_KEY_REQUEST_DATA in self._request_cfg else None
         self._logger.info('create entity {} on {}'.format(request_data, request_url))
-        response = requests.post(request_url,
-                                json.dumps(request_data),
-                                headers={"Content-Type": "application/json"},
-                                auth=HTTPBasicAuth(self._login, self._pswd),
-                                verify=True)
+        response = self._send('POST', request_url, data=JSONCodec.dumps(request_data))
         if not response.ok:
             response.raise_for_status()
-        return json.loads(response.content, strict=False)
+        return JSONCodec.loads(response.content)
 
 
 class CreateRelationRequest(ExportRequest):
@@ -210,11 +379,7 @@ class CreateRelationRequest(ExportRequest):
         request_data = self._request_cfg[
             Request._CFG_KEY_REQUEST_DATA] if Request._CFG_KEY_REQUEST_DATA in self._request_cfg else None
         self._logger.info('create relation {} on {}'.format(request_data, request_url))
-        response = requests.post(request_url,
-                                json.dumps(request_data),
-                                headers={"Content-Type": "application/json"},
-                                auth=HTTPBasicAuth(self._login, self._pswd),
-                                verify=True)
+        response = self._send('POST', request_url, data=JSONCodec.dumps(request_data))
         if not response.ok:
             response.raise_for_status()
 
@@ -228,10 +393,7 @@ class DeleteEntityRequest(ExportRequest):
         request_data = self._request_cfg[
             Request._CFG_KEY_REQUEST_DATA] if Request._CFG_KEY_REQUEST_DATA in self._request_cfg else None
         self._logger.info('delete {} on {}'.format(request_data, request_url))
-        response = requests.delete(request_url,
-                                headers={"Content-Type": "application/json"},
-                                auth=HTTPBasicAuth(self._login, self._pswd),
-                                verify=True)
+        response = self._send('DELETE', request_url)
         if not response.ok:
             response.raise_for_status()
 
@@ -245,13 +407,129 @@ class SetFieldValueRequest(ExportRequest):
         request_data = self._request_cfg[
             Request._CFG_KEY_REQUEST_DATA] if Request._CFG_KEY_REQUEST_DATA in self._request_cfg else None
         self._logger.info('update {} on {}'.format(request_data, request_url))
-        response = requests.put(request_url,
-                                json.dumps(request_data),
-                                headers={"Content-Type": "application/json"},
-                                auth=HTTPBasicAuth(self._login, self._pswd),
-                                verify=True)
+        response = self._send('PUT', request_url, data=JSONCodec.dumps(request_data))
+        if not response.ok:
+            response.raise_for_status()
+
+
+class BulkExportRequest(Request):
+    """
+    Wrapper for bulk POST/PUT request, sends data of several export requests in one call
+    Example of configuration (parameters should be substituted)
+	    "request": { <single item request, see ExportRequest>
+		    "url": "$url/rest/api/2/issue",
+		    "data": {
+			    "fields": {...}
+		    }
+	    },
+	    "bulk": {
+		    "url": "$url/rest/api/2/issue/bulk", <bulk endpoint>
+		    "method": "post", <optional: post or put (default - post)>
+		    "data": {
+			    "issueUpdates": "$items" <"$items" is replaced with list of items request data>
+		    },
+		    "size": 50, <max number of items per call>
+		    "result": "issues", <optional: response array with results of succeeded items in order of items>
+		    "errors": "errors", <optional: response array with failed items>
+		    "errors.index": "failedElementNumber" <optional: index of failed item within errors array element>
+	    }
+    """
+    CFG_KEY_BULK = 'bulk'
+    CFG_KEY_BULK_SIZE = 'size'
+    __CFG_KEY_BULK_METHOD = 'method'
+    __CFG_KEY_BULK_RESULT = 'result'
+    __CFG_KEY_BULK_ERRORS = 'errors'
+    __CFG_KEY_BULK_ERRORS_INDEX = 'errors.index'
+    __ITEMS_PLACEHOLDER = '$items'
+    __METHOD_POST = 'post'
+    __METHOD_PUT = 'put'
+
+    @staticmethod
+    def is_bulk(cfg):
+        """
+        Checks if request configuration declares bulk endpoint
+        :param cfg: request configuration
+        :return: True if bulk mode is configured
+        """
+        return BulkExportRequest.CFG_KEY_BULK in cfg
+
+    @staticmethod
+    def method(cfg):
+        """
+        Returns HTTP method of bulk request
+        :param cfg: request configuration
+        :return: POST or PUT
+        """
+        bulk_cfg = cfg[BulkExportRequest.CFG_KEY_BULK]
+        method = bulk_cfg[BulkExportRequest.__CFG_KEY_BULK_METHOD].lower() \
+            if BulkExportRequest.__CFG_KEY_BULK_METHOD in bulk_cfg else BulkExportRequest.__METHOD_POST
+        if method not in [BulkExportRequest.__METHOD_POST, BulkExportRequest.__METHOD_PUT]:
+            raise NotImplementedError('Not supported bulk method - {}'.format(method))
+        return method.upper()
+
+    def __init__(self, cfgs, login, pswd):
+        """
+        Constructor
+        :param cfgs: list of items request configurations, bulk configuration is taken from the first one
+        :param login:
+        :param pswd:
+        """
+        Request.__init__(self, cfgs[0], login, pswd)
+        self.__bulk_cfg = self._cfg[BulkExportRequest.CFG_KEY_BULK]
+        self.__items_data = [cfg[Request._CFG_KEY_REQUEST][Request._CFG_KEY_REQUEST_DATA]
+                             if Request._CFG_KEY_REQUEST_DATA in cfg[Request._CFG_KEY_REQUEST] else None for cfg in cfgs]
+        self.__result = self.__parse_response(self._perform_request())
+
+    @property
+    def url(self):
+        return self.__bulk_cfg[Request._CFG_KEY_REQUEST_URL]
+
+    def __substitute_items(self, node):
+        if isinstance(node, dict):
+            return {key: self.__substitute_items(value) for key, value in node.items()}
+        elif isinstance(node, list):
+            return [self.__substitute_items(value) for value in node]
+        elif node == BulkExportRequest.__ITEMS_PLACEHOLDER:
+            return self.__items_data
+        return node
+
+    def _perform_request(self):
+        """
+        Performs bulk request
+        :return: JSON response or None
+        """
+        request_url = self.__bulk_cfg[Request._CFG_KEY_REQUEST_URL]
+        request_data = self.__substitute_items(self.__bulk_cfg[Request._CFG_KEY_REQUEST_DATA])
+        method = BulkExportRequest.method(self._cfg)
+        self._logger.info('bulk {} {:d} items on {}'.format(method.lower(), len(self.__items_data), request_url))
+        response = self._send(method, request_url, data=JSONCodec.dumps(request_data))
         if not response.ok:
             response.raise_for_status()
+        return JSONCodec.loads(response.content) if response.content else None
+
+    def __parse_response(self, response):
+        """
+        Maps bulk response to items
+        :param response: JSON response
+        :return: list of items results, failed items are represented by exception
+        """
+        failed = {}
+        if response and BulkExportRequest.__CFG_KEY_BULK_ERRORS in self.__bulk_cfg:
+            for error in response.get(self.__bulk_cfg[BulkExportRequest.__CFG_KEY_BULK_ERRORS], []):
+                index = int(error[self.__bulk_cfg[BulkExportRequest.__CFG_KEY_BULK_ERRORS_INDEX]])
+                failed[index] = Exception('bulk item {:d} failed: {}'.format(index, error))
+        results = iter(response[self.__bulk_cfg[BulkExportRequest.__CFG_KEY_BULK_RESULT]]) \
+            if response and BulkExportRequest.__CFG_KEY_BULK_RESULT in self.__bulk_cfg else None
+        return [failed[i] if i in failed else (next(results, None) if results else None)
+                for i in range(len(self.__items_data))]
+
+    @property
+    def result(self):
+        """
+        Returns items results
+        :return: list of items results in order of items, failed item result is exception
+        """
+        return self.__result
 
 
 class ImportRequest(Request):
@@ -269,35 +547,42 @@ class ImportRequest(Request):
     TYPE_GET_LIST = 'list'
 
     @staticmethod
-    def factory(cfg, login, pswd, request_type):
+    def factory(cfg, login, pswd, request_type, page_handler=None, cache=None):
         """
         Instantiate ImportRequest
         :param cfg: request configuration, should consist of request description (url and parameters) and response for parsing result
         :param login:
         :param pswd:
         :param request_type: TYPE_GET_SINGLE_OBJECT or TYPE_GET_LIST = 'list'
+        :param page_handler: function called with every parsed page of TYPE_GET_LIST request, parsed pages are not
+        accumulated in result if handler is defined
+        :param cache: RequestCache for responses (None - responses are not cached)
         :return: ImportRequest instance
         """
         if request_type == ImportRequest.TYPE_GET_LIST:
-            return ListImportRequest(cfg, login, pswd)
+            return ListImportRequest(cfg, login, pswd, page_handler, cache)
         elif request_type == ImportRequest.TYPE_GET_SINGLE_OBJECT:
-            return SingleObjectImportRequest(cfg, login, pswd)
+            return SingleObjectImportRequest(cfg, login, pswd, cache)
         else:
             raise NotImplementedError('Not supported request type - {}'.format(request_type))
 
-    def __init__(self, cfg, login, pswd, request_type):
+    def __init__(self, cfg, login, pswd, request_type, cache=None):
         """
         Constructor
         :param cfg: request configuration
         :param login:
         :param pswd:
         :param request_type: TYPE_GET_SINGLE_OBJECT or TYPE_GET_LIST = 'list'
+        :param cache: RequestCache for responses (None - responses are not cached)
         """
         Request.__init__(self, cfg, login, pswd)
+        self._cache = cache
         self._response_cfg = self._cfg[ImportRequest.__CFG_KEY_RESPONSE]
         self._content_root = self._response_cfg[
             ImportRequest.__CFG_KEY_CONTENT_ROOT] if ImportRequest.__CFG_KEY_CONTENT_ROOT in self._response_cfg else None
         self._logger.debug('\n{}'.format(self._response_cfg))
+        self._parser = self._compile_parser()
+        self._prepare_request()
         if request_type == ImportRequest.TYPE_GET_LIST:
             self.__perform_list_request()
         elif request_type == ImportRequest.TYPE_GET_SINGLE_OBJECT:
@@ -325,10 +610,29 @@ class ImportRequest(Request):
         response = self._perform_request()
         self._parse_response(response)
 
+    def __is_stream(self):
+        is_stream = bool(self._request_cfg[Request._CFG_KEY_REQUEST_STREAM]) \
+            if Request._CFG_KEY_REQUEST_STREAM in self._request_cfg else False
+        if not is_stream:
+            return False
+        if ijson is None:
+            raise ImportError('ijson is required for streaming response parsing: pip install na3x[streaming]')
+        if not self._content_root or self._cache:
+            self._logger.warning('streaming requires content-root and is not supported for cached requests')
+            return False
+        return True
+
     def __perform_list_request(self):
+        is_stream = self.__is_stream()
+        pages = 0
         while True:
-            response = self._perform_request()
-            self._parse_response(response if not self._content_root else response[self._content_root])
+            pages += 1
+            if is_stream:
+                response = {}
+                self._parse_response(self.__perform_stream_request(response))
+            else:
+                response = self._perform_request()
+                self._parse_response(response if not self._content_root else response[self._content_root])
             if not ImportRequest.__CFG_KEY_PARAM_TOTAL in response:
                 break
             total = int(response[ImportRequest.__CFG_KEY_PARAM_TOTAL])
@@ -339,6 +643,49 @@ class ImportRequest(Request):
                 self._request_cfg[Request._CFG_KEY_REQUEST_DATA].update({ImportRequest.__CFG_KEY_PARAM_START_AT: start_at})
                 continue
             break
+        metrics = RequestMetrics.current()
+        if metrics:
+            metrics.record_pages(pages)
+
+    def __perform_stream_request(self, response_params):
+        """
+        Performs GET request and parses response incrementally
+        :param response_params: dict to be filled with top level scalar values of response (total, startAt, ...)
+        :return: generator of content-root array items
+        """
+        request_url = self._request_cfg[Request._CFG_KEY_REQUEST_URL]
+        request_data = self._request_cfg[
+            Request._CFG_KEY_REQUEST_DATA] if Request._CFG_KEY_REQUEST_DATA in self._request_cfg else None
+        self._logger.info('request {} from {} - streaming'.format(request_data, request_url))
+        response = self._send('GET', request_url, params=request_data, stream=True)
+        if not response.ok:
+            response.raise_for_status()
+        response.raw.decode_content = True
+        item_prefix = '{}.item'.format(self._content_root)
+        builder = None
+        depth = 0
+        try:
+            for prefix, event, value in ijson.parse(response.raw, use_float=True):
+                if builder:
+                    builder.event(event, value)
+                    if event in ('start_map', 'start_array'):
+                        depth += 1
+                    elif event in ('end_map', 'end_array'):
+                        depth -= 1
+                        if depth == 0:
+                            yield builder.value
+                            builder = None
+                elif prefix == item_prefix:
+                    if event in ('start_map', 'start_array'):
+                        builder = ijson.ObjectBuilder()
+                        builder.event(event, value)
+                        depth = 1
+                    elif event not in ('end_array', 'map_key'):
+                        yield value
+                elif '.' not in prefix and event in ('number', 'string', 'boolean', 'null'):
+                    response_params.update({prefix: value})
+        finally:
+            response.close()
 
     def __get_request_params(self):
         self.__request_url = self._request_cfg[Request._CFG_KEY_REQUEST_URL]
@@ -353,15 +700,48 @@ class ImportRequest(Request):
         request_url = self._request_cfg[Request._CFG_KEY_REQUEST_URL]
         request_data = self._request_cfg[
             Request._CFG_KEY_REQUEST_DATA] if Request._CFG_KEY_REQUEST_DATA in self._request_cfg else None
+        headers = {"Content-Type": "application/json"}
+        cached = None
+        if self._cache:
+            cached = self._cache.cache.get(request_url, request_data, self._login)
+            if cached and (self._cache.offline or cached.is_fresh(self._cache.ttl)):
+                self._cache.cache.count(ResponseCache.STAT_HIT)
+                self._logger.info('request {} from {} - cached'.format(request_data, request_url))
+                return JSONCodec.loads(cached.content)
+            if self._cache.offline:
+                self._cache.cache.count(ResponseCache.STAT_MISS)
+                raise CacheMissError('{} {} - response is not cached'.format(request_url, request_data))
+            if cached and cached.etag:
+                headers.update({'If-None-Match': cached.etag})
+            if cached and cached.last_modified:
+                headers.update({'If-Modified-Since': cached.last_modified})
         self._logger.info('request {} from {}'.format(request_data, request_url))
-        response = requests.get(request_url,
-                                request_data,  # for post - json.dumps(self.__request_data),
-                                headers={"Content-Type": "application/json"},
-                                auth=HTTPBasicAuth(self._login, self._pswd),
-                                verify=True)
+        response = self._send('GET', request_url, params=request_data, headers=headers)
+        if cached and response.status_code == 304:
+            self._cache.cache.count(ResponseCache.STAT_REVALIDATED)
+            self._cache.cache.touch(request_url, request_data, self._login)
+            return JSONCodec.loads(cached.content)
         if not response.ok:
             response.raise_for_status()
-        return json.loads(response.content, strict=False)
+        if self._cache:
+            self._cache.cache.count(ResponseCache.STAT_MISS)
+            self._cache.cache.put(request_url, request_data, response.content, response.headers.get('ETag'),
+                                  response.headers.get('Last-Modified'), self._login)
+        return JSONCodec.loads(response.content)
+
+    def _prepare_request(self):
+        """
+        Adjusts request configuration, called once before request is performed
+        """
+        pass
+
+    @abc.abstractmethod
+    def _compile_parser(self):
+        """
+        Compiles response configuration, called once before request is performed
+        :return: compiled parser
+        """
+        return NotImplemented
 
     @abc.abstractmethod
     def _parse_response(self, response):
@@ -396,12 +776,15 @@ class SingleObjectImportRequest(ImportRequest):
 		    }
 	    }
     """
-    def __init__(self, cfg, login, pswd):
+    def __init__(self, cfg, login, pswd, cache=None):
         self.__response_values = {}
-        ImportRequest.__init__(self, cfg, login, pswd, ImportRequest.TYPE_GET_SINGLE_OBJECT)
+        ImportRequest.__init__(self, cfg, login, pswd, ImportRequest.TYPE_GET_SINGLE_OBJECT, cache)
+
+    def _compile_parser(self):
+        return Field.compile(self._response_cfg)
 
     def _parse_response(self, response):
-        Field.parse_field(response, self._response_cfg, self.__response_values)
+        self._parser(response, self.__response_values)
 
     def _get_result(self):
         return self.__response_values
@@ -413,6 +796,8 @@ class ListImportRequest(ImportRequest):
     Example of configuration (parameters should be substituted)
     	"request": {
 	    	"url": "$url/rest/api/2/search",
+	    	"stream": true, <optional: response is parsed incrementally, content-root is required, requires ijson>
+	    	"narrow": false, <optional: disables restriction of requested fields (data.fields) to fields used in response>
 		    "data": {
 			    "jql": "sprint = $sprint",
 	    		"maxResults": 50,
@@ -436,18 +821,65 @@ class ListImportRequest(ImportRequest):
 						    },
                             ...
     """
-    def __init__(self, cfg, login, pswd):
+    __CFG_KEY_REQUEST_NARROW = 'narrow'
+    __ITEM_KEY_FIELDS = 'fields'
+    __PARAM_FIELDS = 'fields'
+
+    def __init__(self, cfg, login, pswd, page_handler=None, cache=None):
+        """
+        Constructor
+        :param cfg: request configuration
+        :param login:
+        :param pswd:
+        :param page_handler: function called with every parsed page (list), pages are not accumulated if defined
+        :param cache: RequestCache for responses (None - responses are not cached)
+        """
         self.__response_values = []
-        ImportRequest.__init__(self, cfg, login, pswd, ImportRequest.TYPE_GET_LIST)
+        self.__page_handler = page_handler
+        ImportRequest.__init__(self, cfg, login, pswd, ImportRequest.TYPE_GET_LIST, cache)
+
+    def _prepare_request(self):
+        """
+        Restricts requested item fields (e.g. Jira search "fields" parameter) to fields which are parsed from response
+        """
+        is_narrow = bool(self._request_cfg[ListImportRequest.__CFG_KEY_REQUEST_NARROW]) \
+            if ListImportRequest.__CFG_KEY_REQUEST_NARROW in self._request_cfg else True
+        request_data = self._request_cfg[
+            Request._CFG_KEY_REQUEST_DATA] if Request._CFG_KEY_REQUEST_DATA in self._request_cfg else None
+        if not is_narrow or not self._content_root or not isinstance(request_data, dict) or \
+                ListImportRequest.__PARAM_FIELDS in request_data:
+            return
+        root_cfg = self._response_cfg[self._content_root]
+        if root_cfg.get(Field.FIELD_TYPE) != Types.TYPE_ARRAY or Field.FIELD_SUBITEMS not in root_cfg:
+            return
+        item_cfg = next(iter(root_cfg[Field.FIELD_SUBITEMS].values()))
+        container_cfgs = Field.data_keys(item_cfg).get(ListImportRequest.__ITEM_KEY_FIELDS)
+        if not container_cfgs:
+            return
+        fields = set()
+        for container_cfg in container_cfgs:
+            if container_cfg[Field.FIELD_TYPE] != Types.TYPE_OBJECT or Field.FIELD_SUBITEMS not in container_cfg:
+                return  # whole container is used
+            for subfield_cfg in container_cfg[Field.FIELD_SUBITEMS].values():
+                fields.update(Field.data_keys(subfield_cfg).keys())
+        if len(fields) > 0:
+            request_data.update({ListImportRequest.__PARAM_FIELDS: ','.join(sorted(fields))})
+            self._logger.debug('requested fields are restricted to {}'.format(request_data[ListImportRequest.__PARAM_FIELDS]))
+
+    def _compile_parser(self):
+        if self._content_root:
+            return [Field.compile(self._response_cfg[self._content_root])]
+        else:
+            return [Field.compile(self._response_cfg[field]) for field in self._response_cfg] # ToDo: check if several root items is real case
 
     def _parse_response(self, response):
         result = []
-        if self._content_root:
-            Field.parse_field(response, self._response_cfg[self._content_root], result)
+        for parser in self._parser:
+            parser(response, result)
+        if self.__page_handler:
+            self.__page_handler(result)
         else:
-            for field in self._response_cfg: # ToDo: check if several root items is real case
-                Field.parse_field(response, self._response_cfg[field], result)
-        self.__response_values.extend(result)
+            self.__response_values.extend(result)
 
     def _get_result(self):
         return self.__response_values
@@ -0,0 +1,170 @@
+import email.utils
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from na3x.integration.metrics import RequestMetrics
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+    """
+    def __init__(self, rate, burst=None):
+        """
+        Constructor
+        :param rate: tokens added per second
+        :param burst: bucket capacity (default - rate, min 1)
+        """
+        self.__rate = float(rate)
+        self.__capacity = float(burst) if burst else max(self.__rate, 1.0)
+        self.__tokens = self.__capacity
+        self.__timestamp = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until token is available and consumes it
+        """
+        while True:
+            with self.__lock:
+                now = time.monotonic()
+                self.__tokens = min(self.__capacity, self.__tokens + (now - self.__timestamp) * self.__rate)
+                self.__timestamp = now
+                if self.__tokens >= 1.0:
+                    self.__tokens -= 1.0
+                    return
+                wait = (1.0 - self.__tokens) / self.__rate
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """
+    Per host rate limiter
+    """
+    def __init__(self, rate=None, burst=None):
+        """
+        Constructor
+        :param rate: max requests per second per host (None - unlimited)
+        :param burst: max burst of requests per host
+        """
+        self.__rate = rate
+        self.__burst = burst
+        self.__buckets = {}
+        self.__lock = threading.Lock()
+
+    def acquire(self, url):
+        """
+        Blocks until request to url host is allowed
+        :param url: request url
+        """
+        if not self.__rate:
+            return
+        host = urlparse(url).netloc
+        with self.__lock:
+            if host not in self.__buckets:
+                self.__buckets[host] = TokenBucket(self.__rate, self.__burst)
+            bucket = self.__buckets[host]
+        bucket.acquire()
+
+
+class RetryPolicy:
+    """
+    Retries request with exponential backoff and full jitter, honours Retry-After response header.
+    Requests with non-idempotent methods (POST) are retried only if they were not processed by server - connection
+    could not be established or server rejected request with 429/503 and Retry-After header
+    """
+    RETRY_STATUSES = [429, 500, 502, 503, 504]
+    REJECT_STATUSES = [429, 503]
+    IDEMPOTENT_METHODS = ['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE']
+
+    def __init__(self, max_retries=3, backoff=0.5, max_backoff=30.0):
+        """
+        Constructor
+        :param max_retries: max number of retries (0 - no retries)
+        :param backoff: base backoff delay, seconds
+        :param max_backoff: max backoff delay, seconds
+        """
+        self.__max_retries = int(max_retries)
+        self.__backoff = float(backoff)
+        self.__max_backoff = float(max_backoff)
+        self.__logger = logging.getLogger(__class__.__name__)
+
+    @staticmethod
+    def is_retriable(e, method=None):
+        """
+        Checks if request failure is transient
+        :param e: exception raised by request
+        :param method: HTTP method of request (None - request is idempotent)
+        :return: True if request could be retried
+        """
+        if method is not None and method.upper() not in RetryPolicy.IDEMPOTENT_METHODS:
+            if isinstance(e, requests.exceptions.ConnectTimeout):
+                return True
+            return isinstance(e, requests.exceptions.HTTPError) and e.response is not None and \
+                e.response.status_code in RetryPolicy.REJECT_STATUSES and RetryPolicy.retry_after(e) is not None
+        if isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+        if isinstance(e, requests.exceptions.HTTPError) and e.response is not None:
+            return e.response.status_code in RetryPolicy.RETRY_STATUSES
+        return False
+
+    @staticmethod
+    def retry_after(e):
+        """
+        Parses Retry-After header of failed response
+        :param e: exception raised by request
+        :return: delay in seconds or None
+        """
+        response = getattr(e, 'response', None)
+        if response is None or 'Retry-After' not in response.headers:
+            return None
+        value = response.headers['Retry-After']
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_date = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):  # malformed header, backoff delay is used
+            return None
+        return max(0.0, retry_date.timestamp() - time.time()) if retry_date else None
+
+    def delay(self, attempt, e=None):
+        """
+        Returns delay before next attempt
+        :param attempt: number of failed attempts
+        :param e: exception raised by request
+        :return: delay in seconds
+        """
+        retry_after = RetryPolicy.retry_after(e) if e else None
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.__max_backoff, self.__backoff * (2 ** (attempt - 1))))
+
+    def call(self, func, before_attempt=None, method=None):
+        """
+        Calls func until success or retries are exhausted
+        :param func: function performing request
+        :param before_attempt: function called before each attempt (e.g. rate limiter)
+        :param method: HTTP method of request (None - request is idempotent)
+        :return: func result
+        """
+        attempt = 0
+        while True:
+            if before_attempt:
+                before_attempt()
+            try:
+                return func()
+            except Exception as e:
+                attempt += 1
+                if attempt > self.__max_retries or not RetryPolicy.is_retriable(e, method):
+                    raise
+                metrics = RequestMetrics.current()
+                if metrics:
+                    metrics.record_retry()
+                delay = self.delay(attempt, e)
+                self.__logger.warning('attempt {:d} failed: {}, retry in {:.2f}s'.format(attempt, e, delay))
+                time.sleep(delay)
@@ -344,16 +344,16 @@ def regexp(input, **params):
     OUT_DESC_IDX = 'idx'
     OUT_DESC_TYPE = 'type'
 
-    res = []
     regex = re.compile(params.get(PARAM_PATTERN))
     field2parse = params.get(PARAM_FIELD_TO_PARSE)
     out_desc = params.get(PARAM_OUTPUT)
-    for row in input:
-        matches = regex.findall(row[field2parse])[0]
-        obj = {}
-        for desc in out_desc:
-            obj[desc[OUT_DESC_FIELD]] = Converter.convert(matches[desc[OUT_DESC_IDX]], desc[OUT_DESC_TYPE])
-        res.append(obj)
+    matches = [regex.findall(row[field2parse])[0] for row in input]
+    res = [{} for row_matches in matches]
+    for desc in out_desc:
+        column = Converter.convert_column([row_matches[desc[OUT_DESC_IDX]] for row_matches in matches],
+                                          desc[OUT_DESC_TYPE])
+        for obj, value in zip(res, column):
+            obj[desc[OUT_DESC_FIELD]] = value
     return res
 
 
@@ -374,12 +374,12 @@ def format(input, **params):
     format_string = params.get(PARAM_FORMAT_STRING)
     format_inputs = params.get(PARAM_FORMAT_INPUT)
     result_field = params.get(PARAM_RESULT_FIELD)
-    for row in input:
-        row_input = []
-        for desc in format_inputs:
-            row_input.append(Converter.convert(row[desc[IN_DESC_FIELD]], desc[IN_DESC_TYPE]))
+    rows = input if isinstance(input, list) else list(input)  # rows are read once per input column
+    columns = [Converter.convert_column([row[desc[IN_DESC_FIELD]] for row in rows], desc[IN_DESC_TYPE])
+               for desc in format_inputs]
+    for row, row_input in zip(rows, zip(*columns) if columns else [() for row in rows]):
         row[result_field] = format_string.format(*row_input)
-    return input
+    return rows
 
 
 @transformer
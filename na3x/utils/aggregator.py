@@ -1,10 +1,191 @@
-import pandas as pd
+import math
+try:
+    import numpy as np
+except ImportError:  # vectorized aggregation is optional
+    np = None
+
+
+class _Accumulator:
+    """
+    Running aggregates of single group, missing (None/NaN) values are skipped as pandas does. Only aggregates required by
+    requested functions are calculated: sum for sum/mean, order for min/max, unique values for nunique. TypeError is
+    raised for values which could not be added or ordered (e.g. strings for sum, dicts for min/max)
+    """
+    __slots__ = ['count', 'sum', 'is_order', 'min', 'max', 'uniques']
+
+    def __init__(self, funcs):
+        self.count = 0
+        self.sum = 0 if Aggregator.FUNC_SUM in funcs or Aggregator.FUNC_MEAN in funcs else None
+        self.is_order = Aggregator.FUNC_MIN in funcs or Aggregator.FUNC_MAX in funcs
+        self.min = None
+        self.max = None
+        self.uniques = set() if Aggregator.FUNC_NUNIQUE in funcs else None
+
+    def add(self, value):
+        self.count += 1
+        if self.sum is not None:
+            self.sum += value
+        if self.is_order:
+            if self.count == 1:
+                self.min = self.max = value
+            else:
+                if value < self.min:
+                    self.min = value
+                if value > self.max:
+                    self.max = value
+        if self.uniques is not None:
+            self.uniques.add(value)
+
+    def result(self, func):
+        if func == Aggregator.FUNC_COUNT:
+            return self.count
+        elif func == Aggregator.FUNC_SUM:
+            return self.sum if self.count else 0
+        elif func == Aggregator.FUNC_MIN:
+            return self.min if self.count else math.nan
+        elif func == Aggregator.FUNC_MAX:
+            return self.max if self.count else math.nan
+        elif func == Aggregator.FUNC_MEAN:
+            return self.sum / self.count if self.count else math.nan
+        elif func == Aggregator.FUNC_NUNIQUE:
+            return len(self.uniques)
 
 
 class Aggregator:
     """
-    Aggregator
+    Aggregator, sum/count/min/max/mean/nunique are calculated natively in single pass over values (vectorized with NumPy
+    for large lists of numbers), other functions and values which could not be added or ordered natively are delegated to
+    pandas
     """
+    FUNC_SUM = 'sum'
+    FUNC_COUNT = 'count'
+    FUNC_MIN = 'min'
+    FUNC_MAX = 'max'
+    FUNC_MEAN = 'mean'
+    FUNC_NUNIQUE = 'nunique'
+    NATIVE_FUNCS = [FUNC_SUM, FUNC_COUNT, FUNC_MIN, FUNC_MAX, FUNC_MEAN, FUNC_NUNIQUE]
+    VECTORIZED_FUNCS = [FUNC_SUM, FUNC_COUNT, FUNC_MIN, FUNC_MAX, FUNC_MEAN]
+    VECTORIZE_THRESHOLD = 10000
+
+    @staticmethod
+    def __is_na(value):
+        return value is None or (isinstance(value, float) and math.isnan(value))
+
+    @staticmethod
+    def __get_group_fields(group_by):
+        if group_by is None:
+            return None
+        return list(group_by) if isinstance(group_by, (list, tuple)) else [group_by]
+
+    @staticmethod
+    def __get_group(value, group_fields):
+        """
+        Returns group key - scalar for single group field, tuple for several ones, None if any group value is missing
+        """
+        key = tuple(value.get(field) for field in group_fields)
+        if any(Aggregator.__is_na(item) for item in key):
+            return None
+        return key[0] if len(key) == 1 else key
+
+    @staticmethod
+    def __aggregate(values, agg_field, agg_funcs, group_by):
+        """
+        Calculates native aggregate functions
+        :return: {<group key or None if group_by is not defined>: {<func>: <value>}} or None if values is empty
+        """
+        group_fields = Aggregator.__get_group_fields(group_by)
+        if np is not None and isinstance(values, list) and len(values) >= Aggregator.VECTORIZE_THRESHOLD and \
+                all(func in Aggregator.VECTORIZED_FUNCS for func in agg_funcs):
+            res = Aggregator.__aggregate_vectorized(values, agg_field, agg_funcs, group_fields)
+            if res is not None:
+                return res
+        groups = {}
+        is_empty = True
+        is_field = False
+        is_group_fields = group_fields is None
+        for value in values:
+            is_empty = False
+            if agg_field in value:
+                is_field = True
+            if group_fields:
+                if not is_group_fields:
+                    is_group_fields = all(field in value for field in group_fields)
+                group = Aggregator.__get_group(value, group_fields)
+                if group is None:
+                    continue
+            else:
+                group = None
+            if group not in groups:
+                groups[group] = _Accumulator(agg_funcs)
+            item = value.get(agg_field)
+            if not Aggregator.__is_na(item):
+                groups[group].add(item)
+        if is_empty:
+            return None
+        if not is_field or not is_group_fields:
+            raise KeyError('Column(s) {} do not exist'.format([agg_field] + (group_fields if group_fields else [])))
+        return {group: {func: groups[group].result(func) for func in agg_funcs} for group in
+                (sorted(groups) if group_fields else groups)}
+
+    @staticmethod
+    def __aggregate_vectorized(values, agg_field, agg_funcs, group_fields):
+        """
+        Calculates aggregate functions with NumPy
+        :return: see __aggregate or None if values are not numbers
+        """
+        items = []
+        group_ids = []
+        groups = {}
+        is_int = True
+        is_field = False
+        for value in values:
+            if agg_field in value:
+                is_field = True
+            if group_fields:
+                group = Aggregator.__get_group(value, group_fields)
+                if group is None:
+                    continue
+                group_ids.append(groups.setdefault(group, len(groups)))
+            item = value.get(agg_field)
+            if item is None:
+                is_int = False
+                items.append(math.nan)
+            elif type(item) in (int, float):
+                is_int = is_int and type(item) == int
+                items.append(item)
+            else:
+                return None  # not a number (str, bool, ...)
+        if not is_field or (group_fields and not groups):
+            return None  # error is raised by native aggregation
+        column = np.array(items, dtype=float)
+        is_na = np.isnan(column)
+        size = len(groups) if group_fields else 1
+        ids = np.array(group_ids, dtype=int) if group_fields else np.zeros(len(column), dtype=int)
+        valid = ~is_na
+        counts = np.bincount(ids[valid], minlength=size)
+        sums = np.bincount(ids[valid], weights=column[valid], minlength=size)
+        mins = np.full(size, np.inf)
+        maxs = np.full(size, -np.inf)
+        np.minimum.at(mins, ids[valid], column[valid])
+        np.maximum.at(maxs, ids[valid], column[valid])
+        as_value = (lambda x: int(x)) if is_int else (lambda x: float(x))
+        res = {}
+        for group, i in (groups.items() if group_fields else [(None, 0)]):
+            count = int(counts[i])
+            res[group] = {}
+            for func in agg_funcs:
+                if func == Aggregator.FUNC_COUNT:
+                    res[group][func] = count
+                elif func == Aggregator.FUNC_SUM:
+                    res[group][func] = as_value(sums[i]) if count else 0
+                elif func == Aggregator.FUNC_MIN:
+                    res[group][func] = as_value(mins[i]) if count else math.nan
+                elif func == Aggregator.FUNC_MAX:
+                    res[group][func] = as_value(maxs[i]) if count else math.nan
+                elif func == Aggregator.FUNC_MEAN:
+                    res[group][func] = float(sums[i]) / count if count else math.nan
+        return {group: res[group] for group in (sorted(res) if group_fields else res)}
+
     @staticmethod
     def agg_multi_func(values, agg_field, agg_funcs, group_by=None):
         """
@@ -12,9 +193,45 @@ class Aggregator:
         :param values: list of objects (dict)
         :param agg_field: target field to calculate aggregates
         :param agg_funcs: list of aggregate functions
-        :param group_by: field used to determine group
+        :param group_by: field (or list of fields) used to determine group
         :return: dict {agg_func0: value, agg_func1: agg_value, ...}
         """
+        if not all(func in Aggregator.NATIVE_FUNCS for func in agg_funcs):
+            return Aggregator.__agg_multi_func_pandas(values, agg_field, agg_funcs, group_by)
+        values = values if isinstance(values, list) else list(values)
+        try:
+            res = Aggregator.__aggregate(values, agg_field, agg_funcs, group_by)
+        except TypeError:  # values could not be added or ordered natively, e.g. strings for sum
+            return Aggregator.__agg_multi_func_pandas(values, agg_field, agg_funcs, group_by)
+        if res is None:
+            return None
+        return res if group_by else res[None]
+
+    @staticmethod
+    def agg_single_func(values, agg_field, agg_func, group_by=None):
+        """
+        Aggregates single function
+        :param values: list of objects (dict)
+        :param agg_field: target field to calculate aggregate
+        :param agg_func: aggregate function
+        :param group_by: field (or list of fields) used to determine group
+        :return: aggregated value
+        """
+        if agg_func not in Aggregator.NATIVE_FUNCS:
+            return Aggregator.__agg_single_func_pandas(values, agg_field, agg_func, group_by)
+        values = values if isinstance(values, list) else list(values)
+        try:
+            res = Aggregator.__aggregate(values, agg_field, [agg_func], group_by)
+        except TypeError:  # values could not be added or ordered natively, e.g. strings for sum
+            return Aggregator.__agg_single_func_pandas(values, agg_field, agg_func, group_by)
+        if res is None:
+            return None
+        return {group: aggs[agg_func] for group, aggs in res.items()} if group_by else res[None][agg_func]
+
+    @staticmethod
+    def __agg_multi_func_pandas(values, agg_field, agg_funcs, group_by=None):
+        import pandas as pd
+        values = list(values)
         if len(values) == 0:
             return None
         else:
@@ -35,15 +252,9 @@ class Aggregator:
                 return res
 
     @staticmethod
-    def agg_single_func(values, agg_field, agg_func, group_by=None):
-        """
-        Aggregates single function
-        :param values: list of objects (dict)
-        :param agg_field: target field to calculate aggregate
-        :param agg_func: aggregate function
-        :param group_by: field used to determine group
-        :return: aggregated value
-        """
+    def __agg_single_func_pandas(values, agg_field, agg_func, group_by=None):
+        import pandas as pd
+        values = list(values)
         if len(values) == 0:
             return None
         else:
@@ -55,4 +266,3 @@ class Aggregator:
                 return res
             else:
                 return pd.DataFrame(values).agg({agg_field: [agg_func]})[agg_field][agg_func]
-
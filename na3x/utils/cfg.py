@@ -1,4 +1,7 @@
+import json
+import re
 from string import Template
+from na3x.utils.codec import JSONCodec
 
 
 class CfgUtils:
@@ -11,3 +14,119 @@ class CfgUtils:
         :return: configuration with substituted parameters
         """
         return  Template(cfg).safe_substitute(params)
+
+
+class CfgTemplate:
+    """
+    JSON configuration with $ parameters which is parsed once and rendered many times.
+    Parameters inside JSON strings are substituted as text, parameters outside strings (e.g. "labels": $value)
+    are substituted as JSON values. List and dict parameter values are substituted as JSON.
+    Rendering is equivalent to json.loads(CfgUtils.substitute_params(cfg, params)), if configuration could not be
+    compiled (e.g. parameter is a part of JSON number) rendering falls back to text substitution.
+    """
+    __SLOT_TEXT = '\ue000{:d}\ue001'
+    __SLOT_VALUE = '\ue002{:d}\ue003'
+    __RE_SLOT_TEXT = re.compile('\ue000(\\d+)\ue001')
+    __RE_SLOT_VALUE = re.compile('^\ue002(\\d+)\ue003$')
+    __RE_ESCAPE = re.compile('[\\\\"\x00-\x1f]')
+
+    def __init__(self, cfg, params=None, slots=None, strict=True):
+        """
+        Constructor
+        :param cfg: configuration (text)
+        :param params: parameters substituted once
+        :param slots: names of parameters substituted on each render
+        :param strict: see json.loads strict
+        """
+        self.__cfg = cfg
+        self.__params = params if params else {}
+        self.__strict = strict
+        self.__slots = []
+        slot_names = set(slots) if slots else set()
+        text = []
+        in_string = False
+        is_escaped = False
+        pos = 0
+        for match in Template.pattern.finditer(cfg):
+            chunk = cfg[pos:match.start()]
+            name = match.group('named') or match.group('braced')
+            if match.group('escaped') is not None:
+                chunk += Template.delimiter
+            elif name in slot_names and name not in self.__params:
+                self.__slots.append((name, match.group()))
+                slot = CfgTemplate.__SLOT_TEXT if in_string else CfgTemplate.__SLOT_VALUE
+                chunk += slot.format(len(self.__slots) - 1) if in_string else '"{}"'.format(
+                    slot.format(len(self.__slots) - 1))
+            elif name in self.__params:
+                chunk += '{}'.format(self.__params[name])
+            else:
+                chunk += match.group()
+            for char in chunk:  # tracks whether next parameter is inside of JSON string
+                if is_escaped:
+                    is_escaped = False
+                elif in_string and char == '\\':
+                    is_escaped = True
+                elif char == '"':
+                    in_string = not in_string
+            text.append(chunk)
+            pos = match.end()
+        text.append(cfg[pos:])
+        try:
+            self.__render = self.__compile(json.loads(''.join(text), strict=strict))
+        except ValueError:
+            self.__render = None
+
+    def __compile(self, node):
+        if isinstance(node, dict):
+            items = [(self.__compile(key), self.__compile(value)) for key, value in node.items()]
+            return lambda params: {key(params): value(params) for key, value in items}
+        elif isinstance(node, list):
+            items = [self.__compile(value) for value in node]
+            return lambda params: [value(params) for value in items]
+        elif isinstance(node, str):
+            match = CfgTemplate.__RE_SLOT_VALUE.match(node)
+            if match:
+                slot = int(match.group(1))
+                return lambda params: self.__render_value(slot, params)
+            parts = CfgTemplate.__RE_SLOT_TEXT.split(node)
+            if len(parts) == 1:
+                return lambda params: node
+            return lambda params: ''.join(
+                part if i % 2 == 0 else self.__render_text(int(part), params) for i, part in enumerate(parts))
+        else:
+            return lambda params: node
+
+    def __render_text(self, slot, params):
+        name, placeholder = self.__slots[slot]
+        if name not in params:
+            return placeholder
+        value = params[name]
+        value = json.dumps(value) if isinstance(value, (list, dict)) else '{}'.format(value)
+        if CfgTemplate.__RE_ESCAPE.search(value):
+            return json.loads('"{}"'.format(value), strict=self.__strict)
+        return value
+
+    def __render_value(self, slot, params):
+        name, placeholder = self.__slots[slot]
+        if name not in params:
+            return json.loads(placeholder, strict=self.__strict)  # raises the same error as text substitution
+        value = params[name]
+        if isinstance(value, (list, dict)):
+            return value
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+        return JSONCodec.loads('{}'.format(value), strict=self.__strict)
+
+    def render(self, params=None):
+        """
+        Renders configuration
+        :param params: parameters to substitute
+        :return: configuration (dict)
+        """
+        params = params if params else {}
+        if self.__render:
+            return self.__render(params)
+        text_params = {name: json.dumps(value) if isinstance(value, (list, dict)) else value
+                       for name, value in params.items()}
+        text_params.update(self.__params)
+        return json.loads(CfgUtils.substitute_params(self.__cfg, text_params), strict=self.__strict)
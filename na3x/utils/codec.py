@@ -0,0 +1,108 @@
+import json
+import math
+from datetime import date
+from na3x.utils.converter import Converter, Types
+try:
+    import orjson
+except ImportError:  # fast codec is optional
+    orjson = None
+
+
+def encode_default(obj):
+    """
+    Serializes objects which are not supported by JSON (dates, iterables)
+    :param obj: object to serialize
+    :return: JSON serializable value
+    """
+    try:
+        if isinstance(obj, date):
+            if obj.hour != 0: # ToDo: fix this work around
+                return Converter.datetime2str(obj)
+            else:
+                return Converter.convert(obj, Types.TYPE_STRING)
+        iterable = iter(obj)
+    except TypeError:
+        pass
+    else:
+        return list(iterable)
+    raise TypeError('Object of type {} is not JSON serializable'.format(obj.__class__.__name__))
+
+
+class JSONCodec:
+    """
+    JSON codec, uses orjson if installed and falls back to stdlib json.
+    Documents rejected by orjson (control characters with strict=False, NaN, big integers) are decoded by stdlib,
+    dates are serialized by encode_default for both backends. Non-finite floats (NaN, Infinity) are serialized as null
+    by both backends. orjson output is compact and non-ASCII characters are not escaped
+    """
+    BACKEND_STDLIB = 'stdlib'
+    BACKEND_ORJSON = 'orjson'
+
+    __backend = BACKEND_ORJSON if orjson else BACKEND_STDLIB
+
+    @staticmethod
+    def use(backend):
+        """
+        Selects codec backend
+        :param backend: BACKEND_STDLIB or BACKEND_ORJSON
+        """
+        if backend == JSONCodec.BACKEND_ORJSON and not orjson:
+            raise ImportError('orjson is not installed: pip install na3x[fast]')
+        if backend not in [JSONCodec.BACKEND_STDLIB, JSONCodec.BACKEND_ORJSON]:
+            raise NotImplementedError('Not supported JSON backend - {}'.format(backend))
+        JSONCodec.__backend = backend
+
+    @staticmethod
+    def backend():
+        """
+        Returns current codec backend
+        :return: BACKEND_STDLIB or BACKEND_ORJSON
+        """
+        return JSONCodec.__backend
+
+    @staticmethod
+    def loads(data, strict=False):
+        """
+        Deserializes JSON document
+        :param data: str or bytes
+        :param strict: see json.loads strict, control characters are allowed inside strings if False
+        :return: object
+        """
+        if JSONCodec.__backend == JSONCodec.BACKEND_ORJSON:
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                pass
+        return json.loads(data, strict=strict)
+
+    @staticmethod
+    def __finite(obj):
+        if isinstance(obj, float):
+            return obj if math.isfinite(obj) else None
+        if isinstance(obj, dict):
+            return {key: JSONCodec.__finite(value) for key, value in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return [JSONCodec.__finite(value) for value in obj]
+        return obj
+
+    @staticmethod
+    def dumps(obj, sort_keys=False, default=encode_default):
+        """
+        Serializes object into JSON document, non-finite floats are serialized as null
+        :param obj: object
+        :param sort_keys: output of dictionaries is sorted by key
+        :param default: function serializing objects which are not supported by JSON
+        :return: str
+        """
+        if JSONCodec.__backend == JSONCodec.BACKEND_ORJSON:
+            option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+            try:
+                return orjson.dumps(obj, default=default,
+                                    option=option | orjson.OPT_SORT_KEYS if sort_keys else option).decode('utf-8')
+            except TypeError:  # e.g. integer out of 64-bit range
+                pass
+        try:
+            return json.dumps(obj, default=default, sort_keys=sort_keys, allow_nan=False)
+        except ValueError:  # non-finite float, orjson serializes it as null
+            return json.dumps(JSONCodec.__finite(obj), default=lambda value: JSONCodec.__finite(default(value)),
+                              sort_keys=sort_keys, allow_nan=False)
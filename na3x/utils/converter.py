@@ -1,5 +1,6 @@
 import datetime
 import logging
+import re
 
 
 class Types:
@@ -13,6 +14,15 @@ class Types:
 
 
 class Converter:
+    """
+    Converter of values to requested type (see Types), values are converted by columns: already typed values are passed
+    as is, ISO dates (2017-10-01) and datetimes (2017-10-01T10:01:00) are parsed in bulk without strptime. Column
+    converters are built once per type and shared
+    """
+    __converters = {}
+    __ISO_DATE = re.compile(r'\d{4}-\d{2}-\d{2}\Z', re.ASCII)
+    __ISO_DATETIME = re.compile(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\Z', re.ASCII)
+
     @staticmethod
     def convert(input, type):
         """
@@ -21,37 +31,70 @@ class Converter:
         :param type: type to cast
         :return: converted value
         """
+        return Converter.convert_column([input], type)[0]
+
+    @staticmethod
+    def convert_column(values, type):
+        """
+        Converts list of values (column) to request type
+        :param values: list of input values
+        :param type: type to cast
+        :return: list of converted values
+        """
+        convert = Converter.__converters.get(type) or Converter.__get_cached_converter(type)
         try:
-            if not input:
-                if type == Types.TYPE_STRING:
-                    return ''
-                else:
-                    return None
-            if type == Types.TYPE_STRING:
-                if isinstance(input, datetime.date):
-                    return input.strftime('%Y-%m-%d')
-                else:
-                    return input
-            if type == Types.TYPE_FLOAT:
-                return float(input)
-            elif type == Types.TYPE_INT:
-                return int(input)
-            elif type == Types.TYPE_DATE:
-                if isinstance(input, datetime.date):
-                    return input
-                else:
-                    return datetime.datetime.strptime(input[0:10], '%Y-%m-%d')
-            elif type == Types.TYPE_DATETIME:
-                if isinstance(input, datetime.datetime):
-                    return input
-                else:
-                    return datetime.datetime.strptime(input[0:19], '%Y-%m-%dT%H:%M:%S') # 2017-10-01T10:01:00.479+0300
-            else:
-                return NotImplementedError('Not supported type - {}'.format(type))
+            return convert(values)
         except Exception as e:
             logging.error(e, exc_info=True)
             raise Exception(e)
 
+    @staticmethod
+    def converter(type):
+        """
+        Returns converter function for single values
+        :param type: type to cast
+        :return: function(input) returning converted value
+        """
+        convert_column = Converter.convert_column
+        return lambda input: convert_column([input], type)[0]
+
+    @staticmethod
+    def __get_cached_converter(type):
+        return Converter.__converters.setdefault(type, Converter.__get_converter(type))
+
+    @staticmethod
+    def __get_converter(type):
+        if type == Types.TYPE_STRING:
+            return lambda values: ['' if not input else input.strftime('%Y-%m-%d')
+                                   if isinstance(input, datetime.date) else input for input in values]
+        elif type == Types.TYPE_FLOAT:
+            return lambda values: [None if not input else input if input.__class__ is float else float(input)
+                                   for input in values]
+        elif type == Types.TYPE_INT:
+            return lambda values: [None if not input else input if input.__class__ is int else int(input)
+                                   for input in values]
+        elif type == Types.TYPE_DATE:
+            return Converter.__get_parser(datetime.date, 10, Converter.__ISO_DATE, '%Y-%m-%d')
+        elif type == Types.TYPE_DATETIME:
+            # 2017-10-01T10:01:00.479+0300
+            return Converter.__get_parser(datetime.datetime, 19, Converter.__ISO_DATETIME, '%Y-%m-%dT%H:%M:%S')
+        else:
+            return lambda values: [None if not input else NotImplementedError('Not supported type - {}'.format(type))
+                                   for input in values]
+
+    @staticmethod
+    def __get_parser(parsed_type, length, iso, format):
+        fromisoformat = datetime.datetime.fromisoformat
+        strptime = datetime.datetime.strptime
+        match = iso.match
+
+        def convert(values):
+            res = [None if not input else input if isinstance(input, parsed_type) else input[0:length]
+                   for input in values]
+            return [value if value is None or value.__class__ is not str else
+                    fromisoformat(value) if match(value) else strptime(value, format) for value in res]
+        return convert
+
     @staticmethod
     def datetime2str(input):
         """
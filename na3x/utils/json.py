@@ -1,53 +1,322 @@
-from datetime import date
+import bisect
+import hashlib
+import json
 from flask.json import JSONEncoder
-from jsondiff import diff
-from na3x.utils.converter import Converter, Types
+from jsondiff.symbols import delete, insert, replace
+from na3x.utils.codec import JSONCodec, encode_default
 
 
 class ExtJSONEncoder(JSONEncoder):
     """
-    Custom JSON encoder for Flask REST API
+    Custom JSON encoder for Flask REST API, compact output is serialized by JSONCodec (see JSONCodec.dumps)
     """
     def default(self, obj):
         try:
-            if isinstance(obj, date):
-                if obj.hour != 0: # ToDo: fix this work around
-                    return Converter.datetime2str(obj)
-                else:
-                    return Converter.convert(obj, Types.TYPE_STRING)
-            iterable = iter(obj)
+            return encode_default(obj)
         except TypeError:
             pass
-        else:
-            return list(iterable)
         return JSONEncoder.default(self, obj)
 
+    def encode(self, obj):
+        if self.indent is not None:
+            return JSONEncoder.encode(self, obj)
+        return JSONCodec.dumps(obj, self.sort_keys, self.default)
+
 
 class JSONUtils():
     """
     JSON utils
+    List elements are matched by identity - value of key field (see key param of diff/patch) or content hash if element
+    has no key, so lists are compared in near-linear time. Without key diff keeps jsondiff output: unmatched elements at
+    the same index are compared, moved elements are reported as deleted and inserted, list is replaced if no element
+    is matched. With key elements moved within list are not reported as changed
+    Deleted list elements are reported as {'$delete': [<element>, ...]} for lists in fields of compared objects and as
+    jsondiff {delete: [<index>, ...]} below
+    Patch format (see patch/apply):
+	{
+		"$set": {<field>: <value>, ...}, <added or replaced fields>
+		"$unset": [<field>, ...], <removed fields>
+		"$patch": {<field>: <dict or list patch>, ...}
+	}
+	{
+		"$key": "key", <optional: identity key field>
+		"$delete": [<id>, ...], <removed elements>
+		"$insert": [[<index>, <element>], ...], <added elements, index in result list>
+		"$patch": [[<id>, <dict patch>], ...], <changed elements with key>
+		"$order": [<id>, ...] <optional: order of kept elements if they were moved>
+	}
     """
     DIFF_DELETE = '$delete'
 
-    def diff(a, b):
+    PATCH_SET = '$set'
+    PATCH_UNSET = '$unset'
+    PATCH_PATCH = '$patch'
+    PATCH_KEY = '$key'
+    PATCH_DELETE = '$delete'
+    PATCH_INSERT = '$insert'
+    PATCH_ORDER = '$order'
+    PATCH_REPLACE = '$replace'
+
+    __HASH_PREFIX = '#'
+
+    @staticmethod
+    def diff(a, b, key=None):
         """
         Compares JSON objects
         :param a:
         :param b:
+        :param key: identity field of list elements or {<field containing list>: <identity field>}
         :return: difference object a vs b
         """
-        delta = diff(a, b)
-        if not a:
-            return delta
-        for item in delta:
-            if isinstance(a[item], list):
-                if delta[item] == []:
-                    delta[item] = {JSONUtils.DIFF_DELETE : a[item]}
-                elif isinstance(delta[item], dict):
-                    for key in delta[item].keys():
-                        if str(key) == JSONUtils.DIFF_DELETE:
-                            delta_upd = {JSONUtils.DIFF_DELETE : []}
-                            for i in delta[item][key]:
-                                delta_upd[JSONUtils.DIFF_DELETE].append(a[item][i])
-                                delta[item] = delta_upd
+        if a == b:
+            return {}
+        if not a or not JSONUtils.__is_same_type(a, b):
+            return {replace: b}
+        return JSONUtils.__diff_value(a, b, key, 0)
+
+    @staticmethod
+    def patch(a, b, key=None):
+        """
+        Creates patch transforming a to b
+        :param a:
+        :param b:
+        :param key: identity field of list elements or {<field containing list>: <identity field>}
+        :return: patch (see JSONUtils)
+        """
+        if not JSONUtils.__is_same_type(a, b):
+            return {JSONUtils.PATCH_REPLACE: b}
+        return JSONUtils.__patch_value(a, b, key)
+
+    @staticmethod
+    def apply(a, patch):
+        """
+        Applies patch, a is not changed
+        :param a:
+        :param patch: patch created by patch()
+        :return: patched object
+        """
+        if JSONUtils.PATCH_REPLACE in patch:
+            return patch[JSONUtils.PATCH_REPLACE]
+        if isinstance(a, list):
+            return JSONUtils.__apply_list(a, patch)
+        return JSONUtils.__apply_dict(a, patch)
+
+    @staticmethod
+    def __is_same_type(a, b):
+        return (isinstance(a, dict) and isinstance(b, dict)) or (isinstance(a, list) and isinstance(b, list))
+
+    @staticmethod
+    def __get_key(key, field):
+        return key.get(field) if isinstance(key, dict) else key
+
+    @staticmethod
+    def __get_ids(items, key, is_numbered=True):
+        """
+        Returns identities of list elements, repeated identities are numbered - (<id>, <occurrence>) if is_numbered
+        """
+        ids = []
+        occurrences = {}
+        for item in items:
+            if key is not None and isinstance(item, dict) and isinstance(item.get(key), (str, int, float)):
+                id = item[key]
+            else:
+                id = JSONUtils.__HASH_PREFIX + hashlib.sha1(
+                    json.dumps(item, sort_keys=True, default=encode_default).encode('utf-8')).hexdigest()
+            if is_numbered:
+                occurrence = occurrences.get(id, 0)
+                occurrences[id] = occurrence + 1
+                id = id if occurrence == 0 else (id, occurrence)
+            ids.append(id)
+        return ids
+
+    @staticmethod
+    def __get_id(id):
+        # numbered identities are lists after JSON round trip
+        return tuple(id) if isinstance(id, list) else id
+
+    @staticmethod
+    def __diff_value(a, b, key, level):
+        if isinstance(a, dict) and isinstance(b, dict):
+            return JSONUtils.__diff_dict(a, b, key, level)
+        if isinstance(a, list) and isinstance(b, list):
+            return JSONUtils.__diff_list(a, b, key, level)
+        return b
+
+    @staticmethod
+    def __diff_dict(a, b, key, level):
+        delta = {}
+        for field, value in b.items():
+            if field not in a:
+                delta[field] = value
+            elif a[field] != value:
+                delta[field] = JSONUtils.__diff_value(a[field], value, JSONUtils.__get_key(key, field), level + 1)
+        deleted = [field for field in a if field not in b]
+        if len(deleted) > 0:
+            delta[delete] = deleted
+        return delta
+
+    @staticmethod
+    def __is_similar(a, b):
+        if isinstance(a, dict) and isinstance(b, dict):
+            return any(field in b for field in a)
+        return isinstance(a, list) and isinstance(b, list)
+
+    @staticmethod
+    def __get_moved(kept):
+        """
+        Returns elements moved within list - kept elements out of longest increasing subsequence of source indexes
+        :param kept: matched elements [(<index in a>, <index in b>), ...] ordered by index in b
+        :return: set of moved elements
+        """
+        tails = []  # least last source index of increasing subsequence of each length
+        tail_positions = []
+        prev = []
+        for n, (i, _) in enumerate(kept):
+            length = bisect.bisect_left(tails, i)
+            prev.append(tail_positions[length - 1] if length > 0 else None)
+            if length == len(tails):
+                tails.append(i)
+                tail_positions.append(n)
+            else:
+                tails[length] = i
+                tail_positions[length] = n
+        moved = set(kept)
+        n = tail_positions[-1] if tail_positions else None
+        while n is not None:
+            moved.discard(kept[n])
+            n = prev[n]
+        return moved
+
+    @staticmethod
+    def __diff_list(a, b, key, level):
+        """
+        Compares lists, elements equal at the same index are matched first, then elements are matched by identity
+        :param level: nesting level of list, deleted elements of lists in fields of compared objects (level 1) are
+        reported as elements ('$delete'), below as indexes (jsondiff delete)
+        :return: {<index in b>: <changed element or its difference>, insert: [(<index in b>, <element>), ...],
+        '$delete' || delete: [<deleted element or index in a>, ...]} or b if no element is matched (without key)
+        """
+        a_ids = JSONUtils.__get_ids(a, key, False)
+        b_ids = JSONUtils.__get_ids(b, key, False)
+        in_place = set(j for j in range(min(len(a), len(b))) if a_ids[j] == b_ids[j] and a[j] == b[j])
+        a_index = {}  # identity: indexes of other elements, popped in list order
+        for i in reversed(range(len(a))):
+            if i not in in_place:
+                a_index.setdefault(a_ids[i], []).append(i)
+        delta = {}
+        kept = []
+        unmatched = []
+        for j, id in enumerate(b_ids):
+            if j in in_place:
+                kept.append((j, j))
+                continue
+            i = a_index[id].pop() if a_index.get(id) else None
+            if i is None:
+                unmatched.append(j)
+            else:
+                kept.append((i, j))
+                if a[i] != b[j]:
+                    delta[j] = JSONUtils.__diff_value(a[i], b[j], key, level + 1)
+        deleted = set(i for indexes in a_index.values() for i in indexes)
+        inserted = []
+        if key is None:
+            unmatched_a = set(deleted)
+            for i, j in JSONUtils.__get_moved(kept):
+                deleted.add(i)
+                inserted.append((j, b[j]))
+                delta.pop(j, None)
+            is_any_matched = len(kept) > 0
+            for j in unmatched:
+                if j in unmatched_a and JSONUtils.__is_similar(a[j], b[j]):  # element is changed in place
+                    deleted.remove(j)
+                    delta[j] = JSONUtils.__diff_value(a[j], b[j], key, level + 1)
+                    is_any_matched = True
+                else:
+                    inserted.append((j, b[j]))
+            if not is_any_matched and len(b) > 0:
+                return b
+        else:
+            inserted = [(j, b[j]) for j in unmatched]
+        if len(inserted) > 0:
+            delta[insert] = sorted(inserted, key=lambda item: item[0])
+        if len(deleted) > 0:
+            if level == 1:
+                delta[JSONUtils.DIFF_DELETE] = [a[i] for i in sorted(deleted)]
+            else:
+                delta[delete] = sorted(deleted)
         return delta
+
+    @staticmethod
+    def __patch_value(a, b, key):
+        if isinstance(a, list):
+            return JSONUtils.__patch_list(a, b, key)
+        return JSONUtils.__patch_dict(a, b, key)
+
+    @staticmethod
+    def __patch_dict(a, b, key):
+        patch = {}
+        for field, value in b.items():
+            if field in a and a[field] == value:
+                continue
+            if field in a and JSONUtils.__is_same_type(a[field], value):
+                patch.setdefault(JSONUtils.PATCH_PATCH, {})[field] = \
+                    JSONUtils.__patch_value(a[field], value, JSONUtils.__get_key(key, field))
+            else:
+                patch.setdefault(JSONUtils.PATCH_SET, {})[field] = value
+        deleted = [field for field in a if field not in b]
+        if len(deleted) > 0:
+            patch[JSONUtils.PATCH_UNSET] = deleted
+        return patch
+
+    @staticmethod
+    def __patch_list(a, b, key):
+        a_ids = JSONUtils.__get_ids(a, key)
+        b_ids = JSONUtils.__get_ids(b, key)
+        a_index = {id: i for i, id in enumerate(a_ids)}
+        patch = {} if key is None else {JSONUtils.PATCH_KEY: key}
+        kept = []
+        deleted = []
+        for j, id in enumerate(b_ids):
+            i = a_index.pop(id, None)
+            if i is not None and a[i] != b[j] and not JSONUtils.__is_same_type(a[i], b[j]):
+                deleted.append(i)  # e.g. 1 and 1.0 have the same hash
+                i = None
+            if i is None:
+                patch.setdefault(JSONUtils.PATCH_INSERT, []).append([j, b[j]])
+                continue
+            kept.append((i, id))
+            if a[i] != b[j]:
+                patch.setdefault(JSONUtils.PATCH_PATCH, []).append([id, JSONUtils.__patch_value(a[i], b[j], key)])
+        deleted.extend(a_index.values())
+        if len(deleted) > 0:
+            patch[JSONUtils.PATCH_DELETE] = [a_ids[i] for i in sorted(deleted)]
+        if any(kept[n][0] > kept[n + 1][0] for n in range(len(kept) - 1)):
+            patch[JSONUtils.PATCH_ORDER] = [id for i, id in kept]
+        return patch
+
+    @staticmethod
+    def __apply_dict(a, patch):
+        res = dict(a)
+        for field in patch.get(JSONUtils.PATCH_UNSET, []):
+            res.pop(field, None)
+        res.update(patch.get(JSONUtils.PATCH_SET, {}))
+        for field, field_patch in patch.get(JSONUtils.PATCH_PATCH, {}).items():
+            res[field] = JSONUtils.apply(res[field], field_patch)
+        return res
+
+    @staticmethod
+    def __apply_list(a, patch):
+        ids = JSONUtils.__get_ids(a, patch.get(JSONUtils.PATCH_KEY))
+        deleted = set(JSONUtils.__get_id(id) for id in patch.get(JSONUtils.PATCH_DELETE, []))
+        patches = {JSONUtils.__get_id(id): item_patch for id, item_patch in patch.get(JSONUtils.PATCH_PATCH, [])}
+        kept = [(id, JSONUtils.apply(item, patches[id]) if id in patches else item)
+                for id, item in zip(ids, a) if id not in deleted]
+        if JSONUtils.PATCH_ORDER in patch:
+            order = {JSONUtils.__get_id(id): n for n, id in enumerate(patch[JSONUtils.PATCH_ORDER])}
+            kept.sort(key=lambda kept_item: order[kept_item[0]])
+        inserted = {j: item for j, item in patch.get(JSONUtils.PATCH_INSERT, [])}
+        res = []
+        kept_items = iter(kept)
+        for j in range(len(kept) + len(inserted)):
+            res.append(inserted[j] if j in inserted else next(kept_items)[1])
+        return res
@@ -0,0 +1,139 @@
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from na3x.cfg import get_env_params
+from na3x.db.connect import MongoDb
+from na3x.db.data import CRUD, BulkWriter
+from na3x.validation.validator import Check, Validator
+
+
+class Sweep:
+    """
+    Validates all documents of collection: documents are read in chunks ordered by key, chunks are validated by
+    Validator.validate_batch (lookups are prefetched) on parallel workers, violations are written to results collection
+	{
+		"db": "db_scrum_api",
+		"collection": "sprint.assignments", <collection to validate>
+		"match": {...}, <optional: a query that matches the documents to validate>
+		"key": "key", <unique key field, documents are processed in key order>
+		"results": "sprint.assignments.violations", <collection for violations and progress>
+		"id": "assignments", <optional: sweep id (default - collection), violations and progress are stored per sweep>
+		"chunk": 500, <optional: number of documents validated in one batch>
+		"workers": 4, <optional: number of chunks validated concurrently (default - 1)>
+		"resume": true, <optional: continue after last processed key of previous run (default - false)>
+		"validation": {"checks": {...}} <Validator configuration>
+	}
+    Violation document: {"type": "violation", "sweep": <sweep id>, "key": <document key>, "check": <check>,
+    "index": <violation index within check>, "severity": ..., "message": ...}
+    """
+    __CFG_KEY_DB = 'db'
+    __CFG_KEY_COLLECTION = 'collection'
+    __CFG_KEY_MATCH = 'match'
+    __CFG_KEY_KEY = 'key'
+    __CFG_KEY_RESULTS = 'results'
+    __CFG_KEY_ID = 'id'
+    __CFG_KEY_CHUNK = 'chunk'
+    __CFG_KEY_WORKERS = 'workers'
+    __CFG_KEY_RESUME = 'resume'
+    __CFG_KEY_VALIDATION = 'validation'
+
+    KEY_TYPE = 'type'
+    KEY_SWEEP = 'sweep'
+    KEY_KEY = 'key'
+    KEY_CHECK = 'check'
+    KEY_INDEX = 'index'
+    KEY_LAST_KEY = 'last_key'
+    TYPE_VIOLATION = 'violation'
+    TYPE_PROGRESS = 'progress'
+
+    STAT_DOCUMENTS = 'documents'
+    STAT_VIOLATIONS = 'violations'
+    STAT_SEVERITY = 'severity'
+    STAT_CHECK = 'check'
+    STAT_TIME = 'time'
+    STAT_THROUGHPUT = 'documents_per_second'
+    STAT_LAST_KEY = 'last_key'
+
+    def __init__(self, cfg):
+        """
+        Constructor
+        :param cfg: sweep configuration
+        """
+        self.__logger = logging.getLogger(__class__.__name__)
+        self.__cfg = cfg
+        self.__db = MongoDb(get_env_params()[cfg[Sweep.__CFG_KEY_DB]]).connection
+        self.__collection = cfg[Sweep.__CFG_KEY_COLLECTION]
+        self.__match = cfg[Sweep.__CFG_KEY_MATCH] if Sweep.__CFG_KEY_MATCH in cfg else None
+        self.__key = cfg[Sweep.__CFG_KEY_KEY]
+        self.__results = cfg[Sweep.__CFG_KEY_RESULTS]
+        self.__id = cfg[Sweep.__CFG_KEY_ID] if Sweep.__CFG_KEY_ID in cfg else self.__collection
+        self.__chunk = int(cfg.get(Sweep.__CFG_KEY_CHUNK, 500))
+        self.__workers = max(int(cfg.get(Sweep.__CFG_KEY_WORKERS, 1)), 1)
+        self.__validator = Validator(cfg[Sweep.__CFG_KEY_VALIDATION])
+
+    def __get_progress_match(self):
+        return {Sweep.KEY_TYPE: Sweep.TYPE_PROGRESS, Sweep.KEY_SWEEP: self.__id}
+
+    def __validate_chunk(self, documents):
+        return documents, self.__validator.validate_batch(documents, False, True)
+
+    def __save_chunk(self, writer, documents, results, summary):
+        for document, res in zip(documents, results):
+            if not res:
+                continue
+            for check, violations in res.items():
+                for i, violation in enumerate(violations):
+                    match = {Sweep.KEY_TYPE: Sweep.TYPE_VIOLATION, Sweep.KEY_SWEEP: self.__id,
+                             Sweep.KEY_KEY: document[self.__key], Sweep.KEY_CHECK: check, Sweep.KEY_INDEX: i}
+                    violation_doc = dict(violation)
+                    violation_doc.update(match)
+                    writer.update(violation_doc, match, upsert=True)
+                    severity = violation.get(Check.CFG_KEY_VIOLATION_SEVERITY)
+                    summary[Sweep.STAT_VIOLATIONS] += 1
+                    summary[Sweep.STAT_SEVERITY][severity] = summary[Sweep.STAT_SEVERITY].get(severity, 0) + 1
+                    summary[Sweep.STAT_CHECK][check] = summary[Sweep.STAT_CHECK].get(check, 0) + 1
+        summary[Sweep.STAT_DOCUMENTS] += len(documents)
+        summary[Sweep.STAT_LAST_KEY] = documents[-1][self.__key]
+        writer.update({Sweep.KEY_LAST_KEY: summary[Sweep.STAT_LAST_KEY]}, self.__get_progress_match(), upsert=True)
+        writer.flush()
+
+    def perform(self):
+        """
+        Performs validation of collection
+        :return: summary {'documents': <count>, 'violations': <count>, 'severity': {<severity>: <count>},
+        'check': {<check>: <count>}, 'time': <seconds>, 'documents_per_second': ..., 'last_key': ...}
+        """
+        started_at = time.monotonic()
+        summary = {Sweep.STAT_DOCUMENTS: 0, Sweep.STAT_VIOLATIONS: 0, Sweep.STAT_SEVERITY: {}, Sweep.STAT_CHECK: {},
+                   Sweep.STAT_LAST_KEY: None}
+        last_key = None
+        if self.__cfg.get(Sweep.__CFG_KEY_RESUME, False):
+            progress = CRUD.read_single(self.__db, self.__results, self.__get_progress_match())
+            last_key = progress[Sweep.KEY_LAST_KEY] if progress else None
+            self.__logger.info('{}: resume after {}'.format(self.__id, last_key))
+        else:
+            CRUD.delete_multi(self.__db, self.__results, {Sweep.KEY_SWEEP: self.__id})
+        writer = BulkWriter(self.__db, self.__results, batch_size=max(self.__chunk, 500))
+        pending = deque()
+        with self.__validator, ThreadPoolExecutor(max_workers=self.__workers) as executor:
+            while True:
+                documents = CRUD.read_chunk(self.__db, self.__collection, self.__key, last_key, self.__chunk,
+                                            self.__match)
+                if len(documents) > 0:
+                    last_key = documents[-1][self.__key]
+                    pending.append(executor.submit(self.__validate_chunk, documents))
+                # results are saved in key order, so progress never skips unsaved chunks
+                while pending and (len(pending) >= self.__workers or len(documents) == 0 or pending[0].done()):
+                    self.__save_chunk(writer, *pending.popleft().result(), summary)
+                    self.__logger.info('{}: {:d} documents validated, {:d} violations'.format(
+                        self.__id, summary[Sweep.STAT_DOCUMENTS], summary[Sweep.STAT_VIOLATIONS]))
+                if len(documents) < self.__chunk and not pending:
+                    break
+        summary[Sweep.STAT_TIME] = time.monotonic() - started_at
+        summary[Sweep.STAT_THROUGHPUT] = summary[Sweep.STAT_DOCUMENTS] / summary[Sweep.STAT_TIME] \
+            if summary[Sweep.STAT_TIME] else 0.0
+        self.__logger.info('{}: {:d} documents, {:d} violations {} in {:.2f}s ({:.1f} documents/s)'.format(
+            self.__id, summary[Sweep.STAT_DOCUMENTS], summary[Sweep.STAT_VIOLATIONS], summary[Sweep.STAT_SEVERITY],
+            summary[Sweep.STAT_TIME], summary[Sweep.STAT_THROUGHPUT]))
+        return summary
@@ -1,6 +1,14 @@
+import contextvars
+import copy
+import itertools
+import json
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from na3x.utils.aggregator import Aggregator
 from na3x.utils.object import obj_for_name
+from na3x.db.aggregates import MaterializedAggregates
 from na3x.db.data import Accessor, AccessParams
 from na3x.utils.converter import Converter
 
@@ -8,12 +16,79 @@ from na3x.utils.converter import Converter
 class Validator:
     """
     Validates input object according configuration of validation checks
+	"checks": {
+		...
+	},
+	"memo": true, <optional: memoize getters results within validation run (default - true), see GetterCache>
+	"memo.ttl": 60, <optional: keep memoized results across validation runs for ttl seconds>
+	"checks.concurrency": 4 <optional: number of checks performed concurrently (default - 1)>
     """
     __CFG_KEY_CHECKS = 'checks'
+    __CFG_KEY_CHECKS_CONCURRENCY = 'checks.concurrency'
+    __CFG_KEY_MEMO = 'memo'
+    __CFG_KEY_MEMO_TTL = 'memo.ttl'
 
-    def __init__(self, cfg):
+    def __init__(self, cfg, executor=None):
+        """
+        Constructor
+        :param cfg: validator configuration
+        :param executor: executor performing checks if checks.concurrency is set (default - thread pool of validator,
+        it is created on first concurrent validation, reused by later ones and shut down by close)
+        """
         self.__cfg = cfg
         self.__logger = logging.getLogger(__class__.__name__)
+        self.__checks = [(check, Check(self.__cfg[Validator.__CFG_KEY_CHECKS][check]))
+                         for check in self.__cfg[Validator.__CFG_KEY_CHECKS]]
+        self.__concurrency = max(int(cfg.get(Validator.__CFG_KEY_CHECKS_CONCURRENCY, 1)), 1)
+        self.__executor = executor
+        self.__is_own_executor = executor is None
+        self.__executor_lock = threading.Lock()
+        self.__is_memo = bool(cfg[Validator.__CFG_KEY_MEMO]) if Validator.__CFG_KEY_MEMO in cfg else True
+        self.__memo_ttl = cfg[Validator.__CFG_KEY_MEMO_TTL] if Validator.__CFG_KEY_MEMO_TTL in cfg else None
+        self.__memo = GetterCache(self.__memo_ttl) if self.__is_memo and self.__memo_ttl else None
+        self.__last_memo = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Shuts down thread pool of validator, executor passed to constructor is left to the caller
+        """
+        with self.__executor_lock:
+            if self.__is_own_executor and self.__executor:
+                self.__executor.shutdown()
+                self.__executor = None
+
+    @property
+    def memo(self):
+        """
+        Returns getters memo of last validation run
+        :return: GetterCache or None
+        """
+        return self.__last_memo
+
+    def __run(self, func):
+        """
+        Performs validation run with getters memo bound to current context
+        :param func: validation function
+        :return: func result
+        """
+        if not self.__is_memo or GetterCache.current():
+            return func()
+        memo = self.__memo if self.__memo else GetterCache()
+        self.__last_memo = memo
+        GetterCache.bind(memo)
+        try:
+            return func()
+        finally:
+            GetterCache.bind(None)
+            stats = memo.stats
+            self.__logger.info('getters memo: {:d} hits, {:d} misses, hit ratio {:.2f}'.format(
+                stats[GetterCache.STAT_HIT], stats[GetterCache.STAT_MISS], stats[GetterCache.STAT_HIT_RATIO]))
 
     def validate(self, obj_to_validate, is_substitute=True):
         """
@@ -22,16 +97,421 @@ class Validator:
         :param is_substitute:
         :return: list of validation messages or None
         """
+        return self.__run(lambda: self.__validate([obj_to_validate], is_substitute)[0])
+
+    def __get_executor(self):
+        with self.__executor_lock:
+            if not self.__executor:
+                self.__executor = ThreadPoolExecutor(max_workers=self.__concurrency)
+            return self.__executor
+
+    def __perform_check(self, check, obj_to_validate, is_substitute):
+        self.__logger.info('Performing {} validation against {}'.format(check[0], obj_to_validate))
+        return check[1].validate(obj_to_validate, is_substitute)
+
+    def __validate(self, objs_to_validate, is_substitute, is_by_check=False):
+        """
+        Performs checks of objects, checks are independent and are performed concurrently if checks.concurrency is set,
+        results are collected in order of objects and checks
+        :param objs_to_validate: list of objects
+        :param is_substitute:
+        :param is_by_check: validation messages are grouped by check
+        :return: list of validation results
+        """
+        if self.__concurrency > 1 and len(self.__checks) * len(objs_to_validate) > 1:
+            executor = self.__get_executor()
+            futures = [[executor.submit(contextvars.copy_context().run, self.__perform_check, check,
+                                        obj_to_validate, is_substitute) for check in self.__checks]
+                       for obj_to_validate in objs_to_validate]
+            checks_res = [[future.result() for future in obj_futures] for obj_futures in futures]
+        else:
+            checks_res = [[self.__perform_check(check, obj_to_validate, is_substitute) for check in self.__checks]
+                          for obj_to_validate in objs_to_validate]
         res = []
-        for check in self.__cfg[Validator.__CFG_KEY_CHECKS]:
-            self.__logger.info('Performing {} validation against {}'.format(check, obj_to_validate))
-            check_res = Check(self.__cfg[Validator.__CFG_KEY_CHECKS][check]).validate(obj_to_validate, is_substitute)
-            if check_res:
-                if type(check_res) == dict:
-                    res.append(check_res)
-                else:
-                    res.extend(check_res)
-        return None if len(res) == 0 else res
+        for obj_checks_res in checks_res:
+            obj_res = {} if is_by_check else []
+            for check, check_res in zip(self.__checks, obj_checks_res):
+                if check_res:
+                    check_res = [check_res] if type(check_res) == dict else check_res
+                    if is_by_check:
+                        obj_res.update({check[0]: check_res})
+                    else:
+                        obj_res.extend(check_res)
+            res.append(None if len(obj_res) == 0 else obj_res)
+        return res
+
+    def validate_batch(self, objs_to_validate, is_substitute=True, is_by_check=False):
+        """
+        Performs validation of list of objects, documents looked up by checks (see extract/aggregate) are prefetched with
+        single $in query per db, collection and match fields
+        :param objs_to_validate: list of objects
+        :param is_substitute:
+        :param is_by_check: validation messages are grouped by check - {<check>: [<message>, ...]}
+        :return: list of validation results (see validate) in order of objects
+        """
+        prefetch = Prefetch()
+        for lookup_cfg in self.__get_lookups():
+            prefetch.load(lookup_cfg, objs_to_validate)
+        Prefetch.bind(prefetch)
+        try:
+            return self.__run(lambda: self.__validate(objs_to_validate, is_substitute, is_by_check))
+        finally:
+            Prefetch.bind(None)
+
+    def __get_lookups(self):
+        """
+        Collects lookup configurations (db, collection, match fields) of getters params
+        :return: list of lookup configurations
+        """
+        lookups = []
+
+        def collect(node):
+            if isinstance(node, dict):
+                if node.get('materialized'):
+                    return  # aggregate is read from MaterializedAggregates
+                if Prefetch.is_lookup(node):
+                    lookups.append(node)
+                for value in node.values():
+                    collect(value)
+            elif isinstance(node, list):
+                for value in node:
+                    collect(value)
+
+        collect(self.__cfg[Validator.__CFG_KEY_CHECKS])
+        return lookups
+
+
+class Prefetch:
+    """
+    In-memory index of documents prefetched for batch validation, lookups with prefetched db, collection and match
+    fields are served from the index instead of MongoDB
+    """
+    __current = contextvars.ContextVar('na3x_validation_prefetch', default=None)
+
+    @staticmethod
+    def bind(prefetch):
+        """
+        Binds prefetched documents to current context
+        :param prefetch: Prefetch or None
+        """
+        Prefetch.__current.set(prefetch)
+
+    @staticmethod
+    def current():
+        """
+        Returns prefetched documents bound to current context
+        :return: Prefetch or None
+        """
+        return Prefetch.__current.get()
+
+    @staticmethod
+    def is_lookup(cfg):
+        """
+        Checks if getter params describe lookup by match fields
+        :param cfg: getter params
+        :return: True if params have db, collection and list of match fields
+        """
+        return AccessParams.KEY_DB in cfg and AccessParams.KEY_COLLECTION in cfg and \
+               isinstance(cfg.get(AccessParams.KEY_MATCH_PARAMS), list)
+
+    @staticmethod
+    def __get_group(cfg):
+        return cfg[AccessParams.KEY_DB], cfg[AccessParams.KEY_COLLECTION], tuple(cfg[AccessParams.KEY_MATCH_PARAMS])
+
+    @staticmethod
+    def __get_candidates(value):
+        # array field matches any of its elements (as MongoDB equality match does)
+        if isinstance(value, list):
+            return [item for item in value if not isinstance(item, (dict, list))]
+        return [value] if not isinstance(value, dict) else []
+
+    def __init__(self):
+        self.__groups = {}
+        self.__overlays = {}
+
+    def load(self, cfg, objs):
+        """
+        Prefetches documents matching objects
+        :param cfg: lookup configuration (db, collection, match fields)
+        :param objs: list of objects
+        """
+        group = Prefetch.__get_group(cfg)
+        if group in self.__groups:
+            return
+        fields = group[2]
+        values = {field: set() for field in fields}
+        for obj in objs:
+            if all(field in obj and not isinstance(obj[field], (dict, list)) for field in fields):
+                for field in fields:
+                    values[field].add(obj[field])
+        index = {}
+        if len(fields) > 0 and len(values[fields[0]]) > 0:
+            docs = Accessor.factory(group[0]).get(
+                {AccessParams.KEY_MATCH_PARAMS: {field: {'$in': list(values[field])} for field in fields},
+                 AccessParams.KEY_COLLECTION: group[1],
+                 AccessParams.KEY_TYPE: AccessParams.TYPE_MULTI})
+            for doc in docs:
+                keys = set(itertools.product(*[Prefetch.__get_candidates(doc.get(field)) for field in fields]))
+                for key in keys:
+                    index.setdefault(key, []).append(doc)
+        self.__groups[group] = (values, index)
+
+    def lookup(self, input, cfg):
+        """
+        Looks up prefetched documents
+        :param input: validated object
+        :param cfg: lookup configuration (db, collection, match fields, type)
+        :return: (True, single document or list of documents) or (False, None) if lookup is not prefetched
+        """
+        group = Prefetch.__get_group(cfg)
+        if group not in self.__groups:
+            return False, None
+        values, index = self.__groups[group]
+        fields = group[2]
+        try:
+            if not all(field in input and input[field] in values[field] for field in fields):
+                return False, None
+        except TypeError:  # unhashable value
+            return False, None
+        docs = index.get(tuple(input[field] for field in fields), [])
+        target_type = cfg[AccessParams.KEY_TYPE] if AccessParams.KEY_TYPE in cfg else AccessParams.TYPE_MULTI
+        if target_type == AccessParams.TYPE_SINGLE:
+            return True, copy.deepcopy(docs[0]) if len(docs) > 0 else None
+        return True, copy.deepcopy(docs)
+
+    def overlay(self, input, cfg, fields):
+        """
+        Returns what-if overlay over prefetched documents, overlay is shared by objects with the same match values
+        :param input: validated object
+        :param cfg: lookup configuration (db, collection, match fields)
+        :param fields: fields identifying substituted row (see WhatIf)
+        :return: (True, WhatIf) or (False, None) if lookup is not prefetched
+        """
+        group = Prefetch.__get_group(cfg)
+        if group not in self.__groups:
+            return False, None
+        values, index = self.__groups[group]
+        try:
+            if not all(field in input and input[field] in values[field] for field in group[2]):
+                return False, None
+        except TypeError:  # unhashable value
+            return False, None
+        key = tuple(input[field] for field in group[2])
+        overlays = self.__overlays.setdefault((group, tuple(fields)), {})
+        if key not in overlays:
+            overlays[key] = WhatIf(index.get(key, []), fields)
+        return True, overlays[key]
+
+
+class WhatIf:
+    """
+    What-if overlay of dataset: substituted and appended rows are layered over base rows without copying or mutating
+    them, rows are indexed by fields identifying row. Overlays are stacked - substitute() returns new overlay on top of
+    current one, so several hypothetical changes can be combined while base dataset is shared
+    """
+    def __init__(self, rows, fields):
+        """
+        Constructor
+        :param rows: base dataset (list of objects), it is not copied and should not be changed while overlay is used
+        :param fields: fields identifying row
+        """
+        self.__fields = tuple(fields)
+        self.__parent = None
+        self.__rows = rows
+        self.__changes = {}  # position: row
+        self.__index = {}  # row key: position
+        self.__size = len(rows)
+        for i, row in enumerate(rows):
+            try:
+                self.__index.setdefault(self.__get_key(row), i)
+            except TypeError:  # unhashable value, row is looked up by scan
+                self.__index = None
+                break
+
+    def __get_key(self, obj):
+        return tuple(obj.get(field) for field in self.__fields)
+
+    def __find(self, obj):
+        """
+        Returns position of first row matching object
+        :param obj: object
+        :return: position or None
+        """
+        layer = self
+        try:
+            key = self.__get_key(obj)
+            while layer.__parent is not None:
+                if key in layer.__index:
+                    return layer.__index[key]
+                layer = layer.__parent
+            if layer.__index is not None:
+                return layer.__index.get(key)
+        except TypeError:  # unhashable value
+            pass
+        for i, row in enumerate(self):
+            if self.__get_key(row) == self.__get_key(obj):
+                return i
+        return None
+
+    def __get_changes(self):
+        layers = []
+        layer = self
+        while layer.__parent is not None:
+            layers.append(layer)
+            layer = layer.__parent
+        if len(layers) == 1:
+            return layers[0].__changes
+        changes = {}
+        for layer in reversed(layers):
+            changes.update(layer.__changes)
+        return changes
+
+    def __root(self):
+        layer = self
+        while layer.__parent is not None:
+            layer = layer.__parent
+        return layer
+
+    def get(self, obj):
+        """
+        Returns row identified by object fields
+        :param obj: object
+        :return: row or None
+        """
+        i = self.__find(obj)
+        if i is None:
+            return None
+        layer = self
+        while layer.__parent is not None:
+            if i in layer.__changes:
+                return layer.__changes[i]
+            layer = layer.__parent
+        return layer.__rows[i]
+
+    def substitute(self, obj, field):
+        """
+        Substitutes field value of row identified by object fields, object is appended if there is no such row
+        :param obj: object
+        :param field: substituted field
+        :return: new WhatIf overlay
+        """
+        layer = WhatIf.__new__(WhatIf)
+        layer.__fields = self.__fields
+        layer.__parent = self
+        layer.__rows = None
+        layer.__changes = {}
+        layer.__index = {}
+        layer.__size = self.__size
+        i = self.__find(obj)
+        if i is None:
+            layer.__changes[layer.__size] = obj
+            try:
+                layer.__index[self.__get_key(obj)] = layer.__size
+            except TypeError:  # unhashable value, row is looked up by scan
+                pass
+            layer.__size += 1
+        else:
+            row = dict(self.get(obj))
+            row[field] = obj[field]
+            layer.__changes[i] = row
+        return layer
+
+    def __len__(self):
+        return self.__size
+
+    def __iter__(self):
+        changes = self.__get_changes()
+        rows = self.__root().__rows
+        for i in range(self.__size):
+            yield changes[i] if i in changes else rows[i]
+
+
+class GetterCache:
+    """
+    Memoizes results of getter functions (see @getter) keyed by function, params and input fields used by the getter,
+    memoized results are dropped after any write performed through Accessor
+    """
+    STAT_HIT = 'hit'
+    STAT_MISS = 'miss'
+    STAT_HIT_RATIO = 'hit_ratio'
+
+    __current = contextvars.ContextVar('na3x_getter_cache', default=None)
+
+    @staticmethod
+    def bind(cache):
+        """
+        Binds memo to current context, getters called in the context are memoized
+        :param cache: GetterCache or None
+        """
+        GetterCache.__current.set(cache)
+
+    @staticmethod
+    def current():
+        """
+        Returns memo bound to current context
+        :return: GetterCache or None
+        """
+        return GetterCache.__current.get()
+
+    @staticmethod
+    def key(func, input, params, input_fields=None):
+        """
+        Returns memo key
+        :param func: getter function
+        :param input: validated object
+        :param params: getter params
+        :param input_fields: input fields used by getter (None - whole input)
+        :return: key
+        """
+        used_input = input if input_fields is None else {field: input.get(field) for field in input_fields}
+        return json.dumps(['{}.{}'.format(func.__module__, func.__qualname__), params, used_input],
+                          sort_keys=True, default=str)
+
+    def __init__(self, ttl=None):
+        """
+        Constructor
+        :param ttl: time to live of memoized results, seconds (None - not limited)
+        """
+        self.__ttl = ttl
+        self.__entries = {}
+        self.__writes = Accessor.writes()
+        self.__lock = threading.Lock()
+        self.__stats = {GetterCache.STAT_HIT: 0, GetterCache.STAT_MISS: 0}
+
+    def get(self, key, func):
+        """
+        Returns memoized result or calls getter
+        :param key: memo key (see key)
+        :param func: function calling getter
+        :return: getter result (copy)
+        """
+        with self.__lock:
+            writes = Accessor.writes()
+            if writes != self.__writes:
+                self.__entries = {}
+                self.__writes = writes
+            entry = self.__entries.get(key)
+            if entry and (not self.__ttl or time.monotonic() - entry[1] < self.__ttl):
+                self.__stats[GetterCache.STAT_HIT] += 1
+                return copy.deepcopy(entry[0])
+            self.__stats[GetterCache.STAT_MISS] += 1
+        res = func()
+        with self.__lock:
+            if writes == self.__writes:
+                self.__entries[key] = (copy.deepcopy(res), time.monotonic())
+        return res
+
+    @property
+    def stats(self):
+        """
+        Returns memo statistics
+        :return: {STAT_HIT: <count>, STAT_MISS: <count>, STAT_HIT_RATIO: <hits / calls>}
+        """
+        with self.__lock:
+            calls = self.__stats[GetterCache.STAT_HIT] + self.__stats[GetterCache.STAT_MISS]
+            return {GetterCache.STAT_HIT: self.__stats[GetterCache.STAT_HIT],
+                    GetterCache.STAT_MISS: self.__stats[GetterCache.STAT_MISS],
+                    GetterCache.STAT_HIT_RATIO: self.__stats[GetterCache.STAT_HIT] / calls if calls else 0.0}
 
 
 class Check:
@@ -80,29 +560,30 @@ class Check:
     __CFG_KEY_DEFAULT_TYPE = 'type'
 
     def __init__(self, cfg):
+        """
+        Constructor, resolves check functions
+        :param cfg: check configuration
+        """
         self.__cfg = cfg
         self.__logger = logging.getLogger(__class__.__name__)
+        self.__constraint = Check.__compile_getter(self.__cfg[Check.__CFG_KEY_CONSTRAINT])
+        self.__to_validate = Check.__compile_getter(self.__cfg[Check.__CFG_KEY_TO_VALIDATE])
+        compare_cfg = self.__cfg[Check.__CFG_KEY_COMPARE]
+        self.__compare_func = obj_for_name(compare_cfg[Check.__CFG_KEY_FUNC])
+        self.__violation_cfg = compare_cfg[Check.__CFG_KEY_VIOLATION]
+
+    @staticmethod
+    def __compile_getter(cfg):
+        return obj_for_name(cfg[Check.__CFG_KEY_FUNC]), \
+               cfg[Check.__CFG_KEY_FUNC_PARAMS] if Check.__CFG_KEY_FUNC_PARAMS in cfg else {}, cfg
 
     def __compare(self, to_validate, constraint):
-        cfg = self.__cfg[Check.__CFG_KEY_COMPARE]
-        func = cfg[Check.__CFG_KEY_FUNC]
-        return obj_for_name(func)(to_validate, constraint, cfg[Check.__CFG_KEY_VIOLATION])
-
-    def __get_constraint(self, obj_to_validate):
-        cfg = self.__cfg[Check.__CFG_KEY_CONSTRAINT]
-        func = cfg[Check.__CFG_KEY_FUNC]
-        args = cfg[Check.__CFG_KEY_FUNC_PARAMS] if Check.__CFG_KEY_FUNC_PARAMS in cfg else {}
-        res = obj_for_name(func)(obj_to_validate, args)
-        if not res:
-            return self.__get_default_value(cfg)
-        else:
-            return res
+        # comparators format violation message in place, config is not shared between validations
+        return self.__compare_func(to_validate, constraint, dict(self.__violation_cfg))
 
-    def __get_to_validate(self, obj_to_validate):
-        cfg = self.__cfg[Check.__CFG_KEY_TO_VALIDATE]
-        func = cfg[Check.__CFG_KEY_FUNC]
-        params = cfg[Check.__CFG_KEY_FUNC_PARAMS] if Check.__CFG_KEY_FUNC_PARAMS in cfg else {}
-        res = obj_for_name(func)(obj_to_validate, params)
+    def __get_value(self, getter, obj_to_validate):
+        func, params, cfg = getter
+        res = func(obj_to_validate, params)
         if not res:
             return self.__get_default_value(cfg)
         else:
@@ -122,22 +603,45 @@ class Check:
         :param is_substitute: will be used for what-if in the future
         :return: validation result if violated or None
         """
-        constraint = self.__get_constraint(input)
-        to_validate = self.__get_to_validate(input)
+        constraint = self.__get_value(self.__constraint, input)
+        to_validate = self.__get_value(self.__to_validate, input)
         return self.__compare(to_validate, constraint)
 
 
-def getter(func):
+def getter(func=None, input_fields=None):
     """
-    @getter decorator function
+    @getter decorator function, getter results are memoized within validation run (see GetterCache)
     :param func: getter function
+    :param input_fields: function returning input fields used by getter for given params (default - whole input is used)
+    e.g. @getter(input_fields=lambda params: [params['field']])
     :return: getter function result
     """
+    if func is None:
+        return lambda func: getter(func, input_fields)
+
     def getter_wrapper(input, params):
-        return func(input, **params)
+        memo = GetterCache.current()
+        if not memo:
+            return func(input, **params)
+        return memo.get(GetterCache.key(func, input, params, input_fields(params) if input_fields else None),
+                        lambda: func(input, **params))
     return getter_wrapper
 
 
+def __get_extract_fields(params):
+    return list(params[AccessParams.KEY_MATCH_PARAMS])
+
+
+def __get_aggregate_fields(params):
+    # substituted/appended input row contributes its substitute and aggregated fields
+    fields = set(params['extract'][AccessParams.KEY_MATCH_PARAMS])
+    if 'substitute' in params:
+        fields.update(params['substitute'][AccessParams.KEY_MATCH_PARAMS])
+        fields.add(params['substitute']['field'])
+    fields.add(params['aggregate']['field'])
+    return sorted(fields)
+
+
 def comparator(func):
     """
     @comparator decorator function
@@ -150,6 +654,11 @@ def comparator(func):
 
 
 def __extract(input, cfg):
+    prefetch = Prefetch.current()
+    if prefetch:
+        is_prefetched, res = prefetch.lookup(input, cfg)
+        if is_prefetched:
+            return res
     filter = {}
     filter_params = cfg[AccessParams.KEY_MATCH_PARAMS]
     for param in filter_params:
@@ -160,24 +669,22 @@ def __extract(input, cfg):
          AccessParams.KEY_TYPE: cfg[AccessParams.KEY_TYPE]})
 
 
-def __substitute(input, dataset, cfg):
+def __substitute(input, extract_cfg, cfg):
+    """
+    Returns what-if overlay of extracted dataset with input substitution, extracted dataset is not changed
+    :return: WhatIf
+    """
     CFG_KEY_FIELD = 'field'
 
-    filter_params = cfg[AccessParams.KEY_MATCH_PARAMS]
-    for row in dataset:
-        is_substitute_target = True
-        for param in filter_params:
-            if row[param] != input[param]:
-                is_substitute_target = False
-                break
-        if is_substitute_target:
-            row[cfg[CFG_KEY_FIELD]] = input[cfg[CFG_KEY_FIELD]]
-            return dataset
-    dataset.append(input)
-    return dataset
+    fields = cfg[AccessParams.KEY_MATCH_PARAMS]
+    prefetch = Prefetch.current()
+    is_prefetched, dataset = prefetch.overlay(input, extract_cfg, fields) if prefetch else (False, None)
+    if not is_prefetched:
+        dataset = WhatIf(__extract(input, extract_cfg), fields)
+    return dataset.substitute(input, cfg[CFG_KEY_FIELD])
 
 
-@getter
+@getter(input_fields=lambda params: [])
 def const(input, **params):
     """
     Return constant value
@@ -190,7 +697,7 @@ def const(input, **params):
     return params.get(PARAM_CONSTANT_VALUE)
 
 
-@getter
+@getter(input_fields=lambda params: [params.get('field')])
 def return_input(input, **params):
     """
     Returns input value
@@ -202,7 +709,7 @@ def return_input(input, **params):
 
     return input[params.get(PARAM_FIELD)]
 
-@getter
+@getter(input_fields=lambda params: __get_extract_fields(params))
 def extract(input, **params):
     """
     Extract field value from document
@@ -217,7 +724,45 @@ def extract(input, **params):
     return __extract(input, params)[params.get(EXTRACT_FIELD)]
 
 
-@getter
+def __aggregate_materialized(input, extract_cfg, substitute_cfg, field, func):
+    """
+    Reads pre-computed aggregate (see MaterializedAggregates), substitution is applied as delta
+    :return: (True, aggregated value) or (False, None) if aggregate is not declared or should be calculated by rescan
+    """
+    CFG_KEY_FIELD = 'field'
+
+    group_by = extract_cfg[AccessParams.KEY_MATCH_PARAMS]
+    group = {key: input[key] for key in group_by}
+    accessor = Accessor.factory(extract_cfg[AccessParams.KEY_DB])
+    aggregates_collection = MaterializedAggregates.collection_name(extract_cfg[AccessParams.KEY_COLLECTION])
+    aggregates = accessor.get({AccessParams.KEY_MATCH_PARAMS: MaterializedAggregates.value_match(group_by, field, group),
+                               AccessParams.KEY_COLLECTION: aggregates_collection,
+                               AccessParams.KEY_TYPE: AccessParams.TYPE_SINGLE})
+    if not aggregates:
+        if not accessor.get({AccessParams.KEY_MATCH_PARAMS: MaterializedAggregates.declaration_match(group_by, field),
+                             AccessParams.KEY_COLLECTION: aggregates_collection,
+                             AccessParams.KEY_TYPE: AccessParams.TYPE_SINGLE}):
+            return False, None
+        if not substitute_cfg:
+            return True, None  # empty group
+        aggregates = {MaterializedAggregates.FUNC_SUM: 0, MaterializedAggregates.FUNC_COUNT: 0,
+                      MaterializedAggregates.FUNC_MIN: None, MaterializedAggregates.FUNC_MAX: None}
+    if substitute_cfg:
+        row_match = dict(group)
+        row_match.update({key: input[key] for key in substitute_cfg[AccessParams.KEY_MATCH_PARAMS]})
+        row = accessor.get({AccessParams.KEY_MATCH_PARAMS: row_match,
+                            AccessParams.KEY_COLLECTION: extract_cfg[AccessParams.KEY_COLLECTION],
+                            AccessParams.KEY_TYPE: AccessParams.TYPE_SINGLE})
+        if not row:
+            aggregates = MaterializedAggregates.apply_delta(aggregates, added=input.get(field))
+        elif substitute_cfg[CFG_KEY_FIELD] == field and row.get(field) != input.get(field):
+            aggregates = MaterializedAggregates.apply_delta(aggregates, row.get(field), input.get(field))
+        if not aggregates:
+            return False, None
+    return True, MaterializedAggregates.value(aggregates, func)
+
+
+@getter(input_fields=lambda params: __get_aggregate_fields(params))
 def aggregate(input, **params):
     """
     Returns aggregate
@@ -228,15 +773,23 @@ def aggregate(input, **params):
     PARAM_CFG_EXTRACT = 'extract'
     PARAM_CFG_SUBSTITUTE = 'substitute'
     PARAM_CFG_AGGREGATE = 'aggregate'
+    PARAM_CFG_MATERIALIZED = 'materialized'
     AGGR_FIELD = 'field'
     AGGR_FUNC = 'func'
 
-    extract_params = params.get(PARAM_CFG_EXTRACT)
+    cfg = params.get(PARAM_CFG_AGGREGATE)
+    if params.get(PARAM_CFG_MATERIALIZED) and cfg[AGGR_FUNC] in MaterializedAggregates.FUNCS:
+        is_materialized, res = __aggregate_materialized(input, params.get(PARAM_CFG_EXTRACT),
+                                                        params.get(PARAM_CFG_SUBSTITUTE), cfg[AGGR_FIELD],
+                                                        cfg[AGGR_FUNC])
+        if is_materialized:
+            return res
+    extract_params = dict(params.get(PARAM_CFG_EXTRACT))
     extract_params.update({AccessParams.KEY_TYPE: AccessParams.TYPE_MULTI})
-    dataset = __extract(input, extract_params)
     if PARAM_CFG_SUBSTITUTE in params:
-        dataset = __substitute(input, dataset, params.get(PARAM_CFG_SUBSTITUTE))
-    cfg = params.get(PARAM_CFG_AGGREGATE)
+        dataset = __substitute(input, extract_params, params.get(PARAM_CFG_SUBSTITUTE))
+    else:
+        dataset = __extract(input, extract_params)
     res = Aggregator.agg_single_func(dataset, cfg[AGGR_FIELD], cfg[AGGR_FUNC])
     return res
 
@@ -10,10 +10,15 @@ setup(name='na3x',
       classifiers=[
           'Development Status :: 3 - Alpha',
           'Environment :: Console',
-          'Programming Language :: Python :: 3.6'],
+          'Programming Language :: Python :: 3.7',
+          'Programming Language :: Python :: 3.8',
+          'Programming Language :: Python :: 3.9',
+          'Programming Language :: Python :: 3.10',
+          'Programming Language :: Python :: 3.11'],
       packages=find_packages(),
       package_data = {'na3x': ['.LICENSE']},
       package_dir={'.':'na3x'},
-      python_requires= '~=3.6',
-      install_requires=['pandas', 'jsonschema', 'requests', 'pymongo', 'jsondiff', 'flask']
+      python_requires= '>=3.7',
+      install_requires=['pandas', 'jsonschema', 'requests', 'pymongo', 'jsondiff', 'flask'],
+      extras_require={'streaming': ['ijson>=3.1'], 'fast': ['orjson'], 'test': ['pytest', 'mongomock']}
       )
\ No newline at end of file
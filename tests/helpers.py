@@ -0,0 +1,119 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import mongomock
+import requests
+from na3x.cfg import na3x_cfg, NA3X_DB, NA3X_TRIGGERS, NA3X_ENV
+
+
+class MongoTestCase(unittest.TestCase):
+    """
+    Test case with na3x configuration bound to in-memory MongoDB (mongomock), db descriptor is DB, env.json variable
+    'db' refers to it
+    """
+    DB = 'db_test'
+    DB_NAME = 'na3x_test'
+
+    def setUp(self):
+        self.client = mongomock.MongoClient()
+        self.db = self.client[MongoTestCase.DB_NAME]
+        patcher = mock.patch('na3x.db.connect.MongoClient', lambda uri: self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cfg = mock.patch.dict(na3x_cfg, {
+            NA3X_DB: {MongoTestCase.DB: {'MONGO_DBNAME': MongoTestCase.DB_NAME, 'MONGO_HOST': 'localhost',
+                                         'MONGO_PORT': 27017, 'MONGO_USER': 'user', 'MONGO_PASSWORD': 'pswd'}},
+            NA3X_TRIGGERS: {},
+            NA3X_ENV: {'prod': {'db': MongoTestCase.DB}, 'test': {'db': MongoTestCase.DB}}})
+        cfg.start()
+        self.addCleanup(cfg.stop)
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def set_triggers(self, triggers):
+        na3x_cfg[NA3X_TRIGGERS] = triggers
+
+    def write_cfg(self, name, cfg):
+        """
+        Writes request configuration file
+        :return: file path
+        """
+        path = os.path.join(self.tmp, name)
+        with open(path, 'w') as cfg_file:
+            cfg_file.write(cfg if isinstance(cfg, str) else json.dumps(cfg))
+        return path
+
+
+def response(status=200, content=None, headers=None, url='http://jira'):
+    """
+    Builds requests.Response
+    :param content: JSON serializable object, str or bytes
+    """
+    res = requests.models.Response()
+    res.status_code = status
+    res.url = url
+    if content is not None and not isinstance(content, (str, bytes)):
+        content = json.dumps(content)
+    res._content = content.encode('utf-8') if isinstance(content, str) else (content if content is not None else b'')
+    res.raw = io.BytesIO(res._content)  # streamed content
+    res.headers.update(headers if headers else {})
+    return res
+
+
+@contextlib.contextmanager
+def http(side_effect=None, return_value=None):
+    """
+    Patches HTTP requests sent by na3x.integration.request
+    :return: mock called with (method, url, **kwargs) of each request
+    """
+    request = mock.Mock(side_effect=side_effect, return_value=return_value)
+    with mock.patch('na3x.integration.request.requests.request', request):
+        yield request
+
+
+SEARCH_CFG = {
+    'request': {'url': '$url/search', 'data': {'jql': "updated >= '$since'", 'maxResults': 2, 'startAt': 0}},
+    'response': {'content-root': 'issues', 'issues': {'type': 'array', 'fields': {'root': {
+        'type': 'object', 'explicit': True, 'fields': {
+            'key': {'key': 'key', 'type': 'string'},
+            'fields': {'key': 'fields', 'type': 'object', 'fields': {
+                'summary': {'key': 'summary', 'type': 'string'},
+                'updated': {'key': 'updated', 'type': 'string'}}}}}}}}}
+
+
+class SearchServer:
+    """
+    Fake paged search endpoint (Jira search response format), could be used as http() side effect
+    """
+    def __init__(self, issues, fail_at=None):
+        """
+        Constructor
+        :param issues: list of {'key': ..., 'summary': ..., 'updated': ...}
+        :param fail_at: startAt of page which fails with 500
+        """
+        self.issues = issues
+        self.fail_at = fail_at
+        self.calls = []
+
+    def __call__(self, method, url, params=None, data=None, headers=None, **kwargs):
+        params = dict(params) if params else {}
+        self.calls.append(params)
+        start_at = int(params.get('startAt', 0))
+        if self.fail_at is not None and start_at >= self.fail_at:
+            return response(500, {'errorMessages': ['failed']}, url=url)
+        max_results = int(params.get('maxResults', 50))
+        since = params.get('jql', '').partition("updated >= '")[2].rstrip("'")
+        issues = [issue for issue in self.issues if issue['updated'] >= since]
+        page = [{'key': issue['key'], 'fields': {field: value for field, value in issue.items() if field != 'key'}}
+                for issue in issues[start_at:start_at + max_results]]
+        return response(200, {'startAt': start_at, 'maxResults': max_results, 'total': len(issues), 'issues': page},
+                        url=url)
+
+
+def issues(count, updated='2020-01-01 00:00'):
+    return [{'key': 'SP-{:d}'.format(i), 'summary': 'issue {:d}'.format(i), 'updated': updated} for i in range(count)]
@@ -0,0 +1,175 @@
+import math
+from unittest import mock
+from na3x.db.aggregates import MaterializedAggregates
+from na3x.db.data import Accessor, CRUD, Trigger
+from na3x.integration.importer import Importer
+from na3x.validation.validator import Validator
+from tests.helpers import MongoTestCase, SearchServer, SEARCH_CFG, http, issues
+
+
+class RecordingTrigger(Trigger):
+    executed = []
+
+    def execute(self, input_object, match_params):
+        RecordingTrigger.executed.append(match_params)
+
+
+class MaterializedAggregatesTestCase(MongoTestCase):
+    TRIGGERS = {'allocation': {'before-upsert': 'na3x.db.aggregates.AggregatesCaptureTrigger',
+                               'after-upsert': 'na3x.db.aggregates.AggregatesRefreshTrigger',
+                               'before-delete': 'na3x.db.aggregates.AggregatesCaptureTrigger',
+                               'after-delete': 'na3x.db.aggregates.AggregatesRefreshTrigger'}}
+
+    def setUp(self):
+        MongoTestCase.setUp(self)
+        self.set_triggers(MaterializedAggregatesTestCase.TRIGGERS)
+        self.db.allocation.insert_many([{'group': 'backend', 'key': 'SP-0', 'hours': 4},
+                                        {'group': 'backend', 'key': 'SP-2', 'hours': 2},
+                                        {'group': 'backend', 'key': 'SP-4'},
+                                        {'group': 'ui', 'key': 'SP-1', 'hours': 3}])
+        self.aggregates = MaterializedAggregates.factory('db', 'allocation')
+        self.aggregates.declare(['group'], 'hours')
+        self.accessor = Accessor.factory('db')
+
+    def values(self):
+        return {doc['group']['group']: (doc['sum'], doc['count'], doc['min'], doc['max'])
+                for doc in self.db['allocation.aggregates'].find({'type': 'value'})}
+
+
+class MaterializedAggregatesTest(MaterializedAggregatesTestCase):
+    def test_declare(self):
+        self.assertEqual([{'type': 'declaration', 'group_by': ['group'], 'field': 'hours'}],
+                         self.aggregates.declarations())
+        self.assertEqual({'backend': (6, 2, 2, 4), 'ui': (3, 1, 3, 3)}, self.values())
+
+    def test_upsert_refreshes_groups(self):
+        self.accessor.upsert({'collection': 'allocation', 'type': 'single', 'match': {'key': 'SP-1'},
+                              'object': {'group': 'backend'}})
+        self.assertEqual({'backend': (9, 3, 2, 4)}, self.values())
+        self.accessor.upsert({'collection': 'allocation', 'type': 'multi',
+                              'object': [{'group': 'qa', 'key': 'SP-5', 'hours': 1}]})
+        self.accessor.upsert({'collection': 'allocation', 'type': 'single', 'match': {'key': 'SP-6'},
+                              'object': {'group': 'qa', 'hours': 5}})
+        self.assertEqual({'backend': (9, 3, 2, 4), 'qa': (6, 2, 1, 5)}, self.values())
+
+    def test_delete_refreshes_groups(self):
+        self.accessor.delete({'collection': 'allocation', 'match': {'key': 'SP-0'}, 'type': 'single'})
+        self.assertEqual({'backend': (2, 1, 2, 2), 'ui': (3, 1, 3, 3)}, self.values())
+        self.accessor.delete({'collection': 'allocation', 'match': {'group': 'ui'}})
+        self.assertEqual({'backend': (2, 1, 2, 2)}, self.values())
+
+    def test_delete_all(self):
+        self.accessor.upsert({'collection': 'allocation', 'type': 'multi',
+                              'object': [{'group': 'qa', 'key': 'SP-5', 'hours': 1}]})
+        self.assertEqual(3, len(self.values()))
+        self.accessor.delete({'collection': 'allocation'})
+        self.assertEqual({}, self.values())
+        self.assertEqual(1, len(self.aggregates.declarations()))
+
+    def test_apply_delta(self):
+        aggregates = {'sum': 6, 'count': 2, 'min': 2, 'max': 4}
+        self.assertEqual({'sum': 7, 'count': 3, 'min': 1, 'max': 4}, MaterializedAggregates.apply_delta(aggregates,
+                                                                                                      added=1))
+        self.assertIsNone(MaterializedAggregates.apply_delta(aggregates, removed=4, added=1))
+        self.assertEqual(3.0, MaterializedAggregates.value(aggregates, 'mean'))
+        empty = {'sum': 0, 'count': 0, 'min': None, 'max': None}
+        self.assertEqual([0, 0], [MaterializedAggregates.value(empty, func) for func in ['sum', 'count']])
+        for func in ['mean', 'min', 'max']:
+            self.assertTrue(math.isnan(MaterializedAggregates.value(empty, func)), func)
+
+    def rescans(self, write):
+        with mock.patch.object(CRUD, 'aggregate', wraps=CRUD.aggregate) as aggregate:
+            write()
+        return aggregate.call_count
+
+    def test_delta_is_applied_without_rescan(self):
+        self.assertEqual(0, self.rescans(lambda: self.accessor.upsert({
+            'collection': 'allocation', 'type': 'multi', 'object': [{'group': 'backend', 'key': 'SP-5', 'hours': 3},
+                                                                    {'group': 'qa', 'key': 'SP-6', 'hours': 1}]})))
+        self.assertEqual(0, self.rescans(lambda: self.accessor.upsert({
+            'collection': 'allocation', 'type': 'single', 'match': {'key': 'SP-5'}, 'object': {'hours': 1}})))
+        self.assertEqual(0, self.rescans(lambda: self.accessor.delete({
+            'collection': 'allocation', 'type': 'single', 'match': {'group': 'backend', 'hours': 2}})))
+        self.assertEqual({'backend': (5, 2, 1, 4), 'qa': (1, 1, 1, 1), 'ui': (3, 1, 3, 3)}, self.values())
+
+    def test_removed_min_max_is_rescanned(self):
+        self.assertEqual(1, self.rescans(lambda: self.accessor.upsert({
+            'collection': 'allocation', 'type': 'single', 'match': {'key': 'SP-0'}, 'object': {'hours': 1}})))
+        self.assertEqual({'backend': (3, 2, 1, 2), 'ui': (3, 1, 3, 3)}, self.values())
+
+    def test_same_result_as_refresh(self):
+        inserted = [{'group': 'qa', 'key': 'SP-5'}, {'group': 'qa', 'key': 'SP-6', 'hours': 2.5},
+                    {'group': 'pm', 'key': 'SP-7', 'hours': 'x'}]
+        writes = [{'collection': 'allocation', 'type': 'multi', 'object': inserted},
+                  {'collection': 'allocation', 'type': 'single', 'match': {'key': 'SP-4'}, 'object': {'hours': 7}},
+                  {'collection': 'allocation', 'type': 'multi', 'match': {'group': 'ui'}, 'object': {'group': 'qa'}},
+                  {'collection': 'allocation', 'type': 'single', 'match': {'key': 'SP-7'}, 'object': {'hours': 1}},
+                  {'collection': 'allocation', 'type': 'single', 'match': {'key': 'SP-8'},
+                   'object': {'group': 'ui', 'hours': 2}},
+                  {'collection': 'allocation', 'match': {'group': 'qa', 'hours': {'$gt': 2}}},
+                  {'collection': 'allocation', 'type': 'single', 'match': {'group': 'backend'}}]
+        for write in writes:
+            (self.accessor.delete if 'object' not in write else self.accessor.upsert)(write)
+            values = self.values()
+            self.aggregates.refresh()
+            self.assertEqual(self.values(), values, write)
+
+    def test_chained_triggers(self):
+        triggers = dict(MaterializedAggregatesTestCase.TRIGGERS['allocation'])
+        triggers['after-upsert'] = ['tests.test_aggregates.RecordingTrigger', triggers['after-upsert']]
+        self.set_triggers({'allocation': triggers})
+        RecordingTrigger.executed = []
+        self.accessor.upsert({'collection': 'allocation', 'type': 'single', 'match': {'key': 'SP-2'},
+                              'object': {'hours': 3}})
+        self.assertEqual([{'key': 'SP-2'}], RecordingTrigger.executed)
+        self.assertEqual({'backend': (7, 2, 3, 4), 'ui': (3, 1, 3, 3)}, self.values())
+
+
+class MaterializedAggregateGetterTest(MaterializedAggregatesTestCase):
+    def aggregate(self, obj, func, materialized=True):
+        validator = Validator({'checks': {'hours': {
+            'constraint': {'func': 'na3x.validation.validator.const', 'params': {'value': -1}, 'default': -1},
+            'to_validate': {'func': 'na3x.validation.validator.aggregate', 'params': {
+                'materialized': materialized,
+                'extract': {'db': 'db', 'collection': 'allocation', 'match': ['group']},
+                'substitute': {'match': ['key'], 'field': 'hours'},
+                'aggregate': {'field': 'hours', 'func': func}}, 'default': None},
+            'compare': {'func': 'na3x.validation.validator.limit_exceed', 'violation': {'message': '{}'}}}},
+            'memo': False})
+        reads = mock.patch.object(Accessor, 'get', autospec=True, side_effect=Accessor.get)
+        with reads as get:
+            res = validator.validate(obj)
+        return res, [call[0][1]['collection'] for call in get.call_args_list]
+
+    def test_same_result_as_rescan(self):
+        for obj in [{'group': 'backend', 'key': 'SP-0', 'hours': 5}, {'group': 'backend', 'key': 'SP-2', 'hours': 3},
+                    {'group': 'ui', 'key': 'SP-9', 'hours': 1}, {'group': 'qa', 'key': 'SP-9', 'hours': 1}]:
+            for func in ['sum', 'count', 'max', 'mean']:
+                res, _ = self.aggregate(obj, func)
+                self.assertEqual(self.aggregate(obj, func, False)[0], res, (obj, func))
+
+    def test_collection_is_not_scanned(self):
+        obj = {'group': 'backend', 'key': 'SP-9', 'hours': 3}
+        res, collections = self.aggregate(obj, 'sum')
+        self.assertEqual(['allocation.aggregates', 'allocation'], collections)  # group and substituted row only
+        self.assertEqual(self.aggregate(obj, 'sum', False)[0], res)
+
+
+class ImportAggregatesTest(MongoTestCase):
+    def perform(self, server, request_params=None):
+        request_params = dict(request_params if request_params else {}, cfg=self.write_cfg('search.json', SEARCH_CFG),
+                              type='list', dest='issues')
+        importer = Importer({'mapping': {'url': 'http://jira', 'since': ''}, 'db': MongoTestCase.DB,
+                             'requests': {'search': request_params}}, 'user', 'pswd')
+        with http(side_effect=server):
+            importer.perform()
+        return {doc['group']['updated']: doc['count'] for doc in self.db['issues.aggregates'].find({'type': 'value'})}
+
+    def test_import_refreshes_aggregates(self):
+        self.perform(SearchServer(issues(3)))
+        MaterializedAggregates.factory('db', 'issues').declare(['updated'], 'summary')
+        incremental = {'incremental': {'key': ['key'], 'watermark.field': 'updated', 'watermark.param': 'since'}}
+        self.assertEqual({'2020-01-02 00:00': 2}, self.perform(SearchServer(issues(2, '2020-01-02 00:00'))))
+        self.assertEqual({'2020-01-01 00:00': 4}, self.perform(SearchServer(issues(4)), {'streaming': True}))
+        self.assertEqual({'2020-01-01 00:00': 2, '2020-01-03 00:00': 4},
+                         self.perform(SearchServer(issues(6, '2020-01-03 00:00')[2:]), incremental))
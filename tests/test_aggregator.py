@@ -0,0 +1,100 @@
+import math
+import unittest
+from unittest import mock
+from na3x.utils.aggregator import Aggregator
+
+
+class AggregatorTest(unittest.TestCase):
+    FUNCS = ['sum', 'count', 'min', 'max', 'mean', 'nunique']
+    VALUES = [{'group': 'backend', 'team': 'a', 'hours': 4}, {'group': 'backend', 'team': 'b', 'hours': 2.5},
+              {'group': 'ui', 'team': 'a', 'hours': None}, {'group': 'ui', 'team': 'a', 'hours': 3},
+              {'group': 'backend', 'team': 'a', 'hours': 4}, {'group': None, 'team': 'a', 'hours': 7},
+              {'group': 'qa', 'team': 'c', 'hours': math.nan}, {'group': 'backend', 'team': 'b'}]
+
+    def assertSame(self, expected, actual):
+        if isinstance(expected, dict):
+            self.assertEqual(set(expected.keys()), set(actual.keys()))
+            for key in expected:
+                self.assertSame(expected[key], actual[key])
+        elif isinstance(expected, float) and math.isnan(expected):
+            self.assertTrue(math.isnan(actual), actual)
+        else:
+            self.assertAlmostEqual(expected, actual)
+
+    @staticmethod
+    def pandas(values, funcs, group_by=None):
+        return Aggregator._Aggregator__agg_multi_func_pandas(values, 'hours', funcs, group_by)
+
+    def test_same_result_as_pandas(self):
+        for group_by in [None, 'group', ['group', 'team']]:
+            expected = AggregatorTest.pandas(AggregatorTest.VALUES, AggregatorTest.FUNCS, group_by)
+            self.assertSame(expected, Aggregator.agg_multi_func(AggregatorTest.VALUES, 'hours', AggregatorTest.FUNCS,
+                                                                group_by))
+            for func in AggregatorTest.FUNCS:
+                self.assertSame(Aggregator._Aggregator__agg_single_func_pandas(AggregatorTest.VALUES, 'hours', func,
+                                                                                 group_by),
+                                Aggregator.agg_single_func(AggregatorTest.VALUES, 'hours', func, group_by))
+
+    def test_empty_group(self):
+        values = [{'group': 'qa', 'hours': None}, {'group': 'ui', 'hours': 1}]
+        self.assertSame(AggregatorTest.pandas(values, AggregatorTest.FUNCS, 'group'),
+                        Aggregator.agg_multi_func(values, 'hours', AggregatorTest.FUNCS, 'group'))
+        self.assertEqual(['qa', 'ui'], list(Aggregator.agg_single_func(values, 'hours', 'sum', 'group').keys()))
+
+    def test_iterable(self):
+        self.assertEqual({'sum': 13.5, 'count': 4},
+                         Aggregator.agg_multi_func((value for value in AggregatorTest.VALUES[:5]), 'hours',
+                                                   ['sum', 'count']))
+        self.assertIsNone(Aggregator.agg_multi_func(iter([]), 'hours', ['sum']))
+        self.assertIsNone(Aggregator.agg_single_func([], 'hours', 'sum', 'group'))
+
+    def test_missing_field(self):
+        for field, group_by in [('estimate', None), ('hours', 'sprint')]:
+            with self.assertRaises(KeyError):
+                Aggregator.agg_single_func(AggregatorTest.VALUES, field, 'sum', group_by)
+
+    def test_strings(self):
+        values = [{'key': 'SP-2'}, {'key': 'SP-1'}, {'key': 'SP-2'}]
+        for func in ['count', 'min', 'max', 'nunique']:
+            self.assertEqual(Aggregator._Aggregator__agg_single_func_pandas(values, 'key', func),
+                             Aggregator.agg_single_func(values, 'key', func))
+
+    def assertSameAsPandas(self, values, group_by=None):
+        for funcs in [[func] for func in AggregatorTest.FUNCS] + [AggregatorTest.FUNCS]:
+            try:
+                expected = AggregatorTest.pandas(values, funcs, group_by)
+            except TypeError:
+                with self.assertRaises(TypeError):
+                    Aggregator.agg_multi_func(values, 'hours', funcs, group_by)
+                continue
+            self.assertSame(expected, Aggregator.agg_multi_func(values, 'hours', funcs, group_by))
+
+    def test_not_ordered_values(self):
+        for column in [[1, 'a', {'id': 1}, None, 2.5], [{'id': 1}, {'id': 2}, {'id': 1}],
+                       ['SP-2', 'SP-1', None, 'SP-2'], [1, '2', 3]]:
+            values = [{'group': 'ab'[i % 2], 'hours': value} for i, value in enumerate(column)]
+            for group_by in [None, 'group']:
+                self.assertSameAsPandas(values, group_by)
+        self.assertEqual(3, Aggregator.agg_single_func(iter([{'hours': {'id': i}} for i in range(3)]), 'hours',
+                                                       'count'))
+
+    def test_other_funcs_use_pandas(self):
+        values = [{'hours': 1}, {'hours': 2}, {'hours': 3}, {'hours': 4}]
+        self.assertAlmostEqual(5 / 3, Aggregator.agg_single_func(values, 'hours', 'var'))
+        self.assertAlmostEqual(5 / 3, Aggregator.agg_multi_func(values, 'hours', ['sum', 'var'])['var'])
+
+    def test_same_result_vectorized(self):
+        values = [{'group': ['backend', 'ui', None][i % 3], 'team': 'ab'[i % 2],
+                   'hours': None if i % 7 == 0 else i % 5 + (0.5 if i % 11 == 0 else 0)} for i in range(200)]
+        funcs = ['sum', 'count', 'min', 'max', 'mean']
+        for group_by in [None, 'group', ['group', 'team']]:
+            expected = Aggregator.agg_multi_func(values, 'hours', funcs, group_by)
+            with mock.patch.object(Aggregator, 'VECTORIZE_THRESHOLD', 10):
+                self.assertSame(expected, Aggregator.agg_multi_func(values, 'hours', funcs, group_by))
+                self.assertSame(AggregatorTest.pandas(values, funcs, group_by),
+                                Aggregator.agg_multi_func(values, 'hours', funcs, group_by))
+        ints = [{'hours': i} for i in range(20)]
+        with mock.patch.object(Aggregator, 'VECTORIZE_THRESHOLD', 10):
+            self.assertIs(int, type(Aggregator.agg_single_func(ints, 'hours', 'sum')))
+            self.assertEqual(['a', 'b'], [Aggregator.agg_single_func([{'key': key} for key in 'ab' * 10], 'key', func)
+                                          for func in ['min', 'max']])
@@ -0,0 +1,69 @@
+import os
+import time
+from unittest import mock
+from na3x.integration.cache import CacheMissError, ResponseCache
+from na3x.integration.importer import Importer
+from tests.helpers import MongoTestCase, SearchServer, SEARCH_CFG, http, issues, response
+
+
+class ResponseCacheTest(MongoTestCase):
+    def setUp(self):
+        MongoTestCase.setUp(self)
+        self.cache = ResponseCache(os.path.join(self.tmp, 'cache', 'responses.sqlite'))
+
+    def test_put_get(self):
+        self.assertIsNone(self.cache.get('http://jira/search', {'jql': 'a'}))
+        self.cache.put('http://jira/search', {'jql': 'a'}, b'{}', 'etag', 'modified')
+        cached = self.cache.get('http://jira/search', {'jql': 'a'})
+        self.assertEqual((b'{}', 'etag', 'modified'), (cached.content, cached.etag, cached.last_modified))
+        self.assertIsNone(self.cache.get('http://jira/search', {'jql': 'b'}))
+
+    def test_identity(self):
+        self.cache.put('http://jira/search', {'jql': 'a'}, b'{"user": "a"}', identity='a')
+        self.assertIsNone(self.cache.get('http://jira/search', {'jql': 'a'}))
+        self.assertIsNone(self.cache.get('http://jira/search', {'jql': 'a'}, 'b'))
+        self.assertEqual(b'{"user": "a"}', self.cache.get('http://jira/search', {'jql': 'a'}, 'a').content)
+        self.assertNotEqual(ResponseCache.key('url', None, 'a'), ResponseCache.key('url', None, 'b'))
+        self.assertNotEqual(ResponseCache.key('url', None), ResponseCache.key('url', None, 'a'))
+
+    def test_touch(self):
+        self.cache.put('url', None, b'{}', identity='a')
+        cached = self.cache.get('url', None, 'a')
+        self.assertFalse(cached.is_fresh(None))
+        with mock.patch('na3x.integration.cache.time.time', return_value=cached.stored_at + 100):
+            self.assertFalse(cached.is_fresh(10))
+            self.cache.touch('url', None, 'a')
+        self.assertTrue(self.cache.get('url', None, 'a').is_fresh(10))
+
+
+class ImportCacheTest(MongoTestCase):
+    def perform(self, server, login='user', **cache_cfg):
+        cfg = {'mapping': {'url': 'http://jira', 'since': '2020-01-01'}, 'db': MongoTestCase.DB,
+               'cache.path': os.path.join(self.tmp, 'cache.sqlite'),
+               'requests': {'search': {'cfg': self.write_cfg('search.json', SEARCH_CFG), 'type': 'list',
+                                       'dest': 'issues'}}}
+        cfg.update(cache_cfg)
+        importer = Importer(cfg, login, 'pswd')
+        with http(side_effect=server):
+            importer.perform()
+        return sorted(item['key'] for item in self.db.issues.find())
+
+    def test_fresh_response_is_not_requested(self):
+        self.perform(SearchServer(issues(3)), **{'cache.ttl': 3600})
+        server = SearchServer(issues(1))
+        self.assertEqual(['SP-0', 'SP-1', 'SP-2'], self.perform(server, **{'cache.ttl': 3600}))
+        self.assertEqual([], server.calls)
+
+    def test_response_is_not_shared_between_users(self):
+        self.perform(SearchServer(issues(3)), **{'cache.ttl': 3600})
+        server = SearchServer(issues(1))
+        self.assertEqual(['SP-0'], self.perform(server, 'other', **{'cache.ttl': 3600}))
+        self.assertEqual(1, len(server.calls))
+        with self.assertRaises(CacheMissError):
+            self.perform(SearchServer([]), 'unknown', **{'cache.offline': True})
+
+    def test_not_modified_response_is_revalidated(self):
+        self.perform(SearchServer(issues(3)))
+        not_modified = mock.Mock(return_value=response(304))
+        self.assertEqual(['SP-0', 'SP-1', 'SP-2'], self.perform(not_modified))
+        self.assertEqual(2, not_modified.call_count)
@@ -0,0 +1,63 @@
+import gzip
+import json
+import os
+from unittest import mock
+from na3x.integration.cassette import Cassette, CassetteMissError
+from na3x.integration.importer import Importer
+from tests.helpers import MongoTestCase, SearchServer, SEARCH_CFG, http, issues, response
+
+
+class CassetteTest(MongoTestCase):
+    def setUp(self):
+        MongoTestCase.setUp(self)
+        self.path = os.path.join(self.tmp, 'cassettes', 'import.jsonl.gz')
+
+    def record(self, responses):
+        cassette = Cassette(self.path, Cassette.MODE_RECORD)
+        for i, res in enumerate(responses):
+            cassette.send('get', 'http://jira/search', {'startAt': 0}, None, {'Authorization': 'Basic x'}, lambda: res)
+        cassette.close()
+        return cassette
+
+    def test_record_replay(self):
+        recorded = self.record([response(200, {'n': 1}, {'Set-Cookie': 'session', 'ETag': 'a'}),
+                                response(200, {'n': 2})])
+        self.assertEqual(2, recorded.count)
+        with gzip.open(self.path, 'rt') as file:
+            interactions = [json.loads(line) for line in file]
+        self.assertEqual({}, interactions[0]['headers'])
+        self.assertEqual({'ETag': 'a'}, interactions[0]['response_headers'])
+        cassette = Cassette(self.path)
+        replayed = [cassette.send('GET', 'http://jira/search', {'startAt': 0}, None, None, None) for _ in range(3)]
+        self.assertEqual([{'n': 1}, {'n': 2}, {'n': 2}], [res.json() for res in replayed])
+        self.assertEqual(b'{"n": 1}', replayed[0].raw.read())
+        self.assertEqual('a', replayed[0].headers['etag'])
+        with self.assertRaises(CassetteMissError):
+            cassette.send('GET', 'http://jira/search', {'startAt': 1}, None, None, None)
+
+    def test_not_supported_mode(self):
+        with self.assertRaises(NotImplementedError):
+            Cassette(self.path, 'rewind')
+        with self.assertRaises(NotImplementedError):
+            Cassette(self.path, Cassette.MODE_RECORD, 'slow')
+        self.assertIsNone(Cassette.from_cfg({}))
+
+    def perform(self, mode, server, stream=False, since=''):
+        cfg = dict(SEARCH_CFG, request=dict(SEARCH_CFG['request'], stream=stream))
+        importer = Importer({'mapping': {'url': 'http://jira', 'since': since}, 'db': MongoTestCase.DB,
+                             'cassette': self.path, 'cassette.mode': mode,
+                             'requests': {'search': {'cfg': self.write_cfg('search.json', cfg), 'type': 'list',
+                                                     'dest': 'issues'}}}, 'user', 'pswd')
+        with http(side_effect=server):
+            importer.perform()
+        return list(self.db.issues.find({}, {'_id': False}))
+
+    def test_import_replay(self):
+        for stream in [False, True]:
+            recorded = self.perform(Cassette.MODE_RECORD, SearchServer(issues(5)), stream)
+            self.assertEqual(5, len(recorded))
+            offline = mock.Mock(side_effect=AssertionError('request is sent'))
+            self.assertEqual(recorded, self.perform(Cassette.MODE_REPLAY, offline, stream))
+            self.assertEqual(0, offline.call_count)
+        with self.assertRaises(CassetteMissError):
+            self.perform(Cassette.MODE_REPLAY, None, since='2020-01-01')
@@ -0,0 +1,62 @@
+import json
+import unittest
+from na3x.utils.cfg import CfgTemplate, CfgUtils
+
+
+def substitute(cfg, params):
+    # per item rendering replaced by CfgTemplate
+    return json.loads(CfgUtils.substitute_params(cfg, {name: json.dumps(value) if isinstance(value, (list, dict))
+                                                       else value for name, value in params.items()}), strict=False)
+
+
+class CfgTemplateTest(unittest.TestCase):
+    CFG = '''{
+        "request": {
+            "url": "$url/rest/api/2/issue/$key",
+            "data": {"fields": {"$field": $value, "labels": $labels, "summary": "[$key] $summary"},
+                     "size": $size, "cost": "$$5"}
+        }
+    }'''
+    ITEMS = [
+        {'key': 'SP-1', 'value': '"text"', 'labels': ['a', 'b'], 'summary': 'plain', 'size': 3},
+        {'key': 'SP-2', 'value': '{"id": 1}', 'labels': [], 'summary': 'with \\"quotes\\" and \\\\ slash', 'size': 2.5},
+        {'key': 'SP-3', 'value': 'null', 'labels': {'x': [1]}, 'summary': 'tab\there', 'size': 'true'},
+        {'key': 'SP-4', 'value': '[1, 2]', 'labels': ['c'], 'summary': 'x', 'size': 'false'},
+        {'key': 'SP-5', 'value': '1', 'labels': ['c'], 'summary': 'unescaped " quote', 'size': 1},
+    ]
+
+    def test_render_is_equivalent_to_substitution(self):
+        static = {'url': 'http://jira', 'field': 'customfield_1'}
+        template = CfgTemplate(self.CFG, static, ['key', 'value', 'labels', 'summary', 'size'], strict=False)
+        for item in self.ITEMS:
+            try:
+                expected = substitute(self.CFG, dict(static, **item))
+            except ValueError:  # substituted value breaks JSON
+                with self.assertRaises(ValueError):
+                    template.render(item)
+                continue
+            self.assertEqual(expected, template.render(item))
+
+    def test_render_is_repeatable(self):
+        template = CfgTemplate(self.CFG, {'url': 'u', 'field': 'f'}, ['key', 'value', 'labels', 'summary', 'size'])
+        first = template.render(self.ITEMS[0])
+        first['request']['data']['fields']['labels'].append('changed')
+        self.assertEqual(substitute(self.CFG, dict({'url': 'u', 'field': 'f'}, **self.ITEMS[0])),
+                         template.render(self.ITEMS[0]))
+
+    def test_missing_slot_param(self):
+        cfg = '{"url": "$url/$key", "value": "$value"}'
+        template = CfgTemplate(cfg, {'url': 'u'}, ['key', 'value'])
+        self.assertEqual({'url': 'u/$key', 'value': 'x'}, template.render({'value': 'x'}))
+        cfg = '{"value": $value}'
+        with self.assertRaises(ValueError):
+            CfgTemplate(cfg, None, ['value']).render({})
+
+    def test_fallback_to_text_substitution(self):
+        cfg = '{"value": 1$digit, "name": "$name"}'  # parameter is a part of number
+        template = CfgTemplate(cfg, None, ['digit', 'name'])
+        self.assertEqual({'value': 17, 'name': 'n'}, template.render({'digit': 7, 'name': 'n'}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import datetime
+import json
+import unittest
+import uuid
+from na3x.utils.codec import JSONCodec, orjson
+from na3x.utils.json import ExtJSONEncoder
+
+
+class JSONCodecTest(unittest.TestCase):
+    BACKENDS = [JSONCodec.BACKEND_STDLIB] + ([JSONCodec.BACKEND_ORJSON] if orjson else [])
+    OBJ = {'name': 'задача', 'estimate': 1.5, 'points': 3, 'labels': ['a', 'b'], 'done': False, 'parent': None,
+           'created': datetime.datetime(2020, 1, 1, 10, 30), 'due': datetime.datetime(2020, 1, 10),
+           'components': {'ui'}, 'big': 2 ** 70}
+
+    def setUp(self):
+        backend = JSONCodec.backend()
+        self.addCleanup(JSONCodec.use, backend)
+
+    def dumps(self, obj, **kwargs):
+        results = []
+        for backend in JSONCodecTest.BACKENDS:
+            JSONCodec.use(backend)
+            results.append(JSONCodec.dumps(obj, **kwargs))
+        return results
+
+    def test_backends_are_equivalent(self):
+        for res in self.dumps(JSONCodecTest.OBJ):
+            decoded = json.loads(res)
+            self.assertEqual('2020-01-01 10:30', decoded['created'])
+            self.assertEqual('2020-01-10', decoded['due'])
+            self.assertEqual(['ui'], decoded['components'])
+            self.assertEqual(2 ** 70, decoded['big'])
+        self.assertEqual(1, len(set(json.dumps(json.loads(res), sort_keys=True) for res in self.dumps(JSONCodecTest.OBJ))))
+
+    def test_non_finite_floats(self):
+        obj = {'nan': float('nan'), 'inf': [float('inf'), -float('inf'), 1.0], 'set': {float('nan')}, 'big': 2 ** 70}
+        for res in self.dumps(obj):
+            self.assertEqual({'nan': None, 'inf': [None, None, 1.0], 'set': [None], 'big': 2 ** 70}, json.loads(res))
+        for res in self.dumps(float('nan')):
+            self.assertEqual('null', res)
+
+    def test_sort_keys(self):
+        for res in self.dumps({'b': 1, 'a': {'d': 1, 'c': 2}}, sort_keys=True):
+            self.assertEqual(['a', 'b'], list(json.loads(res).keys()))
+            self.assertEqual(['c', 'd'], list(json.loads(res)['a'].keys()))
+
+    def test_loads(self):
+        for backend in JSONCodecTest.BACKENDS:
+            JSONCodec.use(backend)
+            self.assertEqual({'a': 'x\ty'}, JSONCodec.loads('{"a": "x\ty"}'))
+            self.assertEqual({'a': [1, 2.5, None]}, JSONCodec.loads(b'{"a": [1, 2.5, null]}'))
+            with self.assertRaises(ValueError):
+                JSONCodec.loads('{"a": "x\ty"}', strict=True)
+
+    def test_not_supported_backend(self):
+        with self.assertRaises(NotImplementedError):
+            JSONCodec.use('simplejson')
+
+
+class ExtJSONEncoderTest(unittest.TestCase):
+    def test_encode(self):
+        id = uuid.uuid4()
+        obj = {'b': float('nan'), 'a': datetime.datetime(2020, 1, 1, 10, 30), 'id': id}
+        self.assertEqual({'a': '2020-01-01 10:30', 'b': None, 'id': str(id)},
+                         json.loads(json.dumps(obj, cls=ExtJSONEncoder)))
+        self.assertEqual(['a', 'b', 'id'], list(json.loads(json.dumps(obj, cls=ExtJSONEncoder, sort_keys=True)).keys()))
+        obj['b'] = 1.5
+        self.assertEqual(json.loads(json.dumps(obj, cls=ExtJSONEncoder, indent=2)),
+                         json.loads(json.dumps(obj, cls=ExtJSONEncoder)))
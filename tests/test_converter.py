@@ -0,0 +1,66 @@
+import datetime
+import unittest
+from unittest import mock
+from na3x.utils.converter import Converter, Types
+
+
+class ConverterTest(unittest.TestCase):
+    def test_convert(self):
+        self.assertEqual(12, Converter.convert('12', Types.TYPE_INT))
+        self.assertEqual(1.5, Converter.convert('1.5', Types.TYPE_FLOAT))
+        self.assertEqual('x', Converter.convert('x', Types.TYPE_STRING))
+        self.assertEqual('2017-10-01', Converter.convert(datetime.date(2017, 10, 1), Types.TYPE_STRING))
+        self.assertEqual(datetime.datetime(2017, 10, 1), Converter.convert('2017-10-01', Types.TYPE_DATE))
+        self.assertEqual(datetime.datetime(2017, 10, 1, 10, 1),
+                         Converter.convert('2017-10-01T10:01:00.479+0300', Types.TYPE_DATETIME))
+        self.assertEqual(datetime.datetime(2017, 10, 1, 10, 1), Converter.convert('2017-10-01T10:01:00',
+                                                                                  Types.TYPE_DATETIME))
+
+    def test_empty(self):
+        self.assertEqual('', Converter.convert(None, Types.TYPE_STRING))
+        for type in [Types.TYPE_INT, Types.TYPE_FLOAT, Types.TYPE_DATE, Types.TYPE_DATETIME]:
+            self.assertIsNone(Converter.convert('', type))
+            self.assertIsNone(Converter.convert(None, type))
+
+    def test_typed(self):
+        date = datetime.date(2017, 10, 1)
+        now = datetime.datetime(2017, 10, 1, 10, 1)
+        self.assertIs(date, Converter.convert(date, Types.TYPE_DATE))
+        self.assertIs(now, Converter.convert(now, Types.TYPE_DATETIME))
+        self.assertIs(int, type(Converter.convert(True, Types.TYPE_INT)))
+        self.assertIs(float, type(Converter.convert(2, Types.TYPE_FLOAT)))
+
+    def test_error(self):
+        with mock.patch('na3x.utils.converter.logging.error'):
+            for convert in [lambda: Converter.convert('x', Types.TYPE_INT),
+                            lambda: Converter.convert('2017/10/01', Types.TYPE_DATE),
+                            lambda: Converter.converter(Types.TYPE_FLOAT)('x')]:
+                with self.assertRaises(Exception):
+                    convert()
+
+    def test_convert_column(self):
+        values = ['2017-10-01', None, '2017-10-01', '2017-10-02T10:00:00', datetime.date(2017, 1, 1)]
+        self.assertEqual([Converter.convert(value, Types.TYPE_DATE) for value in values],
+                         Converter.convert_column(values, Types.TYPE_DATE))
+        self.assertEqual([1, 2], Converter.convert_column((value for value in ['1', '2']), Types.TYPE_INT))
+        self.assertEqual([], Converter.convert_column([], Types.TYPE_INT))
+
+    def test_column_typed(self):
+        now = datetime.datetime(2017, 10, 1, 10, 1)
+        column = Converter.convert_column([now, '', '2017-10-01T10:01:00', '2017-1-2T03:04:05'], Types.TYPE_DATETIME)
+        self.assertIs(now, column[0])
+        self.assertEqual([now, None, now, datetime.datetime(2017, 1, 2, 3, 4, 5)], column)
+
+    def test_column_unique(self):
+        start = datetime.datetime(2017, 10, 1)
+        values = [(start + datetime.timedelta(minutes=i)).isoformat() + '.479+0300' for i in range(1000)]
+        self.assertEqual([start + datetime.timedelta(minutes=i) for i in range(1000)],
+                         Converter.convert_column(values, Types.TYPE_DATETIME))
+        self.assertEqual([Converter.converter(Types.TYPE_DATE)(value) for value in values],
+                         Converter.convert_column(values, Types.TYPE_DATE))
+
+    def test_column_error(self):
+        with mock.patch('na3x.utils.converter.logging.error') as error:
+            with self.assertRaises(Exception):
+                Converter.convert_column(['2017-10-01', '2017/10/02'], Types.TYPE_DATE)
+        self.assertEqual(1, error.call_count)
@@ -0,0 +1,79 @@
+import time
+from unittest import mock
+from na3x.db.data import BulkWriter
+from na3x.integration.exporter import Exporter
+from tests.helpers import MongoTestCase, http, response
+
+
+class BulkWriterTest(MongoTestCase):
+    def setUp(self):
+        MongoTestCase.setUp(self)
+        self.db.items.insert_many([{'key': i, 'value': 0} for i in range(10)])
+
+    def test_batch_size(self):
+        writer = BulkWriter(self.db, 'items', batch_size=3)
+        for i in range(5):
+            writer.update({'value': 1}, {'key': i})
+        self.assertEqual(3, self.db.items.count_documents({'value': 1}))
+        writer.flush()
+        self.assertEqual(5, self.db.items.count_documents({'value': 1}))
+        self.assertEqual(5, writer.matched_count)
+        self.assertEqual(5, writer.modified_count)
+
+    def test_upsert_delete_counters(self):
+        writer = BulkWriter(self.db, 'items')
+        writer.update({'value': 1}, {'key': 100}, upsert=True)
+        writer.delete({'key': 0})
+        writer.flush()
+        self.assertEqual(1, writer.upserted_count)
+        self.assertEqual(1, writer.deleted_count)
+        self.assertEqual(10, self.db.items.count_documents({}))
+
+    def test_flush_interval_without_new_operations(self):
+        writer = BulkWriter(self.db, 'items', batch_size=100, flush_interval=0.05)
+        writer.update({'value': 1}, {'key': 0})
+        writer.delete({'key': 1})
+        deadline = time.monotonic() + 5
+        while writer.deleted_count == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(1, writer.modified_count)
+        self.assertEqual(1, writer.deleted_count)
+        writer.flush()
+        self.assertEqual(1, writer.modified_count)
+
+    def test_flush_cancels_timer(self):
+        writer = BulkWriter(self.db, 'items', batch_size=100, flush_interval=0.05)
+        writer.update({'value': 1}, {'key': 0})
+        writer.flush()
+        time.sleep(0.1)
+        self.assertEqual(1, writer.matched_count)
+
+    def test_timer_error_is_raised_by_next_call(self):
+        writer = BulkWriter(self.db, 'items', batch_size=100, flush_interval=0.01)
+        with mock.patch.object(self.db.items.__class__, 'bulk_write', side_effect=ValueError('failed')):
+            writer.update({'value': 1}, {'key': 0})
+            time.sleep(0.1)
+        with self.assertRaises(ValueError):
+            writer.flush()
+        writer.flush()  # operations are kept for next flush
+        self.assertEqual(1, writer.modified_count)
+
+
+class ExporterCallbackIndexTest(MongoTestCase):
+    def export(self, request_cfg):
+        self.db.src.insert_many([{'key': 'SP-1', 'label': 'a'}, {'key': 'SP-2', 'label': 'b'}])
+        cfg_file = self.write_cfg('request.json', '{"request": {"url": "$url/issue/$key", "data": {"label": "$value"}}}')
+        request_cfg.update({'cfg': cfg_file, 'type': 'create_entity', 'src.collection': 'src',
+                            'dynamic_mapping': {'key': 'key', 'value': 'label'}, 'callback.update_src': True,
+                            'callback.key': ['key']})
+        cfg = {'mapping': {'url': 'http://jira'}, 'db': MongoTestCase.DB, 'requests': {'create': request_cfg}}
+        with http(return_value=response(201, {'id': '1'})):
+            Exporter(cfg, 'user', 'pswd').perform()
+        self.assertEqual(2, self.db.src.count_documents({'id': '1'}))
+        return [index['key'] for index in self.db.src.index_information().values()]
+
+    def test_index_is_not_created_by_default(self):
+        self.assertEqual([[('_id', 1)]], self.export({}))
+
+    def test_index_is_created_if_configured(self):
+        self.assertIn([('key', 1)], self.export({'callback.index': True}))
@@ -0,0 +1,146 @@
+import json
+from unittest import mock
+from na3x.integration.exporter import Exporter
+from tests.helpers import MongoTestCase, http, response
+
+
+class ExporterTestCase(MongoTestCase):
+    REQUEST = '{"request": {"url": "$url/issue/$key", "data": {"fields": {"labels": ["$value"]}}}}'
+
+    def setUp(self):
+        MongoTestCase.setUp(self)
+        self.db.src.insert_many([{'key': 'SP-{:d}'.format(i), 'label': 'label-{:d}'.format(i)} for i in range(3)])
+        self.server = mock.Mock(side_effect=lambda method, url, **kwargs: response(201, {'id': url.split('/')[-1]}))
+
+    def perform(self, request_cfg, request=None, **cfg):
+        request_cfg.update({'cfg': self.write_cfg('request.json', request if request else ExporterTestCase.REQUEST),
+                            'src.collection': 'src', 'dynamic_mapping': {'key': 'key', 'value': 'label'}})
+        request_cfg.setdefault('type', 'create_entity')
+        cfg.update({'mapping': {'url': 'http://jira'}, 'db': MongoTestCase.DB, 'requests': {'export': request_cfg}})
+        exporter = Exporter(cfg, 'user', 'pswd')
+        with http(side_effect=self.server):
+            exporter.perform()
+        return exporter
+
+    def sent(self):
+        sent = [(call[0][0], call[0][1], json.loads(call[1]['data']) if call[1].get('data') else None)
+                for call in self.server.call_args_list]
+        self.server.reset_mock()
+        return sent
+
+
+class LedgerTest(ExporterTestCase):
+    def test_not_changed_items_are_skipped(self):
+        self.perform({'ledger': True})
+        self.assertEqual(3, len(self.sent()))
+        self.db.src.update_one({'key': 'SP-1'}, {'$set': {'label': 'changed'}})
+        self.perform({'ledger': True})
+        self.assertEqual([('POST', 'http://jira/issue/SP-1', {'fields': {'labels': ['changed']}})], self.sent())
+        self.perform({'ledger': True, 'ledger.force': True})
+        self.assertEqual(3, len(self.sent()))
+
+    def test_callback_does_not_change_identity(self):
+        request_cfg = {'ledger': True, 'callback.update_src': True, 'callback.key': ['key']}
+        self.perform(dict(request_cfg))
+        self.assertEqual({'SP-0', 'SP-1', 'SP-2'}, {item['id'] for item in self.db.src.find()})
+        self.assertEqual(3, len(self.sent()))
+        self.perform(dict(request_cfg))
+        self.assertEqual([], self.sent())
+
+    def test_default_identity_is_mapped_fields(self):
+        self.perform({'ledger': True})
+        self.sent()
+        self.db.src.update_many({}, {'$set': {'exported': True}})
+        self.perform({'ledger': True})
+        self.assertEqual([], self.sent())
+        self.assertEqual(3, self.db['export.ledger'].count_documents({'request': 'export'}))
+
+    def test_ledger_key(self):
+        self.perform({'ledger': True, 'ledger.key': ['key']})
+        self.sent()
+        self.db.src.update_one({'key': 'SP-1'}, {'$set': {'label': 'changed'}})
+        self.perform({'ledger': True, 'ledger.key': ['key']})
+        self.assertEqual(1, len(self.sent()))
+        self.assertEqual(3, self.db['export.ledger'].count_documents({'request': 'export'}))
+
+    def test_identical_requests_are_sent_once(self):
+        self.db.src.insert_one({'key': 'SP-1', 'label': 'label-1'})
+        self.perform({'ledger': True})
+        self.assertEqual(3, len(self.sent()))
+
+    def test_failed_items_are_not_recorded(self):
+        self.server.side_effect = lambda method, url, **kwargs: response(400 if url.endswith('SP-1') else 201, {})
+        with self.assertRaises(Exception):
+            self.perform({'ledger': True})
+        self.server.side_effect = lambda method, url, **kwargs: response(201, {})
+        self.sent()
+        self.perform({'ledger': True})
+        self.assertEqual([('POST', 'http://jira/issue/SP-1', {'fields': {'labels': ['label-1']}})], self.sent())
+
+
+class BulkExportTest(ExporterTestCase):
+    REQUEST = json.dumps({
+        'request': {'url': '$url/issue', 'data': {'fields': {'key': '$key', 'labels': ['$value']}}},
+        'bulk': {'url': '$url/issue/bulk', 'data': {'issueUpdates': '$items'}, 'size': 2, 'result': 'issues',
+                 'errors': 'errors', 'errors.index': 'failedElementNumber'}})
+
+    def bulk_server(self, status=201, headers=None):
+        def server(method, url, data=None, **kwargs):
+            items = json.loads(data)['issueUpdates']
+            if status != 201:
+                return response(status, {}, headers)
+            return response(201, {'issues': [{'id': item['fields']['key']} for item in items
+                                             if item['fields']['key'] != 'SP-1'],
+                                  'errors': [{'failedElementNumber': i} for i, item in enumerate(items)
+                                             if item['fields']['key'] == 'SP-1']})
+        return server
+
+    def perform_bulk(self, request_cfg=None, request=None):
+        with mock.patch('na3x.integration.throttle.time.sleep'):
+            return self.perform(dict(request_cfg if request_cfg else {}, **{'callback.update_src': True,
+                                                                            'callback.key': ['key']}),
+                                request if request else BulkExportTest.REQUEST)
+
+    def test_batches(self):
+        self.server.side_effect = self.bulk_server()
+        with self.assertRaises(Exception):
+            self.perform_bulk()
+        self.assertEqual([2, 1], [len(data['issueUpdates']) for method, url, data in self.sent()])
+        self.assertEqual({'SP-0': 'SP-0', 'SP-1': None, 'SP-2': 'SP-2'},
+                         {item['key']: item.get('id') for item in self.db.src.find()})
+
+    def test_processed_post_is_not_retried(self):
+        self.server.side_effect = self.bulk_server(500)
+        with self.assertRaises(Exception):
+            self.perform_bulk()
+        self.assertEqual(2, len(self.sent()))
+        self.server.side_effect = self.bulk_server(503)
+        with self.assertRaises(Exception):
+            self.perform_bulk()
+        self.assertEqual(2, len(self.sent()))
+
+    def test_rejected_post_is_retried(self):
+        server = self.bulk_server()
+        rejected = [response(429, {}, {'Retry-After': '1'})]
+        self.server.side_effect = lambda *args, **kwargs: rejected.pop() if rejected else server(*args, **kwargs)
+        self.db.src.delete_one({'key': 'SP-1'})
+        self.perform_bulk()
+        self.assertEqual(2, len(self.sent()))
+        self.assertEqual({'SP-0', 'SP-2'}, {item['id'] for item in self.db.src.find()})
+
+    def test_put_is_retried(self):
+        self.server.side_effect = self.bulk_server(500)
+        with self.assertRaises(Exception):
+            self.perform_bulk({'retry.max': 2}, BulkExportTest.REQUEST.replace('"size": 2', '"size": 2, "method": "put"'))
+        sent = self.sent()
+        self.assertEqual(6, len(sent))
+        self.assertEqual({'PUT'}, {method for method, url, data in sent})
+
+    def test_processed_create_entity_is_not_retried(self):
+        self.server.side_effect = lambda method, url, **kwargs: response(502, {})
+        with self.assertRaises(Exception), mock.patch('na3x.integration.throttle.time.sleep'):
+            self.perform({})
+        self.assertEqual(3, len(self.sent()))
+        with self.assertRaises(Exception), mock.patch('na3x.integration.throttle.time.sleep'):
+            self.perform({'type': 'set_field_value', 'retry.max': 1})
+        self.assertEqual(6, len(self.sent()))
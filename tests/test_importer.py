@@ -0,0 +1,90 @@
+import copy
+import requests
+from na3x.integration.importer import Importer
+from tests.helpers import MongoTestCase, SearchServer, SEARCH_CFG, http, issues
+
+
+class ImporterTestCase(MongoTestCase):
+    def perform(self, server, request_params, request_cfg=SEARCH_CFG):
+        request_params.update({'cfg': self.write_cfg('search.json', request_cfg), 'type': 'list', 'dest': 'issues'})
+        cfg = {'mapping': {'url': 'http://jira'}, 'db': MongoTestCase.DB, 'requests': {'search': request_params}}
+        with http(side_effect=server):
+            Importer(cfg, 'user', 'pswd').perform()
+
+    def keys(self, collection='issues'):
+        return sorted(item['key'] for item in self.db[collection].find())
+
+
+class StreamingImportTest(ImporterTestCase):
+    def test_pages_replace_destination(self):
+        self.db.issues.insert_one({'key': 'OLD-1'})
+        server = SearchServer(issues(5))
+        self.perform(server, {'streaming': True})
+        self.assertEqual(['SP-{:d}'.format(i) for i in range(5)], self.keys())
+        self.assertEqual(3, len(server.calls))
+        self.assertNotIn('issues.staging', self.db.list_collection_names())
+
+    def test_failure_keeps_destination(self):
+        self.db.issues.insert_one({'key': 'OLD-1'})
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.perform(SearchServer(issues(5), fail_at=2), {'streaming': True})
+        self.assertEqual(['OLD-1'], self.keys())
+        self.assertNotIn('issues.staging', self.db.list_collection_names())
+
+    def test_empty_result_drops_destination(self):
+        self.db.issues.insert_one({'key': 'OLD-1'})
+        self.perform(SearchServer([]), {'streaming': True})
+        self.assertEqual([], self.keys())
+
+    def test_same_result_as_reload(self):
+        self.perform(SearchServer(issues(5)), {'streaming': True})
+        streamed = list(self.db.issues.find({}, {'_id': False}))
+        self.perform(SearchServer(issues(5)), {})
+        self.assertEqual(list(self.db.issues.find({}, {'_id': False})), streamed)
+
+
+class IncrementalImportTest(ImporterTestCase):
+    INCREMENTAL = {'key': ['key'], 'watermark.field': 'updated', 'watermark.param': 'since',
+                   'tombstone.field': 'deleted'}
+
+    def setUp(self):
+        ImporterTestCase.setUp(self)
+        self.cfg = copy.deepcopy(SEARCH_CFG)
+        self.cfg['response']['issues']['fields']['root']['fields']['fields']['fields']['deleted'] = {
+            'key': 'deleted', 'type': 'string'}
+
+    def perform_incremental(self, server):
+        self.perform(server, {'incremental': dict(IncrementalImportTest.INCREMENTAL)}, self.cfg)
+
+    def issues(self, keys, updated, deleted=''):
+        return [{'key': key, 'summary': '{} {}'.format(key, updated), 'updated': updated, 'deleted': deleted}
+                for key in keys]
+
+    def test_first_import_uses_initial_watermark(self):
+        server = SearchServer(self.issues(['SP-1', 'SP-2', 'SP-3'], '2020-01-01 10:00'))
+        self.perform_incremental(server)
+        self.assertEqual(['SP-1', 'SP-2', 'SP-3'], self.keys())
+        self.assertEqual("updated >= '1970-01-01 00:00'", server.calls[0]['jql'])
+        self.assertEqual('2020-01-01 10:00', self.db['import.metadata'].find_one({'request': 'search'})['watermark'])
+
+    def test_changed_items_are_upserted(self):
+        self.perform_incremental(SearchServer(self.issues(['SP-1', 'SP-2'], '2020-01-01 10:00')))
+        server = SearchServer(self.issues(['SP-1'], '2020-01-01 09:00') +
+                              self.issues(['SP-2', 'SP-3'], '2020-01-02 10:00'))
+        self.perform_incremental(server)
+        self.assertEqual("updated >= '2020-01-01 10:00'", server.calls[0]['jql'])
+        self.assertEqual(['SP-1', 'SP-2', 'SP-3'], self.keys())
+        self.assertEqual('SP-1 2020-01-01 10:00', self.db.issues.find_one({'key': 'SP-1'})['summary'])
+        self.assertEqual('SP-2 2020-01-02 10:00', self.db.issues.find_one({'key': 'SP-2'})['summary'])
+        self.assertEqual('2020-01-02 10:00', self.db['import.metadata'].find_one({'request': 'search'})['watermark'])
+
+    def test_tombstones_are_deleted(self):
+        self.perform_incremental(SearchServer(self.issues(['SP-1', 'SP-2'], '2020-01-01 10:00')))
+        self.perform_incremental(SearchServer(self.issues(['SP-1'], '2020-01-02 10:00', deleted='true')))
+        self.assertEqual(['SP-2'], self.keys())
+
+    def test_failure_keeps_watermark(self):
+        self.perform_incremental(SearchServer(self.issues(['SP-1'], '2020-01-01 10:00')))
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.perform_incremental(SearchServer(self.issues(['SP-2', 'SP-3', 'SP-4'], '2020-01-02 10:00'), fail_at=2))
+        self.assertEqual('2020-01-01 10:00', self.db['import.metadata'].find_one({'request': 'search'})['watermark'])
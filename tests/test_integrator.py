@@ -0,0 +1,49 @@
+from na3x.integration.importer import Importer
+from na3x.integration.integrator import Integrator
+from tests.helpers import MongoTestCase, SearchServer, SEARCH_CFG, http, issues
+
+
+class IntegratorTest(MongoTestCase):
+    def importer(self, requests):
+        cfg = {'mapping': {'url': 'http://jira', 'since': ''}, 'db': MongoTestCase.DB, 'requests': requests}
+        return Importer(cfg, 'user', 'pswd')
+
+    def request(self, dest, **params):
+        params.update({'cfg': self.write_cfg('search.json', SEARCH_CFG), 'type': 'list', 'dest': dest})
+        return params
+
+    def perform(self, importer, server=None):
+        with http(side_effect=server if server else SearchServer(issues(3))):
+            importer.perform()
+
+    def test_summary(self):
+        importer = self.importer({'b': self.request('b', depends_on=['a']), 'a': self.request('a')})
+        self.perform(importer)
+        self.assertEqual(['b', 'a'], list(importer.summary.keys()))
+        self.assertEqual({Integrator.STATUS_DONE}, {summary['status'] for summary in importer.summary.values()})
+        self.assertEqual(3, self.db.b.count_documents({}))
+
+    def test_failed_request_configuration(self):
+        importer = self.importer({'a': {'cfg': 'search.json', 'dest': 'a'}, 'b': self.request('b', depends_on=['a']),
+                                  'c': {'type': 'list', 'dest': 'c'}})
+        with self.assertRaises(KeyError) as e:
+            self.perform(importer)
+        self.assertIn(e.exception.args[0], ['type', 'cfg'])
+        self.assertEqual(Integrator.STATUS_FAILED, importer.summary['a']['status'])
+        self.assertEqual(Integrator.STATUS_SKIPPED, importer.summary['b']['status'])
+        self.assertGreaterEqual(importer.summary['a']['time'], 0.0)
+
+    def test_failed_request(self):
+        importer = self.importer({'a': self.request('a'),
+                                  'b': dict(self.request('b'), cfg='missing.json')})
+        with self.assertRaises(FileNotFoundError):
+            self.perform(importer)
+        self.assertEqual(Integrator.STATUS_DONE, importer.summary['a']['status'])
+        self.assertEqual(Integrator.STATUS_FAILED, importer.summary['b']['status'])
+
+    def test_cyclic_dependencies(self):
+        importer = self.importer({'a': self.request('a', depends_on=['b']), 'b': self.request('b', depends_on=['a'])})
+        with self.assertRaises(ValueError):
+            self.perform(importer)
+        with self.assertRaises(ValueError):
+            self.perform(self.importer({'a': self.request('a', depends_on=['unknown'])}))
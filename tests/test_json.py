@@ -0,0 +1,91 @@
+import random
+import unittest
+from jsondiff.symbols import delete, insert, replace
+from na3x.utils.json import JSONUtils
+
+
+class DiffTest(unittest.TestCase):
+    def test_unchanged(self):
+        self.assertEqual({}, JSONUtils.diff({'l': [1, 2]}, {'l': [1, 2]}))
+        self.assertEqual({replace: {'a': 1}}, JSONUtils.diff({}, {'a': 1}))
+        self.assertEqual({replace: [1]}, JSONUtils.diff({'a': 1}, [1]))
+
+    def test_dict(self):
+        self.assertEqual({'a': 2, 'b': {'c': 2, 'd': 1}, delete: ['e']},
+                         JSONUtils.diff({'a': 1, 'b': {'c': 1}, 'e': 1}, {'a': 2, 'b': {'c': 2, 'd': 1}}))
+
+    def test_list_changed_in_place(self):
+        self.assertEqual({'l': {0: {'a': 2}}},
+                         JSONUtils.diff({'l': [{'a': 1, 'k': 0}, {'b': 2}]}, {'l': [{'a': 2, 'k': 0}, {'b': 2}]}))
+        self.assertEqual({'l': {0: {'v': 5}, 1: {'k': 3, delete: ['v']}}},
+                         JSONUtils.diff({'l': [{'k': 1, 'v': 1}, {'k': 2, 'v': 2}]}, {'l': [{'k': 1, 'v': 5}, {'k': 3}]}))
+
+    def test_list_replaced(self):
+        self.assertEqual({'l': [3, 4]}, JSONUtils.diff({'l': [1, 2]}, {'l': [3, 4]}))
+        self.assertEqual({'l': [{'b': 1}]}, JSONUtils.diff({'l': [{'a': 1}]}, {'l': [{'b': 1}]}))
+
+    def test_list_insert_delete(self):
+        self.assertEqual({'l': {insert: [(2, 4)]}}, JSONUtils.diff({'l': [1, 2, 3]}, {'l': [1, 2, 4, 3]}))
+        self.assertEqual({'l': {'$delete': [2]}}, JSONUtils.diff({'l': [1, 2, 3]}, {'l': [1, 3]}))
+        self.assertEqual({'l': {'$delete': [1, 2]}}, JSONUtils.diff({'l': [1, 2]}, {'l': []}))
+        self.assertEqual({'l': {insert: [(1, 5)], '$delete': [2]}}, JSONUtils.diff({'l': [1, 2, 3]}, {'l': [1, 5, 3]}))
+
+    def test_list_reorder(self):
+        self.assertEqual({'l': {insert: [(0, 3)], '$delete': [3]}}, JSONUtils.diff({'l': [1, 2, 3]}, {'l': [3, 1, 2]}))
+        self.assertEqual({'l': {insert: [(0, {'k': 2})], '$delete': [{'k': 2}]}},
+                         JSONUtils.diff({'l': [{'k': 1}, {'k': 2}]}, {'l': [{'k': 2}, {'k': 1}]}))
+
+    def test_nested_list_delete(self):
+        self.assertEqual({'o': {'l': {delete: [1]}}}, JSONUtils.diff({'o': {'l': [1, 2, 3]}}, {'o': {'l': [1, 3]}}))
+        self.assertEqual({'l': {0: {insert: [(1, 5)], delete: [1]}}},
+                         JSONUtils.diff({'l': [[1, 2, 3]]}, {'l': [[1, 5, 3]]}))
+        self.assertEqual({insert: [(2, 4)], delete: [0]}, JSONUtils.diff([1, 2, 3], [2, 3, 4]))
+
+    def test_keyed(self):
+        a = {'l': [{'key': 'SP-0', 'v': 1}, {'key': 'SP-1', 'v': 2}, {'key': 'SP-2', 'v': 3}]}
+        b = {'l': [{'key': 'SP-2', 'v': 3}, {'key': 'SP-0', 'v': 5}, {'key': 'SP-3'}]}
+        expected = {'l': {1: {'v': 5}, insert: [(2, {'key': 'SP-3'})], '$delete': [{'key': 'SP-1', 'v': 2}]}}
+        self.assertEqual(expected, JSONUtils.diff(a, b, 'key'))
+        self.assertEqual(expected, JSONUtils.diff(a, b, {'l': 'key'}))
+        self.assertEqual({'l': {}}, JSONUtils.diff(a, {'l': list(reversed(a['l']))}, 'key'))
+
+    def test_repeated_elements(self):
+        self.assertEqual({'l': {'$delete': [1]}}, JSONUtils.diff({'l': [1, 1, 2]}, {'l': [1, 2]}))
+        self.assertEqual({'l': {insert: [(2, 1)]}}, JSONUtils.diff({'l': [1, 2]}, {'l': [1, 2, 1]}))
+        self.assertEqual({'l': {0: {'v': 9}}}, JSONUtils.diff({'l': [{'v': 1}, {'v': 1}]}, {'l': [{'v': 9}, {'v': 1}]}))
+        self.assertEqual({'l': {1: {'v': 9}}},
+                         JSONUtils.diff({'l': [{'v': 1}, {'v': 1}, {'v': 1}]}, {'l': [{'v': 1}, {'v': 9}, {'v': 1}]}))
+
+
+class PatchTest(unittest.TestCase):
+    def assertRoundTrip(self, a, b, key=None):
+        patch = JSONUtils.patch(a, b, key)
+        self.assertEqual(b, JSONUtils.apply(a, patch))
+        return patch
+
+    def test_round_trip(self):
+        a = {'a': 1, 'b': {'c': [1, 2, 3]}, 'l': [{'key': 'SP-0', 'v': 1}, {'key': 'SP-1', 'v': [1]}], 'e': None}
+        for b in [{'a': 2, 'b': {'c': [3, 1, 4]}, 'l': [{'key': 'SP-1', 'v': [2]}, {'key': 'SP-2'}]},
+                  {'a': 1, 'b': [], 'l': [], 'e': None}, {}, a]:
+            self.assertRoundTrip(a, b)
+            self.assertRoundTrip(a, b, 'key')
+        self.assertRoundTrip([1, 2], {'a': 1})
+
+    def test_source_is_not_changed(self):
+        a = {'l': [{'key': 'SP-0', 'v': 1}]}
+        JSONUtils.apply(a, JSONUtils.patch(a, {'l': [{'key': 'SP-0', 'v': 2}]}, 'key'))
+        self.assertEqual({'l': [{'key': 'SP-0', 'v': 1}]}, a)
+
+    def test_keyed_patch(self):
+        patch = self.assertRoundTrip([{'key': 'SP-0', 'v': 1}, {'key': 'SP-1', 'v': 2}],
+                                     [{'key': 'SP-1', 'v': 2}, {'key': 'SP-0', 'v': 3}], 'key')
+        self.assertEqual({'$key': 'key', '$patch': [['SP-0', {'$set': {'v': 3}}]], '$order': ['SP-1', 'SP-0']}, patch)
+
+    def test_random_round_trip(self):
+        rnd = random.Random(0)
+        for _ in range(50):
+            a = [rnd.randint(0, 5) for _ in range(rnd.randint(0, 10))]
+            b = [rnd.randint(0, 5) for _ in range(rnd.randint(0, 10))]
+            self.assertRoundTrip(a, b)
+            self.assertRoundTrip({'l': [{'key': v % 3, 'v': v} for v in a]},
+                                 {'l': [{'key': v % 3, 'v': v} for v in b]}, 'key')
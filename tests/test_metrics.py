@@ -0,0 +1,76 @@
+import contextvars
+import json
+import os
+import threading
+import unittest
+from unittest import mock
+from na3x.integration.importer import Importer
+from na3x.integration.metrics import RequestMetrics
+from tests.helpers import MongoTestCase, SearchServer, SEARCH_CFG, http, issues
+
+
+class RequestMetricsTest(unittest.TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual([50, 95, 99, 100, 1], [RequestMetrics.percentile(values, pct) for pct in [50, 95, 99, 100, 0]])
+        self.assertEqual(7, RequestMetrics.percentile([7], 99))
+        self.assertIsNone(RequestMetrics.percentile([], 50))
+
+    def test_binding_is_context_local(self):
+        metrics = RequestMetrics()
+        RequestMetrics.bind(None, None, None)
+        self.assertIsNone(RequestMetrics.current())
+
+        def record(request_id):
+            RequestMetrics.bind(metrics, request_id, 'list')
+            for i in range(10):
+                RequestMetrics.current().record(0.1 * i, 200, 10)
+            RequestMetrics.current().record_pages(3)
+
+        threads = [threading.Thread(target=contextvars.copy_context().run, args=(record, request_id))
+                   for request_id in ['a', 'b']]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertIsNone(RequestMetrics.current())
+        summary = {series['request']: series for series in metrics.summary()}
+        self.assertEqual({'a', 'b'}, set(summary.keys()))
+        self.assertEqual(10, summary['a']['count'])
+        self.assertEqual({'200': 10}, summary['a']['status'])
+        self.assertEqual(100, summary['a']['bytes']['total'])
+        self.assertAlmostEqual(0.4, summary['a']['latency']['p50'])
+        self.assertEqual(3, summary['a']['pages'])
+
+    def test_export(self):
+        metrics = RequestMetrics()
+        RequestMetrics.bind(metrics, 'issues', 'list')
+        self.addCleanup(RequestMetrics.bind, None, None, None)
+        metrics.record(0.5, 200, 100)
+        metrics.record(1.5, 0, 0)
+        metrics.record_retry()
+        with mock.patch('builtins.open', mock.mock_open()) as file:
+            metrics.to_prometheus('metrics.prom')
+        text = ''.join(call[0][0] for call in file().write.call_args_list)
+        self.assertIn('na3x_request_latency_seconds{request="issues",type="list",quantile="0.5"} 0.5', text)
+        self.assertIn('na3x_request_latency_seconds_sum{request="issues",type="list"} 2.0', text)
+        self.assertIn('na3x_request_status_total{request="issues",type="list",status="0"} 1', text)
+        self.assertIn('na3x_request_retries_total{request="issues",type="list"} 1', text)
+        self.assertNotIn('na3x_request_pages{', text)
+
+
+class ImportMetricsTest(MongoTestCase):
+    def test_import(self):
+        cfg = {'mapping': {'url': 'http://jira', 'since': ''}, 'db': MongoTestCase.DB,
+               'metrics.json': os.path.join(self.tmp, 'metrics.json'),
+               'requests': {'search': {'cfg': self.write_cfg('search.json', SEARCH_CFG), 'type': 'list',
+                                       'dest': 'issues'}}}
+        importer = Importer(cfg, 'user', 'pswd')
+        with http(side_effect=SearchServer(issues(5))):
+            importer.perform()
+        with open(cfg['metrics.json']) as file:
+            summary = json.load(file)
+        self.assertEqual(importer.metrics.summary(), summary)
+        self.assertEqual([('search', 'list', 3, 3, {'200': 3})],
+                         [(series['request'], series['type'], series['count'], series['pages'], series['status'])
+                          for series in summary])
@@ -0,0 +1,161 @@
+import copy
+import unittest
+from unittest import mock
+import requests
+from na3x.integration.request import Field, ImportRequest
+from tests.helpers import SearchServer, SEARCH_CFG, http, issues, response
+
+
+class CompiledFieldTest(unittest.TestCase):
+    RESPONSE = {
+        'type': 'object', 'fields': {
+            'key': {'key': 'key', 'type': 'string'},
+            'estimate': {'key': 'estimate', 'type': 'float'},
+            'points': {'key': 'points', 'type': 'int'},
+            'created': {'key': 'created', 'type': 'datetime'},
+            'due': {'key': 'due', 'type': 'date'},
+            'assignee': {'key': 'assignee', 'type': 'object', 'optional': True, 'fields': {
+                'assignee': {'key': 'name', 'type': 'string'}}},
+            'sprint': {'key': 'sprint', 'ext_id': 'sprint_info', 'type': 'object', 'explicit': True, 'fields': {
+                'name': {'key': 'name', 'type': 'string'},
+                'id': {'key': 'id', 'type': 'int'}}},
+            'labels': {'key': 'labels', 'type': 'array'},
+            'links': {'key': 'links', 'type': 'array', 'match': {'type': 'object'}, 'fields': {'link': {
+                'type': 'object', 'explicit': True, 'fields': {
+                    'type': {'key': 'type', 'type': 'string'},
+                    'target': {'key': 'target', 'type': 'string'}}}}},
+            'versions': {'key': 'versions', 'type': 'array', 'match': {'type': 'object', 'required': ['id']},
+                         'fields': {'version': {'key': 'id', 'type': 'string'}}}}}
+    DATA = [
+        {'key': 'SP-1', 'estimate': '1.5', 'points': '3', 'created': '2020-01-01T10:00:00.000+0000',
+         'due': '2020-01-10', 'assignee': {'name': 'user'}, 'sprint': {'name': 'sprint 1', 'id': '1'},
+         'labels': ['a', 'b'], 'links': [{'type': 'blocks', 'target': 'SP-2'}, 'bad', {'type': 'relates', 'target': 'SP-3'}],
+         'versions': [{'id': 1}, {'name': 'no id'}, {'id': '2'}]},
+        {'key': 'SP-2', 'estimate': None, 'points': None, 'created': None, 'due': None, 'assignee': None,
+         'sprint': {'name': None, 'id': None}, 'labels': [], 'links': [], 'versions': []},
+        {'key': 'SP-3', 'estimate': 2, 'points': 5, 'created': '2020-01-01T10:00:00', 'due': '2020-01-10',
+         'sprint': {'name': 'sprint 2', 'id': 2}, 'labels': ['c'], 'links': [], 'versions': [{'id': 3}]}
+    ]
+
+    def parse(self, data, field_cfg, target):
+        parsed = copy.deepcopy(target)
+        compiled = copy.deepcopy(target)
+        Field.parse_field(data, field_cfg, parsed)
+        Field.compile(field_cfg)(data, compiled)
+        return parsed, compiled
+
+    def test_object(self):
+        for data in CompiledFieldTest.DATA:
+            parsed, compiled = self.parse(data, CompiledFieldTest.RESPONSE, {})
+            self.assertEqual(parsed, compiled)
+        parsed, compiled = self.parse(CompiledFieldTest.DATA[0], CompiledFieldTest.RESPONSE, {})
+        self.assertEqual(['blocks', 'relates'], [link['type'] for link in compiled['links']])
+        self.assertEqual([1, '2'], compiled['versions'])
+        self.assertEqual({'name': 'sprint 1', 'id': 1}, compiled['sprint_info'])
+
+    def test_array(self):
+        response_cfg = {'type': 'array', 'fields': {'root': dict(CompiledFieldTest.RESPONSE, explicit=True)}}
+        parsed, compiled = self.parse(CompiledFieldTest.DATA, response_cfg, [])
+        self.assertEqual(parsed, compiled)
+        self.assertEqual(['SP-1', 'SP-2', 'SP-3'], [item['key'] for item in compiled])
+
+    def test_errors(self):
+        for data, field_cfg in [({}, {'key': 'key', 'type': 'string'}),
+                                ({'points': 'x'}, {'key': 'points', 'type': 'int'}),
+                                ({'items': 'x'}, {'key': 'items', 'type': 'array', 'fields': {'item': {
+                                    'key': 'id', 'type': 'string'}}}),
+                                ({}, {'key': 'sprint', 'type': 'object', 'fields': {}}),
+                                ({'key': 'a'}, {'key': 'key'})]:
+            errors = []
+            for parse in [lambda: Field.parse_field(data, field_cfg, {}), lambda: Field.compile(field_cfg)(data, {})]:
+                try:
+                    parse()
+                    errors.append(None)
+                except Exception as e:
+                    errors.append(type(e))
+            self.assertIsNotNone(errors[0], field_cfg)
+            self.assertEqual(errors[0], errors[1], field_cfg)
+
+    def test_compile_match(self):
+        is_object = Field.compile_match({'type': 'object'})
+        self.assertTrue(is_object({}))
+        self.assertFalse(is_object([]))
+        is_versioned = Field.compile_match({'type': 'object', 'required': ['id']})
+        for value in [{'id': 1}, {}, 'id']:
+            self.assertEqual(Field.is_match({'type': 'object', 'required': ['id']}, value), is_versioned(value))
+        self.assertTrue(Field.compile_match(None)('anything'))
+
+
+class StreamingListRequestTest(unittest.TestCase):
+    def request(self, server, stream, page_handler=None):
+        cfg = copy.deepcopy(SEARCH_CFG)
+        cfg['request']['url'] = 'http://jira/search'
+        cfg['request']['data']['jql'] = "updated >= ''"
+        cfg['request']['stream'] = stream
+        cfg['response']['issues']['fields']['root']['fields']['fields']['fields'].update({
+            'points': {'key': 'points', 'type': 'float'},
+            'labels': {'key': 'labels', 'type': 'array'},
+            'links': {'key': 'links', 'type': 'array', 'fields': {'link': {
+                'type': 'object', 'explicit': True, 'fields': {'target': {'key': 'target', 'type': 'string'}}}}}})
+        with http(side_effect=server) as request:
+            result = ImportRequest.factory(cfg, 'user', 'pswd', ImportRequest.TYPE_GET_LIST, page_handler).result
+        return result, request
+
+    def issues(self):
+        return [dict(issue, points=i / 2, labels=['a', {'b': [1]}], links=[{'target': 'SP-{:d}'.format(i + 1)}])
+                for i, issue in enumerate(issues(5))]
+
+    def test_same_result_as_buffered(self):
+        streamed, request = self.request(SearchServer(self.issues()), True)
+        self.assertTrue(all(call[1]['stream'] for call in request.call_args_list))
+        buffered, _ = self.request(SearchServer(self.issues()), False)
+        self.assertEqual(buffered, streamed)
+        self.assertEqual(5, len(streamed))
+        self.assertEqual(3, request.call_count)
+        self.assertIsInstance(streamed[1]['points'], float)
+
+    def test_pages(self):
+        pages = []
+        result, _ = self.request(SearchServer(self.issues()), True, pages.append)
+        self.assertEqual([], result)
+        self.assertEqual([2, 2, 1], [len(page) for page in pages])
+
+    def test_error_status(self):
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.request(SearchServer(self.issues(), fail_at=0), True)
+
+    def test_ijson_is_required(self):
+        with mock.patch('na3x.integration.request.ijson', None):
+            with self.assertRaises(ImportError):
+                self.request(SearchServer(self.issues()), True)
+
+
+class FieldNarrowingTest(unittest.TestCase):
+    def request(self, update=None, item_fields=None):
+        cfg = copy.deepcopy(SEARCH_CFG)
+        cfg['request']['url'] = 'http://jira/search'
+        cfg['request']['data']['jql'] = "updated >= ''"
+        cfg['request'].update(update if update else {})
+        if item_fields:
+            cfg['response']['issues']['fields']['root']['fields'].update(item_fields)
+        server = SearchServer([dict(issue, status='open') for issue in issues(3)])
+        with http(side_effect=server):
+            result = ImportRequest.factory(cfg, 'user', 'pswd', ImportRequest.TYPE_GET_LIST).result
+        self.assertEqual(3, len(result))
+        return [call.get('fields') for call in server.calls]
+
+    def test_fields_are_restricted(self):
+        self.assertEqual(['summary,updated', 'summary,updated'], self.request())
+
+    def test_several_containers(self):
+        fields = self.request(item_fields={'info': {'type': 'object', 'fields': {
+            'status': {'key': 'fields', 'type': 'object', 'optional': True, 'fields': {
+                'status': {'key': 'status', 'type': 'string'}}}}}})
+        self.assertEqual('status,summary,updated', fields[0])
+        self.assertEqual(fields[0], fields[1])
+
+    def test_not_restricted(self):
+        self.assertEqual([None, None], self.request({'narrow': False}))
+        self.assertEqual(['key', 'key'], self.request({'data': {'jql': "updated >= ''", 'maxResults': 2,
+                                                                 'fields': 'key'}}))
+        self.assertEqual([None, None], self.request(item_fields={'all': {'key': 'fields', 'type': 'array'}}))
@@ -0,0 +1,63 @@
+import os
+import sys
+import unittest
+import requests
+from na3x.integration.request import BulkExportRequest, ExportRequest, ImportRequest
+from na3x.integration.throttle import RetryPolicy
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+from stub_server import StubServer
+
+
+class StubServerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StubServer(issues=7, payload_size=20, seed=1).start()
+        self.addCleanup(self.server.stop)
+
+    def test_search(self):
+        pages = [requests.get('{}/rest/api/2/search'.format(self.server.url), params={'startAt': start_at,
+                                                                                      'maxResults': 5}).json()
+                 for start_at in [0, 5]]
+        self.assertEqual([(0, 5, 7, 5), (5, 5, 7, 2)], [(page['startAt'], page['maxResults'], page['total'],
+                                                         len(page['issues'])) for page in pages])
+        self.assertEqual('PRJ-6', pages[1]['issues'][-1]['key'])
+        self.assertEqual(20, len(pages[0]['issues'][0]['fields']['description']))
+        self.assertEqual(2, self.server.requests)
+
+    def test_list_import(self):
+        cfg = {'request': {'url': '{}/rest/api/2/search'.format(self.server.url), 'data': {'maxResults': 3,
+                                                                                          'startAt': 0}},
+               'response': {'content-root': 'issues', 'issues': {'type': 'array', 'fields': {'root': {
+                   'type': 'object', 'explicit': True, 'fields': {
+                       'key': {'key': 'key', 'type': 'string'},
+                       'fields': {'key': 'fields', 'type': 'object', 'fields': {
+                           'points': {'key': 'customfield_10002', 'type': 'float'},
+                           'updated': {'key': 'updated', 'type': 'datetime'}}}}}}}}}
+        result = ImportRequest.factory(cfg, 'user', 'pswd', ImportRequest.TYPE_GET_LIST).result
+        self.assertEqual(['PRJ-{:d}'.format(i) for i in range(7)], [item['key'] for item in result])
+        self.assertEqual(3, self.server.requests)
+
+    def test_export(self):
+        url = '{}/rest/api/2/issue'.format(self.server.url)
+        created = ExportRequest.factory({'request': {'url': url, 'data': {'fields': {}}}}, 'user', 'pswd',
+                                        ExportRequest.TYPE_CREATE_ENTITY).result
+        self.assertEqual({'id': '1', 'key': 'NEW-1'}, created)
+        ExportRequest.factory({'request': {'url': '{}/PRJ-1'.format(url), 'data': {'fields': {}}}}, 'user', 'pswd',
+                              ExportRequest.TYPE_SET_FIELD_VALUE)
+        cfgs = [{'request': {'url': url, 'data': {'fields': {'summary': str(i)}}},
+                 'bulk': {'url': '{}/bulk'.format(url), 'data': {'issueUpdates': '$items'}, 'size': 10,
+                          'result': 'issues'}} for i in range(3)]
+        self.assertEqual(['NEW-2', 'NEW-3', 'NEW-4'],
+                         [item['key'] for item in BulkExportRequest(cfgs, 'user', 'pswd').result])
+        with self.assertRaises(requests.exceptions.HTTPError):
+            ExportRequest.factory({'request': {'url': '{}/rest/api/2/unknown'.format(self.server.url)}}, 'user',
+                                  'pswd', ExportRequest.TYPE_CREATE_RELATION)
+
+    def test_errors_are_retried(self):
+        self.server.error_rate = 1.0
+        url = '{}/rest/api/2/issue'.format(self.server.url)
+        with self.assertRaises(requests.exceptions.HTTPError) as e:
+            RetryPolicy(2, 0).call(lambda: ExportRequest.factory(
+                {'request': {'url': url, 'data': {}}}, 'user', 'pswd', ExportRequest.TYPE_CREATE_ENTITY), method='POST')
+        self.assertEqual(503, e.exception.response.status_code)
+        self.assertEqual(0, RetryPolicy.retry_after(e.exception))
+        self.assertEqual(3, self.server.requests)
@@ -0,0 +1,78 @@
+import copy
+from na3x.db.data import CRUD
+from na3x.validation.sweep import Sweep
+from tests.helpers import MongoTestCase
+from tests.test_validator import ValidatorTestCase
+
+
+class SweepTest(ValidatorTestCase):
+    def setUp(self):
+        ValidatorTestCase.setUp(self)
+        self.db.assignments.insert_many(copy.deepcopy(list(reversed(self.objs))))
+        self.expected = {obj['key']: res for obj, res in
+                         zip(self.objs, self.validator(memo=False).validate_batch(self.objs, is_by_check=True))}
+
+    def sweep(self, **cfg):
+        cfg.update({'db': 'db', 'collection': 'assignments', 'key': 'key', 'results': 'violations',
+                    'validation': copy.deepcopy(ValidatorTestCase.CFG)})
+        return Sweep(cfg).perform()
+
+    def violations(self):
+        res = {}
+        for doc in self.db.violations.find({'type': 'violation'}, {'_id': False}):
+            res.setdefault(doc['key'], {}).setdefault(doc['check'], []).append(
+                (doc['index'], {'severity': doc['severity'], 'message': doc['message']}))
+        return {key: {check: [violation for _, violation in sorted(violations, key=lambda v: v[0])]
+                      for check, violations in checks.items()} for key, checks in res.items()}
+
+    def test_same_result_as_validate(self):
+        for chunk, workers in [(2, 1), (2, 3), (500, 2)]:
+            summary = self.sweep(chunk=chunk, workers=workers)
+            self.assertEqual({key: res for key, res in self.expected.items() if res}, self.violations())
+            self.assertEqual(9, summary['documents'])
+            self.assertEqual('SP-8', summary['last_key'])
+            self.assertEqual(sum(len(v) for res in self.expected.values() if res for v in res.values()),
+                             summary['violations'])
+            self.assertEqual(summary['violations'], sum(summary['severity'].values()))
+            self.assertEqual(summary['violations'], sum(summary['check'].values()))
+            self.assertEqual({'error', 'warning'}, set(summary['severity'].keys()))
+            self.assertGreater(summary['documents_per_second'], 0)
+            self.assertEqual('SP-8', CRUD.read_single(self.db, 'violations', {'type': 'progress'})['last_key'])
+
+    def test_match(self):
+        summary = self.sweep(chunk=2, match={'group': 'ui'})
+        self.assertEqual(4, summary['documents'])
+        self.assertEqual({key: res for key, res in self.expected.items() if res and int(key[3:]) % 2},
+                         self.violations())
+
+    def test_resume(self):
+        self.sweep(chunk=2)
+        self.db.violations.delete_many({'type': 'violation', 'key': {'$gt': 'SP-4'}})
+        self.db.violations.update_one({'type': 'progress'}, {'$set': {'last_key': 'SP-4'}})
+        summary = self.sweep(chunk=2, resume=True)
+        self.assertEqual(4, summary['documents'])
+        self.assertEqual('SP-8', summary['last_key'])
+        self.assertEqual({key: res for key, res in self.expected.items() if res}, self.violations())
+
+    def test_results_are_cleared_per_sweep(self):
+        self.db.violations.insert_many([{'type': 'violation', 'sweep': 'other', 'key': 'SP-0'},
+                                        {'type': 'violation', 'sweep': 'assignments', 'key': 'SP-100'}])
+        self.sweep()
+        self.assertEqual(1, self.db.violations.count_documents({'sweep': 'other'}))
+        self.assertEqual(0, self.db.violations.count_documents({'key': 'SP-100'}))
+
+    def test_empty_collection(self):
+        self.db.assignments.drop()
+        summary = self.sweep()
+        self.assertEqual(0, summary['documents'])
+        self.assertIsNone(summary['last_key'])
+
+
+class ReadChunkTest(MongoTestCase):
+    def test_read_chunk(self):
+        self.db.items.insert_many([{'key': i, 'odd': bool(i % 2)} for i in reversed(range(7))])
+        self.assertEqual([0, 1, 2], [doc['key'] for doc in CRUD.read_chunk(self.db, 'items', 'key', size=3)])
+        self.assertEqual([3, 4, 5], [doc['key'] for doc in CRUD.read_chunk(self.db, 'items', 'key', 2, 3)])
+        self.assertEqual([3, 5], [doc['key'] for doc in CRUD.read_chunk(self.db, 'items', 'key', 1, 2, {'odd': True})])
+        self.assertEqual([], CRUD.read_chunk(self.db, 'items', 'key', 6))
+        self.assertNotIn('_id', CRUD.read_chunk(self.db, 'items', 'key', size=1)[0])
@@ -0,0 +1,112 @@
+import time
+import unittest
+from unittest import mock
+import requests
+from na3x.integration.throttle import RateLimiter, RetryPolicy, TokenBucket
+
+
+def http_error(status, headers=None):
+    response = requests.models.Response()
+    response.status_code = status
+    response.headers.update(headers if headers else {})
+    return requests.exceptions.HTTPError('{:d}'.format(status), response=response)
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=50, burst=2)
+        started_at = time.monotonic()
+        for i in range(4):
+            bucket.acquire()
+        # 2 tokens are available immediately, 2 more are added at 50/s
+        self.assertGreaterEqual(time.monotonic() - started_at, 0.03)
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_unlimited(self):
+        limiter = RateLimiter()
+        started_at = time.monotonic()
+        for i in range(100):
+            limiter.acquire('http://jira/rest/api/2/issue')
+        self.assertLess(time.monotonic() - started_at, 0.1)
+
+    def test_bucket_per_host(self):
+        limiter = RateLimiter(rate=1, burst=1)
+        started_at = time.monotonic()
+        limiter.acquire('http://jira/rest/api/2/issue/1')
+        limiter.acquire('http://confluence/rest/api/content/1')
+        self.assertLess(time.monotonic() - started_at, 0.5)
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def setUp(self):
+        sleep = mock.patch('na3x.integration.throttle.time.sleep')
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def call(self, errors, method=None, max_retries=3):
+        attempts = []
+
+        def func():
+            attempts.append(len(attempts))
+            if len(attempts) <= len(errors):
+                raise errors[len(attempts) - 1]
+            return 'ok'
+        try:
+            return RetryPolicy(max_retries, backoff=0.01).call(func, method=method), len(attempts)
+        except Exception as e:
+            return e, len(attempts)
+
+    def test_retries_transient_errors(self):
+        res, attempts = self.call([http_error(502), requests.exceptions.ConnectionError(), http_error(503)])
+        self.assertEqual(('ok', 4), (res, attempts))
+
+    def test_retries_exhausted(self):
+        res, attempts = self.call([http_error(500)] * 3, max_retries=2)
+        self.assertIsInstance(res, requests.exceptions.HTTPError)
+        self.assertEqual(3, attempts)
+
+    def test_client_error_not_retried(self):
+        res, attempts = self.call([http_error(400)])
+        self.assertIsInstance(res, requests.exceptions.HTTPError)
+        self.assertEqual(1, attempts)
+
+    def test_idempotent_method_retried(self):
+        res, attempts = self.call([http_error(500), requests.exceptions.ReadTimeout()], method='PUT')
+        self.assertEqual(('ok', 3), (res, attempts))
+
+    def test_post_not_retried_if_could_be_processed(self):
+        for error in [http_error(500), http_error(502), http_error(504), http_error(503),
+                      requests.exceptions.ReadTimeout(), requests.exceptions.ConnectionError()]:
+            res, attempts = self.call([error], method='POST')
+            self.assertIs(error, res)
+            self.assertEqual(1, attempts)
+
+    def test_post_retried_if_rejected(self):
+        res, attempts = self.call([http_error(429, {'Retry-After': '1'}), http_error(503, {'Retry-After': '2'}),
+                                   requests.exceptions.ConnectTimeout()], method='post')
+        self.assertEqual(('ok', 4), (res, attempts))
+
+    def test_retry_after_seconds(self):
+        self.call([http_error(429, {'Retry-After': '7'})])
+        self.sleep.assert_called_once_with(7.0)
+
+    def test_retry_after_date(self):
+        self.assertEqual(0.0, RetryPolicy.retry_after(http_error(503, {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})))
+
+    def test_malformed_retry_after(self):
+        for value in ['soon', '', 'Wed, 99 Foo 2015 07:28:00 GMT']:
+            self.assertIsNone(RetryPolicy.retry_after(http_error(503, {'Retry-After': value})))
+            res, attempts = self.call([http_error(503, {'Retry-After': value})])
+            self.assertEqual(('ok', 2), (res, attempts))
+            self.assertLessEqual(self.sleep.call_args[0][0], 0.01)
+
+    def test_backoff_delay(self):
+        policy = RetryPolicy(backoff=1, max_backoff=4)
+        for attempt, limit in [(1, 1), (2, 2), (3, 4), (10, 4)]:
+            for i in range(20):
+                self.assertTrue(0 <= policy.delay(attempt) <= limit)
+
+
+if __name__ == '__main__':
+    unittest.main()
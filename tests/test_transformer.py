@@ -0,0 +1,33 @@
+import datetime
+import unittest
+from na3x.transformation.transformer import format, regexp
+
+
+class FormatTest(unittest.TestCase):
+    PARAMS = {'format.string': '{} - {}', 'result.field': 'title',
+              'format.input': [{'field': 'key', 'type': 'string'}, {'field': 'start', 'type': 'string'}]}
+
+    def rows(self):
+        return [{'key': 'SP-{:d}'.format(i), 'start': datetime.date(2017, 10, i + 1)} for i in range(3)]
+
+    def test_format(self):
+        rows = self.rows()
+        self.assertIs(rows, format(rows, FormatTest.PARAMS))
+        self.assertEqual(['SP-0 - 2017-10-01', 'SP-1 - 2017-10-02', 'SP-2 - 2017-10-03'], [row['title'] for row in rows])
+
+    def test_iterable(self):
+        res = format((row for row in self.rows()), FormatTest.PARAMS)
+        self.assertEqual(['SP-0 - 2017-10-01', 'SP-1 - 2017-10-02', 'SP-2 - 2017-10-03'], [row['title'] for row in res])
+
+    def test_no_input(self):
+        res = format(self.rows(), {'format.string': 'const', 'result.field': 'title', 'format.input': []})
+        self.assertEqual(['const'] * 3, [row['title'] for row in res])
+
+
+class RegexpTest(unittest.TestCase):
+    def test_regexp(self):
+        params = {'input.field': 'name', 'pattern': r'Sprint (\d+) \((\d{4}-\d{2}-\d{2})\)',
+                  'output': [{'field': 'sprint', 'idx': 0, 'type': 'int'}, {'field': 'start', 'idx': 1, 'type': 'date'}]}
+        rows = (row for row in [{'name': 'Sprint 1 (2017-10-01)'}, {'name': 'Sprint 2 (2017-10-15)'}])
+        self.assertEqual([{'sprint': 1, 'start': datetime.datetime(2017, 10, 1)},
+                          {'sprint': 2, 'start': datetime.datetime(2017, 10, 15)}], regexp(rows, params))
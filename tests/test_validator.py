@@ -0,0 +1,245 @@
+import copy
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from na3x.db.data import Accessor
+from na3x.validation.validator import Prefetch, Validator, WhatIf
+from tests.helpers import MongoTestCase
+
+
+class ValidatorTestCase(MongoTestCase):
+    CFG = {'checks': {
+        'expertise': {
+            'constraint': {'func': 'na3x.validation.validator.extract',
+                           'params': {'db': 'db', 'collection': 'backlog', 'match': ['key'], 'field': 'components'},
+                           'default': []},
+            'to_validate': {'func': 'na3x.validation.validator.extract',
+                            'params': {'db': 'db', 'collection': 'team', 'match': ['group'], 'field': 'components'},
+                            'default': []},
+            'compare': {'func': 'na3x.validation.validator.no_intersection',
+                        'violation': {'severity': 'warning', 'message': 'Task requires {} component(s) expertise'}}},
+        'capacity': {
+            'constraint': {'func': 'na3x.validation.validator.extract',
+                           'params': {'db': 'db', 'collection': 'team', 'match': ['group'], 'field': 'capacity'},
+                           'default': 0},
+            'to_validate': {'func': 'na3x.validation.validator.aggregate',
+                            'params': {'extract': {'db': 'db', 'collection': 'allocation', 'match': ['group']},
+                                       'substitute': {'match': ['key'], 'field': 'hours'},
+                                       'aggregate': {'field': 'hours', 'func': 'sum'}},
+                            'default': 0},
+            'compare': {'func': 'na3x.validation.validator.limit_exceed',
+                        'violation': {'severity': 'error', 'message': 'Capacity {} is exceeded'}}}}}
+
+    def setUp(self):
+        MongoTestCase.setUp(self)
+        self.db.team.insert_many([{'group': 'backend', 'components': ['api', 'db'], 'capacity': 10},
+                                  {'group': 'ui', 'components': ['ui'], 'capacity': 5}])
+        self.db.backlog.insert_many([{'key': 'SP-{:d}'.format(i), 'components': [['api'], ['ui'], ['db']][i % 3]}
+                                     for i in range(9)])
+        self.db.allocation.insert_many([{'group': 'backend', 'key': 'SP-0', 'hours': 4},
+                                        {'group': 'backend', 'key': 'SP-2', 'hours': 4},
+                                        {'group': 'ui', 'key': 'SP-1', 'hours': 3}])
+        self.objs = [{'key': 'SP-{:d}'.format(i), 'group': ['backend', 'ui'][i % 2], 'hours': i} for i in range(9)]
+
+    def validator(self, **cfg):
+        cfg.update(copy.deepcopy(ValidatorTestCase.CFG))
+        return Validator(cfg)
+
+    def count_reads(self):
+        reads = mock.patch.object(Accessor, 'get', autospec=True, side_effect=Accessor.get)
+        self.addCleanup(reads.stop)
+        return reads.start()
+
+
+class BatchValidationTest(ValidatorTestCase):
+    def test_same_result_as_validate(self):
+        validator = self.validator(memo=False)
+        expected = [validator.validate(obj) for obj in self.objs]
+        self.assertEqual(expected, validator.validate_batch(self.objs))
+        self.assertTrue(any(expected))
+        self.assertTrue(not all(expected))
+        self.assertEqual('Capacity 5 is exceeded', expected[7][0]['message'])
+
+    def test_lookups_are_prefetched(self):
+        validator = self.validator(memo=False)
+        reads = self.count_reads()
+        validator.validate_batch(self.objs)
+        self.assertEqual(3, reads.call_count)  # backlog by key, team by group, allocation by group
+
+    def test_by_check(self):
+        res = self.validator().validate_batch(self.objs, is_by_check=True)
+        self.assertIsNone(res[1])
+        self.assertEqual({'expertise', 'capacity'}, set(res[3].keys()))
+        self.assertEqual({'capacity'}, set(res[7].keys()))
+
+    def test_prefetch(self):
+        prefetch = Prefetch()
+        cfg = {'db': 'db', 'collection': 'backlog', 'match': ['key'], 'type': 'single'}
+        prefetch.load(cfg, self.objs + [{'key': ['SP-0']}, {'key': {'id': 1}}])
+        self.assertEqual((False, None), prefetch.lookup({'key': 'SP-0'}, dict(cfg, match=['id'])))
+        self.assertEqual((False, None), prefetch.lookup({'key': 'SP-100'}, cfg))
+        self.assertEqual((False, None), prefetch.lookup({'key': ['SP-0']}, cfg))
+        self.assertEqual((False, None), prefetch.lookup({'key': {'id': 1}}, cfg))
+        is_prefetched, doc = prefetch.lookup({'key': 'SP-0'}, cfg)
+        self.assertTrue(is_prefetched)
+        doc['components'].pop()
+        self.assertEqual(['api'], prefetch.lookup({'key': 'SP-0'}, cfg)[1]['components'])
+        self.assertEqual([['api']], [doc['components'] for doc in prefetch.lookup({'key': 'SP-0'},
+                                                                                  dict(cfg, type='multi'))[1]])
+
+    def test_prefetch_array_field(self):
+        self.db.sprint.insert_one({'sprint': 1, 'keys': ['SP-0', 'SP-1']})
+        prefetch = Prefetch()
+        cfg = {'db': 'db', 'collection': 'sprint', 'match': ['keys'], 'type': 'multi'}
+        prefetch.load(cfg, [{'keys': 'SP-0'}, {'keys': 'SP-1'}, {'keys': 'SP-2'}])
+        self.assertEqual([1], [doc['sprint'] for doc in prefetch.lookup({'keys': 'SP-1'}, cfg)[1]])
+        self.assertEqual((True, []), prefetch.lookup({'keys': 'SP-2'}, cfg))
+
+
+class GetterMemoTest(ValidatorTestCase):
+    def test_memo_within_run(self):
+        expected = [self.validator(memo=False).validate(obj) for obj in self.objs]
+        validator = self.validator()
+        self.assertEqual(expected * 2, validator.validate_batch(self.objs * 2))
+        # backlog by key (9), team components and capacity by group (2 + 2), allocation by group, key, hours (9)
+        self.assertEqual(22, validator.memo.stats['miss'])
+        self.assertEqual(4 * 18 - 22, validator.memo.stats['hit'])
+
+    def test_memo_key_uses_input_fields(self):
+        validator = self.validator()
+        reads = self.count_reads()
+        self.assertEqual([None, None], validator.validate_batch([{'key': 'SP-0', 'group': 'backend', 'hours': 1,
+                                                                  'note': note} for note in ['a', 'b']]))
+        self.assertEqual(3, reads.call_count)
+        self.assertEqual({'hit': 4, 'miss': 4, 'hit_ratio': 0.5}, validator.memo.stats)
+
+    def test_memo_is_dropped_after_write(self):
+        validator = self.validator(**{'memo.ttl': 60})
+        obj = {'key': 'SP-3', 'group': 'backend', 'hours': 1}
+        self.assertIsNone(validator.validate(obj))
+        self.assertIsNone(validator.validate(obj))
+        self.assertEqual(4, validator.memo.stats['hit'])
+        Accessor.factory('db').upsert({'collection': 'team', 'match': {'group': 'backend'}, 'type': 'single',
+                                       'object': {'capacity': 5}})
+        self.assertEqual('Capacity 5 is exceeded', validator.validate(obj)[0]['message'])
+        self.assertEqual(4, validator.memo.stats['hit'])
+
+    def test_memo_ttl(self):
+        validator = self.validator(**{'memo.ttl': 60})
+        obj = {'key': 'SP-3', 'group': 'backend', 'hours': 1}
+        validator.validate(obj)
+        with mock.patch('na3x.validation.validator.time.monotonic', return_value=10 ** 9):
+            validator.validate(obj)
+        self.assertEqual(0, validator.memo.stats['hit'])
+
+    def test_memo_disabled(self):
+        validator = self.validator(memo=False)
+        validator.validate_batch(self.objs)
+        self.assertIsNone(validator.memo)
+
+
+class ConcurrentChecksTest(ValidatorTestCase):
+    def test_same_result_as_sequential(self):
+        expected = self.validator().validate_batch(self.objs)
+        validator = self.validator(**{'checks.concurrency': 4})
+        self.assertEqual(expected, validator.validate_batch(self.objs))
+        self.assertEqual([self.validator().validate(obj) for obj in self.objs],
+                         [validator.validate(obj) for obj in self.objs])
+
+    def test_executor_is_reused(self):
+        validator = self.validator(**{'checks.concurrency': 4})
+        with mock.patch('na3x.validation.validator.ThreadPoolExecutor', wraps=ThreadPoolExecutor) as pool:
+            for obj in self.objs:
+                validator.validate(obj)
+            validator.validate_batch(self.objs)
+        self.assertEqual(1, pool.call_count)
+
+    def test_executor(self):
+        executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+        validator = Validator(dict(copy.deepcopy(ValidatorTestCase.CFG), **{'checks.concurrency': 2}), executor)
+        with mock.patch.object(executor, 'submit', wraps=executor.submit) as submit:
+            res = validator.validate_batch(self.objs)
+        self.assertEqual(self.validator().validate_batch(self.objs), res)
+        self.assertEqual(2 * len(self.objs), submit.call_count)
+        validator.close()
+        self.assertEqual(1, executor.submit(len, [1]).result())  # executor of caller is not shut down
+
+    def test_close(self):
+        executors = []
+
+        def create(**kwargs):
+            executors.append(ThreadPoolExecutor(**kwargs))
+            return executors[-1]
+
+        with mock.patch('na3x.validation.validator.ThreadPoolExecutor', side_effect=create):
+            with self.validator(**{'checks.concurrency': 4}) as validator:
+                expected = validator.validate_batch(self.objs)
+            with self.assertRaises(RuntimeError):
+                executors[0].submit(len, [])
+            self.assertEqual(expected, validator.validate_batch(self.objs))  # new pool is created after close
+            validator.close()
+        self.assertEqual(2, len(executors))
+
+
+class WhatIfTest(unittest.TestCase):
+    def setUp(self):
+        self.rows = [{'key': 'SP-0', 'group': 'backend', 'hours': 4}, {'key': 'SP-1', 'group': 'ui', 'hours': 3},
+                     {'key': 'SP-0', 'group': 'ui', 'hours': 1}]
+        self.base = copy.deepcopy(self.rows)
+
+    def test_substitute(self):
+        whatif = WhatIf(self.rows, ['key'])
+        overlay = whatif.substitute({'key': 'SP-1', 'hours': 5}, 'hours')
+        self.assertEqual([4, 5, 1], [row['hours'] for row in overlay])
+        self.assertEqual({'key': 'SP-1', 'group': 'ui', 'hours': 5}, overlay.get({'key': 'SP-1'}))
+        self.assertEqual(3, len(overlay))
+        self.assertEqual([2, 5, 1], [row['hours'] for row in overlay.substitute({'key': 'SP-0', 'hours': 2}, 'hours')])
+        self.assertEqual(self.base, self.rows)
+        self.assertEqual(self.base, list(whatif))
+
+    def test_append(self):
+        whatif = WhatIf(self.rows, ['key', 'group'])
+        overlay = whatif.substitute({'key': 'SP-1', 'group': 'backend', 'hours': 2}, 'hours')
+        self.assertEqual(4, len(overlay))
+        self.assertEqual(3, len(whatif))
+        self.assertEqual({'key': 'SP-1', 'group': 'backend', 'hours': 2}, list(overlay)[-1])
+        self.assertEqual(2, overlay.get({'key': 'SP-1', 'group': 'backend'})['hours'])
+        self.assertIsNone(whatif.get({'key': 'SP-1', 'group': 'backend'}))
+        self.assertEqual(self.base, self.rows)
+
+    def test_stacking(self):
+        whatif = WhatIf(self.rows, ['key'])
+        first = whatif.substitute({'key': 'SP-0', 'hours': 8}, 'hours')
+        second = first.substitute({'key': 'SP-2', 'hours': 6}, 'hours')
+        third = second.substitute({'key': 'SP-2', 'hours': 7}, 'hours')
+        branch = first.substitute({'key': 'SP-1', 'hours': 0}, 'hours')
+        self.assertEqual([8, 3, 1, 7], [row['hours'] for row in third])
+        self.assertEqual([8, 3, 1, 6], [row['hours'] for row in second])
+        self.assertEqual([8, 0, 1], [row['hours'] for row in branch])
+        self.assertEqual([8, 3, 1], [row['hours'] for row in first])
+        self.assertEqual({'key': 'SP-2', 'hours': 7}, third.get({'key': 'SP-2'}))
+        self.assertEqual(8, third.get({'key': 'SP-0'})['hours'])
+        self.assertEqual(self.base, self.rows)
+
+    def test_unhashable(self):
+        rows = [{'key': ['SP-0'], 'hours': 1}, {'key': 'SP-1', 'hours': 2}]
+        whatif = WhatIf(rows, ['key'])
+        self.assertEqual(2, whatif.get({'key': 'SP-1'})['hours'])
+        overlay = whatif.substitute({'key': ['SP-0'], 'hours': 3}, 'hours').substitute({'key': ['SP-2'], 'hours': 4},
+                                                                                     'hours')
+        self.assertEqual([3, 2, 4], [row['hours'] for row in overlay])
+        self.assertEqual(4, overlay.get({'key': ['SP-2']})['hours'])
+        self.assertEqual(1, rows[0]['hours'])
+
+
+class SubstituteTest(ValidatorTestCase):
+    def test_prefetched_dataset_is_not_changed(self):
+        validator = self.validator(memo=False)
+        objs = [{'key': 'SP-0', 'group': 'backend', 'hours': 9}, {'key': 'SP-2', 'group': 'backend', 'hours': 1}]
+        expected = [validator.validate(obj) for obj in objs]
+        self.assertEqual('Capacity 10 is exceeded', expected[0][0]['message'])
+        self.assertIsNone(expected[1])
+        self.assertEqual(expected, validator.validate_batch(objs))
+        self.assertEqual(list(reversed(expected)), validator.validate_batch(list(reversed(objs))))
+        self.assertEqual([4, 4], [doc['hours'] for doc in self.db.allocation.find({'group': 'backend'})])